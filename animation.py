@@ -0,0 +1,375 @@
+import numpy as np
+
+from entity_array import EntityArray
+
+#below this angle between keys slerp falls back to normalized lerp, sin(theta) would divide by ~0
+SLERP_EPSILON = 1e-4
+
+def quaternion_from_axis_angle(axis: list[float], theta: np.ndarray | float) -> np.ndarray:
+    """ (N,4) xyzw quaternions rotating by theta radians about one axis, pyrr's convention. """
+
+    axis = np.asarray(axis, dtype=np.float64)
+    axis = axis / np.linalg.norm(axis)
+    half = np.atleast_1d(np.asarray(theta, dtype=np.float64)) * 0.5
+    q = np.empty((len(half), 4), dtype=np.float32)
+    q[:, 0:3] = axis * np.sin(half)[:, None]
+    q[:, 3] = np.cos(half)
+    return q
+
+def quaternion_multiply(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """ Row-wise product of (N,4) xyzw quaternions, like pyrr.quaternion.cross(a, b). """
+
+    ax, ay, az, aw = np.moveaxis(np.asarray(a), -1, 0)
+    bx, by, bz, bw = np.moveaxis(np.asarray(b), -1, 0)
+    return np.stack([
+        ax * bw + ay * bz - az * by + aw * bx,
+        -ax * bz + ay * bw + az * bx + aw * by,
+        ax * by - ay * bx + az * bw + aw * bz,
+        -ax * bx - ay * by - az * bz + aw * bw,
+    ], axis=-1)
+
+def slerp(a: np.ndarray, b: np.ndarray, t: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    """
+        Spherical interpolation of (N,4) unit quaternions, row by row.
+
+        Parameters:
+
+            a, b: quaternions at t=0 and t=1
+
+            t: (N,) interpolation factors
+
+            out: optional (N,4) result array
+    """
+
+    dot = np.einsum("ij,ij->i", a, b)
+    #q and -q are the same rotation, go the short way round
+    sign = np.where(dot < 0.0, -1.0, 1.0).astype(a.dtype)
+    dot = np.minimum(np.abs(dot), 1.0)
+
+    theta = np.arccos(dot)
+    sin_theta = np.sin(theta)
+    close = sin_theta < SLERP_EPSILON
+    safe = np.where(close, 1.0, sin_theta)
+    wa = np.where(close, 1.0 - t, np.sin((1.0 - t) * theta) / safe)
+    wb = np.where(close, t, np.sin(t * theta) / safe) * sign
+
+    if out is None:
+        out = np.empty_like(a)
+    np.multiply(a, wa[:, None], out=out)
+    out += b * wb[:, None]
+    #only needed for the lerp fallback, but cheaper than selecting rows
+    out /= np.sqrt(np.einsum("ij,ij->i", out, out))[:, None]
+    return out
+
+def compose_transforms(positions: np.ndarray, rotations: np.ndarray, scales: np.ndarray,
+                       out: np.ndarray | None = None) -> np.ndarray:
+    """
+        Model matrices scale, then rotate, then translate, for row vectors like the rest of the renderer.
+
+        The rotation block matches pyrr.matrix44.create_from_quaternion.
+
+        Parameters:
+
+            positions: (N,3)
+
+            rotations: (N,4) xyzw unit quaternions
+
+            scales: (N,3)
+
+            out: optional (N,4,4) float32 result array
+    """
+
+    if out is None:
+        out = np.empty((len(positions), 4, 4), dtype=np.float32)
+    x, y, z, w = rotations.T
+    xx, yy, zz = x * x, y * y, z * z
+    xy, xz, yz = x * y, x * z, y * z
+    wx, wy, wz = w * x, w * y, w * z
+
+    sx, sy, sz = scales.T
+    out[:, 0, 0] = (1.0 - 2.0 * (yy + zz)) * sx
+    out[:, 0, 1] = 2.0 * (xy - wz) * sx
+    out[:, 0, 2] = 2.0 * (xz + wy) * sx
+    out[:, 1, 0] = 2.0 * (xy + wz) * sy
+    out[:, 1, 1] = (1.0 - 2.0 * (xx + zz)) * sy
+    out[:, 1, 2] = 2.0 * (yz - wx) * sy
+    out[:, 2, 0] = 2.0 * (xz - wy) * sz
+    out[:, 2, 1] = 2.0 * (yz + wx) * sz
+    out[:, 2, 2] = (1.0 - 2.0 * (xx + yy)) * sz
+    out[:, 0:3, 3] = 0.0
+    out[:, 3, 0:3] = positions
+    out[:, 3, 3] = 1.0
+    return out
+
+class AnimationClip:
+    """
+        Position, rotation and scale keyframe tracks.
+
+        Each track is (times, values) with its own increasing key times in
+        seconds. A missing track holds the identity, a single key holds still.
+    """
+
+    def __init__(self, positions: tuple | None = None, rotations: tuple | None = None,
+                 scales: tuple | None = None, duration: float | None = None):
+        """
+            Parameters:
+
+                positions: ((K,) times, (K,3) positions)
+
+                rotations: ((K,) times, (K,4) xyzw quaternions)
+
+                scales: ((K,) times, (K,3) scales)
+
+                duration: length of one loop, the last key time by default
+        """
+
+        self.tracks = {
+            "position": _track(positions, [0.0, 0.0, 0.0]),
+            "rotation": _track(rotations, [0.0, 0.0, 0.0, 1.0]),
+            "scale": _track(scales, [1.0, 1.0, 1.0]),
+        }
+        if duration is None:
+            duration = max(times[-1] for times, _ in self.tracks.values())
+        self.duration = float(duration)
+
+def _track(track: tuple | None, identity: list[float]) -> tuple[np.ndarray, np.ndarray]:
+    if track is None:
+        return np.zeros(1), np.array([identity], dtype=np.float32)
+    times, values = track
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float32).reshape(len(times), len(identity))
+    if len(times) == 0 or np.any(np.diff(times) <= 0):
+        raise ValueError("key times must be increasing and there must be at least one key")
+    if len(identity) == 4:
+        values = values / np.linalg.norm(values, axis=1, keepdims=True)
+    return times, values
+
+class _PackedTrack:
+    """
+        One channel of every clip concatenated, so all instances search it at once.
+
+        Each clip's key times are shifted past the previous clip's, which keeps
+        the concatenation sorted: one np.searchsorted finds the keys of every
+        instance, whatever clip it plays.
+    """
+
+    def __init__(self, tracks: list[tuple[np.ndarray, np.ndarray]]):
+
+        counts = np.array([len(times) for times, _ in tracks])
+        self.starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        self.lasts = self.starts + counts - 1
+
+        #gaps of at least one second keep clips apart, key times are float64 so this costs no precision
+        spans = np.array([times[-1] - times[0] + 1.0 for times, _ in tracks])
+        self.bases = np.concatenate([[0.0], np.cumsum(spans)[:-1]]) - np.array([times[0] for times, _ in tracks])
+        self.times = np.concatenate([times + base for (times, _), base in zip(tracks, self.bases)])
+        self.values = np.concatenate([values for _, values in tracks])
+
+    def locate(self, clips: np.ndarray, times: np.ndarray,
+               hints: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+            Key before, key after and the factor between them for each (clip, time).
+
+            hints: optional key index per row from the previous frame, updated in
+                place. Time moves forward a little each frame, so most rows are
+                still between the same two keys and skip the search.
+        """
+
+        shifted = self.bases[clips] + times
+        starts = self.starts[clips]
+        lasts = self.lasts[clips]
+
+        if hints is None:
+            before = self._search(shifted, starts, lasts)
+        else:
+            after = np.minimum(hints + 1, lasts)
+            stale = ((hints < starts) | (hints > lasts) | (shifted < self.times[hints])
+                     | ((shifted >= self.times[after]) & (after > hints)))
+            stale = np.flatnonzero(stale)
+            if len(stale):
+                hints[stale] = self._search(shifted[stale], starts[stale], lasts[stale])
+            before = hints
+
+        after = np.minimum(before + 1, lasts)
+        span = self.times[after] - self.times[before]
+        factor = np.where(span > 0.0, (shifted - self.times[before]) / np.where(span > 0.0, span, 1.0), 0.0)
+        return before, after, np.clip(factor, 0.0, 1.0).astype(np.float32)
+
+    def _search(self, shifted: np.ndarray, starts: np.ndarray, lasts: np.ndarray) -> np.ndarray:
+        before = np.searchsorted(self.times, shifted, side="right") - 1
+        return np.clip(before, starts, lasts)
+
+    def sample(self, clips: np.ndarray, times: np.ndarray, rotation: bool = False,
+               hints: np.ndarray | None = None) -> np.ndarray:
+
+        before, after, factor = self.locate(clips, times, hints)
+        if rotation:
+            return slerp(self.values[before], self.values[after], factor)
+        a = self.values[before]
+        return a + (self.values[after] - a) * factor[:, None]
+
+class Animator:
+    """
+        Plays clips on many entities, sampling every animation in a few vectorized passes per frame.
+
+        Each animation drives one entity. It plays a clip at a speed, looping
+        or holding its last pose, and can blend towards a second clip, either
+        with a fixed weight or as a crossfade that replaces the first clip once
+        the weight reaches 1.
+    """
+
+    def __init__(self, clips: list[AnimationClip], capacity: int):
+        """
+            Parameters:
+
+                clips: the clips animations refer to by index
+
+                capacity: maximum number of animations playing at once
+        """
+
+        self.clips = clips
+        self.durations = np.array([clip.duration for clip in clips], dtype=np.float64)
+        self.tracks = {name: _PackedTrack([clip.tracks[name] for clip in clips])
+                       for name in ("position", "rotation", "scale")}
+
+        self.capacity = capacity
+        self.count = 0
+        self.entities = np.zeros(capacity, dtype=np.int64)
+        self.speeds = np.ones(capacity, dtype=np.float64)
+        self.loops = np.ones(capacity, dtype=bool)
+        self.clips_a = np.zeros(capacity, dtype=np.int64)
+        self.times_a = np.zeros(capacity, dtype=np.float64)
+        #second clip, -1 when not blending
+        self.clips_b = np.full(capacity, -1, dtype=np.int64)
+        self.times_b = np.zeros(capacity, dtype=np.float64)
+        self.weights = np.zeros(capacity, dtype=np.float32)
+        #weight change per second, 0 for a fixed blend
+        self.fade_rates = np.zeros(capacity, dtype=np.float32)
+
+        #key found last frame per animation and track, for the first clip only
+        self.hints = {name: np.zeros(capacity, dtype=np.int64) for name in self.tracks}
+
+        self.positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.rotations = np.zeros((capacity, 4), dtype=np.float32)
+        self.scales = np.ones((capacity, 3), dtype=np.float32)
+
+    def play(self, entities: np.ndarray | int, clips: np.ndarray | int, times: np.ndarray | float = 0.0,
+             speeds: np.ndarray | float = 1.0, loops: np.ndarray | bool = True) -> np.ndarray:
+        """ Start animations on entities, scalars broadcast. Returns the animation indices. """
+
+        n = np.broadcast(entities, clips, times, speeds, loops).size
+        if self.count + n > self.capacity:
+            raise IndexError(f"Animator is full ({self.capacity} animations)")
+
+        items = slice(self.count, self.count + n)
+        self.entities[items] = entities
+        self.clips_a[items] = clips
+        self.times_a[items] = times
+        self.speeds[items] = speeds
+        self.loops[items] = loops
+        self.clips_b[items] = -1
+        self.times_b[items] = 0.0
+        self.weights[items] = 0.0
+        self.fade_rates[items] = 0.0
+        self.count += n
+        return np.arange(items.start, items.stop)
+
+    def blend(self, animations: np.ndarray | int, clips: np.ndarray | int, weights: np.ndarray | float) -> None:
+        """ Mix a second clip in at a fixed weight, 0 plays only the first clip and 1 only the second. """
+
+        self.clips_b[animations] = clips
+        self.times_b[animations] = self.times_a[animations]
+        self.weights[animations] = weights
+        self.fade_rates[animations] = 0.0
+
+    def crossfade(self, animations: np.ndarray | int, clips: np.ndarray | int, duration: float) -> None:
+        """ Fade from the current clip to another over duration seconds, the new clip starts at 0. """
+
+        self.clips_b[animations] = clips
+        self.times_b[animations] = 0.0
+        self.weights[animations] = 0.0
+        self.fade_rates[animations] = 1.0 / max(duration, 1e-6)
+
+    def clear(self) -> None:
+
+        self.count = 0
+
+    def advance(self, dt: float) -> None:
+        """ Move every animation dt seconds forward and finish completed crossfades. """
+
+        n = self.count
+        step = self.speeds[:n] * dt
+        self.times_a[:n] += step
+        self.times_b[:n] += step
+
+        weights = self.weights[:n]
+        weights += self.fade_rates[:n] * np.float32(dt)
+        done = (self.fade_rates[:n] > 0.0) & (weights >= 1.0)
+        if done.any():
+            self.clips_a[:n][done] = self.clips_b[:n][done]
+            self.times_a[:n][done] = self.times_b[:n][done]
+            self.clips_b[:n][done] = -1
+            weights[done] = 0.0
+            self.fade_rates[:n][done] = 0.0
+
+    def _local_times(self, clips: np.ndarray, times: np.ndarray, loops: np.ndarray) -> np.ndarray:
+        durations = self.durations[clips]
+        looped = np.mod(times, np.where(durations > 0.0, durations, 1.0))
+        return np.where(loops, looped, np.clip(times, 0.0, durations))
+
+    def sample(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+            Pose of every animation at its current time.
+
+            Returns:
+
+                ((N,3) positions, (N,4) rotations, (N,3) scales), views of
+                arrays the next sample() overwrites
+        """
+
+        n = self.count
+        loops = self.loops[:n]
+        clips_a = self.clips_a[:n]
+        times_a = self._local_times(clips_a, self.times_a[:n], loops)
+
+        positions = self.positions[:n]
+        rotations = self.rotations[:n]
+        scales = self.scales[:n]
+        positions[:] = self.tracks["position"].sample(clips_a, times_a, hints=self.hints["position"][:n])
+        rotations[:] = self.tracks["rotation"].sample(clips_a, times_a, rotation=True, hints=self.hints["rotation"][:n])
+        scales[:] = self.tracks["scale"].sample(clips_a, times_a, hints=self.hints["scale"][:n])
+
+        #only the blending animations sample their second clip
+        blending = np.flatnonzero(self.clips_b[:n] >= 0)
+        if len(blending):
+            clips_b = self.clips_b[blending]
+            times_b = self._local_times(clips_b, self.times_b[blending], loops[blending])
+            weights = np.clip(self.weights[blending], 0.0, 1.0)
+
+            a = positions[blending]
+            positions[blending] = a + (self.tracks["position"].sample(clips_b, times_b) - a) * weights[:, None]
+            a = scales[blending]
+            scales[blending] = a + (self.tracks["scale"].sample(clips_b, times_b) - a) * weights[:, None]
+            rotations[blending] = slerp(rotations[blending],
+                                        self.tracks["rotation"].sample(clips_b, times_b, rotation=True), weights)
+
+        return positions, rotations, scales
+
+    def write_transforms(self, entities: EntityArray) -> np.ndarray:
+        """
+            Sample and write the poses into the animated entities.
+
+            Positions go into entities.positions, so culling and the spatial
+            index see them, and full model matrices into entities.models. Call
+            it after make_model_transforms_*, which would overwrite the rotation.
+
+            Returns:
+
+                the entity indices that were written
+        """
+
+        positions, rotations, scales = self.sample()
+        targets = self.entities[:self.count]
+        entities.positions[targets] = positions
+        entities.models[targets] = compose_transforms(positions, rotations, scales)
+        return targets
@@ -0,0 +1,253 @@
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from OpenGL.GL import *
+import numpy as np
+
+from mesh_format import IndexedMesh, MeshFile, POSITION_COLOR, import_obj, import_ply
+from mesh_optimize import narrow_indices, optimize_mesh
+from scene_io import load_snapshot, read_scene
+from shader_scheduler import PendingProgram, ShaderScheduler
+
+#default per-frame budget for draining finished loads
+BUDGET_MS = 2.0
+BUDGET_BYTES = 4 << 20
+#largest single glBufferSubData, big meshes are uploaded over several steps
+CHUNK_BYTES = 1 << 20
+#more loader threads than this starve the GL thread of the GIL and the frame stalls anyway
+WORKERS = 2
+
+class AssetHandle:
+    """ An asset that may still be loading, resolved by AssetManager.update(). """
+
+    def __init__(self, name: str, kind: str, placeholder=None):
+
+        self.name = name
+        self.kind = kind
+        self.placeholder = placeholder
+        self.asset = None
+        self.ready = False
+        self.error: Exception | None = None
+
+    @property
+    def value(self):
+        """ The asset once ready, the placeholder while loading or after a failure. """
+
+        if self.ready:
+            return self.asset
+        return self.placeholder
+
+class AssetManager:
+    """
+        Loads assets without stalling the frame.
+
+        Files are read and decoded on a thread pool. Decoded results wait in a
+        queue until update(), called once per frame on the GL thread, does
+        their GL work under a time and byte budget. Large buffers are copied
+        in CHUNK_BYTES steps, so one big mesh is spread over several frames.
+    """
+
+    def __init__(self, scheduler: ShaderScheduler, workers: int = WORKERS, budget_ms: float | None = BUDGET_MS,
+                 budget_bytes: int | None = BUDGET_BYTES, placeholders: dict | None = None):
+        """
+            Parameters:
+
+                scheduler: compiles the shader programs once their sources are read
+
+                workers: loader threads
+
+                budget_ms, budget_bytes: GL work allowed per update(), None for no limit;
+                    at least one step runs every update so loading always progresses
+
+                placeholders: kind ("mesh", "shader", "scene") -> value handed out until ready
+        """
+
+        self.scheduler = scheduler
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asset-loader")
+        self.budget_ms = budget_ms
+        self.budget_bytes = budget_bytes
+        self.placeholders = placeholders or {}
+
+        self._decoded: queue.Queue = queue.Queue()
+        self._loading = 0
+        self._upload = None
+        self._compiling: list[tuple[AssetHandle, PendingProgram]] = []
+
+        self.uploaded_bytes = 0
+
+    def load_mesh(self, path: str) -> AssetHandle:
+        """ A binary mesh file, or an OBJ/PLY file that is welded and optimized on the loader thread. """
+
+        return self._submit(path, "mesh", _decode_mesh, path)
+
+    def load_shader(self, vertexFilepath: str, fragmentFilepath: str) -> AssetHandle:
+
+        return self._submit(f"{vertexFilepath}+{fragmentFilepath}", "shader", _decode_shader,
+                            vertexFilepath, fragmentFilepath)
+
+    def load_scene(self, path: str) -> AssetHandle:
+        """ A scene document or .npy snapshot, as an EntityArray. """
+
+        return self._submit(path, "scene", _decode_scene, path)
+
+    def _submit(self, name: str, kind: str, decode, *args) -> AssetHandle:
+        handle = AssetHandle(name, kind, self.placeholders.get(kind))
+        self._loading += 1
+
+        def decoded(future) -> None:
+            self._decoded.put((handle, future))
+
+        self.executor.submit(decode, *args).add_done_callback(decoded)
+        return handle
+
+    @property
+    def idle(self) -> bool:
+        """ True when nothing is loading, waiting for upload or compiling. """
+
+        return self._loading == 0 and not self._compiling
+
+    def update(self) -> int:
+        """
+            Do queued GL work until the frame's budget is spent.
+
+            Returns:
+
+                bytes uploaded this call
+        """
+
+        start = time.perf_counter()
+        spent = 0
+
+        self._resolve_shaders()
+
+        while True:
+            if self._upload is None:
+                try:
+                    handle, future = self._decoded.get_nowait()
+                except queue.Empty:
+                    break
+                if future.exception() is not None:
+                    self._fail(handle, future.exception())
+                    continue
+                self._upload = (handle, self._uploader(handle, future.result()))
+
+            handle, steps = self._upload
+            try:
+                spent += next(steps)
+            except StopIteration:
+                self._upload = None
+                self._loading -= 1
+            except Exception as error:
+                self._upload = None
+                self._fail(handle, error)
+
+            if self.budget_ms is not None and (time.perf_counter() - start) * 1000 >= self.budget_ms:
+                break
+            if self.budget_bytes is not None and spent >= self.budget_bytes:
+                break
+
+        self.uploaded_bytes += spent
+        return spent
+
+    def wait_all(self) -> None:
+        """ Block until every submitted asset is ready or failed, ignoring the budget. """
+
+        budget = self.budget_ms, self.budget_bytes
+        self.budget_ms = self.budget_bytes = None
+        try:
+            while self._loading:
+                self.update()
+                if self._loading and self._upload is None:
+                    #everything left is still decoding
+                    handle, future = self._decoded.get()
+                    self._decoded.put((handle, future))
+            self.scheduler.wait_all()
+            self._resolve_shaders()
+        finally:
+            self.budget_ms, self.budget_bytes = budget
+
+    def shutdown(self) -> None:
+
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def _fail(self, handle: AssetHandle, error: Exception) -> None:
+        handle.error = error
+        self._loading -= 1
+
+    def _resolve_shaders(self) -> None:
+        if not self._compiling:
+            return
+        self.scheduler.poll()
+        still_compiling = []
+        for handle, pending in self._compiling:
+            if pending.error is not None:
+                handle.error = pending.error
+            elif pending.ready:
+                handle.asset = pending.handle
+                handle.ready = True
+            else:
+                still_compiling.append((handle, pending))
+        self._compiling = still_compiling
+
+    def _uploader(self, handle: AssetHandle, decoded):
+        """ Generator doing the GL side of one asset, yielding the bytes each step copied. """
+
+        if handle.kind == "mesh":
+            vertices, indices, stride, attributes = decoded
+            #narrowed once here, so the element buffer gets the array the mesh takes its index type from
+            indices = narrow_indices(indices, vertices.nbytes // stride)
+            mesh = IndexedMesh(vertices, indices, stride, attributes, upload=False)
+            yield 0
+            #GL_COPY_WRITE_BUFFER leaves the element binding of the bound VAO alone
+            for buffer, data in ((mesh.vbo, vertices), (mesh.ebo, indices)):
+                data = data.view(np.uint8).reshape(-1)
+                #allocating costs about as much as filling on some drivers, give it its own step
+                glBindBuffer(GL_COPY_WRITE_BUFFER, buffer)
+                glBufferData(GL_COPY_WRITE_BUFFER, len(data), None, GL_STATIC_DRAW)
+                yield 0
+                for offset in range(0, len(data), CHUNK_BYTES):
+                    chunk = data[offset:offset + CHUNK_BYTES]
+                    glBindBuffer(GL_COPY_WRITE_BUFFER, buffer)
+                    glBufferSubData(GL_COPY_WRITE_BUFFER, offset, len(chunk), chunk)
+                    yield len(chunk)
+            handle.asset = mesh
+            handle.ready = True
+        elif handle.kind == "shader":
+            vertex_src, fragment_src = decoded
+            #compiles on the driver's threads, resolved by later updates
+            self._compiling.append((handle, self.scheduler.submit_source(vertex_src, fragment_src)))
+            yield 0
+        else:
+            handle.asset = decoded
+            handle.ready = True
+            yield 0
+
+def _decode_mesh(path: str) -> tuple:
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".obj", ".ply"):
+        vertices, indices = import_obj(path) if extension == ".obj" else import_ply(path)
+        vertices, indices = optimize_mesh(vertices, indices)
+        return vertices, indices, vertices.itemsize * vertices.shape[1], POSITION_COLOR
+
+    mesh = MeshFile(path)
+    #read the blobs here with plain file reads, which release the GIL, rather
+    #than leaving page faults on the mapping to the GL thread
+    vertices = np.fromfile(path, dtype=np.uint8, count=mesh.vertices.size, offset=int(mesh.header["vertex_offset"]))
+    indices = np.fromfile(path, dtype=mesh.indices.dtype, count=mesh.index_count, offset=int(mesh.header["index_offset"]))
+    return vertices, indices, mesh.stride, mesh.attributes.tolist()
+
+def _decode_shader(vertexFilepath: str, fragmentFilepath: str) -> tuple[str, str]:
+    with open(vertexFilepath,'r') as f:
+        vertex_src = f.read()
+
+    with open(fragmentFilepath,'r') as f:
+        fragment_src = f.read()
+
+    return vertex_src, fragment_src
+
+def _decode_scene(path: str):
+    if path.endswith(".npy"):
+        return load_snapshot(path)
+    return read_scene(path)
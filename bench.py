@@ -0,0 +1,367 @@
+import argparse
+import contextlib
+import fnmatch
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+#GL benches run on a surfaceless EGL context, Mesa llvmpipe when there is no GPU.
+#PyOpenGL reads this when it is first imported, CPU benches never create a context
+os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+#keep Mesa's shader cache out of the user's, in a directory removed when the run exits.
+#Disabling it instead would also turn off program binaries, which create_shader.disk needs
+if "MESA_SHADER_CACHE_DIR" not in os.environ:
+    _mesa_cache = tempfile.TemporaryDirectory(prefix="bench_mesa_cache_")
+    os.environ["MESA_SHADER_CACHE_DIR"] = _mesa_cache.name
+
+import numpy as np
+
+from bench_utils import summarize
+
+RESULTS_PATH = "bench_results.json"
+#fewest measured calls for a case, however slow it is
+MIN_REPEAT = 3
+
+class Benchmark:
+    """ A registered benchmark, timed once for each of its parameters. """
+
+    def __init__(self, name: str, setup, params: tuple, gl: bool, repeat: int, warmup: int):
+        """
+            Parameters:
+
+                setup: generator function taking a parameter, it prepares the case,
+                    yields the zero-argument callable to time and cleans up after
+
+                params: sizes or variants, each one is a separate case
+
+                gl: needs a current GL context, made once for the whole run
+
+                repeat: measured calls, fewer when a case would take longer than the budget
+
+                warmup: unmeasured calls made first
+        """
+
+        self.name = name
+        self.setup = contextlib.contextmanager(setup)
+        self.params = params
+        self.gl = gl
+        self.repeat = repeat
+        self.warmup = warmup
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+def benchmark(name: str, params: tuple, gl: bool = False, repeat: int = 30, warmup: int = 3):
+    """ Register the decorated setup generator as a benchmark, see Benchmark. """
+
+    def register(setup):
+        BENCHMARKS[name] = Benchmark(name, setup, params, gl, repeat, warmup)
+        return setup
+
+    return register
+
+def random_entities(count: int):
+    from entity_array import EntityArray
+
+    rng = np.random.default_rng(count)
+    entities = EntityArray(max(count, 1))
+    entities.positions[:count] = rng.uniform(-10, 10, (count, 3))
+    entities.eulers[:count] = rng.uniform(0, 360, (count, 3))
+    entities.count = count
+    return entities
+
+#transforms
+
+def _entity_transform(variant: str):
+
+    def setup(count: int):
+        from main import Entity
+
+        entities = random_entities(count)
+        reference = [Entity(entities.positions[i].tolist(), entities.eulers[i].tolist()) for i in range(count)]
+        methods = [getattr(entity, f"make_model_transform_{variant}") for entity in reference]
+        yield lambda: [method() for method in methods]
+
+    benchmark(f"transforms.entity_{variant}", params=(1, 100, 1_000))(setup)
+
+for _variant in ("x", "y", "xy"):
+    _entity_transform(_variant)
+
+@benchmark("transforms.batched_xy", params=(100, 10_000, 100_000))
+def batched_transforms(count: int):
+    entities = random_entities(count)
+    yield entities.make_model_transforms_xy
+
+#mesh building
+
+@benchmark("build_vertices.cpu", params=(3, 3_000, 300_000))
+def build_vertices_cpu(count: int):
+    """ The CPU half of TriangleMesh.build_vertices, into a persistent buffer like the mapped one. """
+
+    from pyrr import matrix44
+    from cpu_transform import CpuVertexTransform
+
+    rng = np.random.default_rng(count)
+    positions = np.ones((count, 4), dtype=np.float32)
+    positions[:, 0:3] = rng.uniform(-1, 1, (count, 3))
+    colors = rng.uniform(0, 1, (count, 3)).astype(np.float32)
+    transform = matrix44.create_from_eulers(np.radians([10, 20, 30]), dtype=np.float32)
+
+    mesh = CpuVertexTransform(positions, colors)
+    out = np.empty_like(mesh.vertices)
+    yield lambda: mesh.apply(transform, out=out)
+
+@benchmark("build_vertices.gl", params=("triangle",), gl=True)
+def build_vertices_gl(mesh_name: str):
+    """ triangle.TriangleMesh.build_vertices as rendered: map the ring segment, transform into it, unmap. """
+
+    from pyrr import matrix44
+    from triangle import TriangleMesh
+
+    mesh = TriangleMesh()
+    transform = matrix44.create_from_eulers(np.radians([10, 20, 30]), dtype=np.float32)
+
+    def build() -> None:
+        mesh.build_vertices(transform)
+        mesh.vertex_buffer.fence()
+
+    yield build
+    mesh.destroy()
+
+#shaders
+
+SHADERS = {
+    "main": ("shaders/vertex.txt", "shaders/fragment.txt"),
+    "instanced": ("shaders/vertex_instanced.txt", "shaders/fragment.txt"),
+    "triangle": ("triangle_shaders/vertex.txt", "triangle_shaders/fragment.txt"),
+}
+
+@benchmark("create_shader.compile", params=tuple(SHADERS), gl=True, warmup=10)
+def compile_shader(shader: str):
+    """ A full compile and link, what createShader pays with no cached binary. """
+
+    from shader_cache import ShaderCache
+
+    cache = ShaderCache()
+    sources = []
+    for path in SHADERS[shader]:
+        with open(path, 'r') as f:
+            sources.append(f.read())
+    vertex_src, fragment_src = sources
+    #Mesa's shader cache is keyed on the source, a new comment each call keeps it from answering
+    calls = itertools.count()
+
+    def compile() -> None:
+        call = next(calls)
+        cache.delete_program(cache.compile(f"{vertex_src}\n//{call}\n", f"{fragment_src}\n//{call}\n"))
+
+    yield compile
+
+@benchmark("create_shader.disk", params=tuple(SHADERS), gl=True)
+def load_shader_binary(shader: str):
+    """ createShader on a new start: the program comes back from its binary on disk. """
+
+    from shader_cache import ShaderCache
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ShaderCache(directory)
+        cache.delete_program(cache.load(*SHADERS[shader]))
+
+        def load() -> None:
+            cache.delete_program(cache.load(*SHADERS[shader]))
+
+        yield load
+
+@benchmark("create_shader.memory", params=tuple(SHADERS), gl=True)
+def load_shader_cached(shader: str):
+    """ A repeated createShader call, read the files, hash them and find the linked program. """
+
+    from shader_cache import ShaderCache
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ShaderCache(directory)
+        program = cache.load(*SHADERS[shader])
+        yield lambda: cache.load(*SHADERS[shader])
+        cache.delete_program(program)
+
+#scene JSON, the write_json.py and read_json.py paths
+
+@benchmark("json.write_scene", params=(100, 10_000, 100_000))
+def write_scene_bench(count: int):
+    from scene_io import write_scene
+
+    entities = random_entities(count)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "scene.json")
+        yield lambda: write_scene(path, entities, tilin="ete sech", numero=4444)
+
+@benchmark("json.read_scene", params=(100, 10_000, 100_000))
+def read_scene_bench(count: int):
+    from scene_io import read_scene, write_scene
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "scene.json")
+        write_scene(path, random_entities(count))
+        yield lambda: read_scene(path)
+
+@benchmark("json.iter_entities", params=(100, 10_000, 100_000))
+def iter_entities_bench(count: int):
+    """ read_json.py: the metadata, then every entity streamed without building an EntityArray. """
+
+    from scene_io import iter_entities, read_metadata, write_scene
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "scene.json")
+        write_scene(path, random_entities(count))
+
+        def read() -> None:
+            read_metadata(path)
+            for _ in iter_entities(path):
+                pass
+
+        yield read
+
+def measure(fn, repeat: int, warmup: int, budget: float) -> dict[str, float]:
+    """
+        Time fn like bench_utils.time_call, with the number of calls cut to
+        fit in budget seconds, judged from the warmup calls.
+    """
+
+    warmup = max(warmup, 1)
+    start = time.perf_counter()
+    for _ in range(warmup):
+        fn()
+    per_call = (time.perf_counter() - start) / warmup
+    repeat = max(MIN_REPEAT, min(repeat, int(budget / max(per_call, 1e-9))))
+
+    samples = np.empty(repeat, dtype=np.float64)
+    for i in range(repeat):
+        start = time.perf_counter_ns()
+        fn()
+        samples[i] = time.perf_counter_ns() - start
+
+    return {**summarize(samples / 1e6), "repeat": repeat}
+
+def select(patterns: list[str]) -> list[Benchmark]:
+    if not patterns:
+        return list(BENCHMARKS.values())
+    selected = [bench for bench in BENCHMARKS.values() if any(fnmatch.fnmatch(bench.name, p) for p in patterns)]
+    if not selected:
+        raise SystemExit(f"no benchmark matches {patterns}, see python bench.py list")
+    return selected
+
+def make_context() -> tuple:
+    """ Make the shared headless context, returns its offscreen target and the renderer string. """
+
+    from OpenGL.GL import GL_RENDERER, glGetString
+    from gl_context import OffscreenTarget, create_headless_context
+
+    create_headless_context()
+    target = OffscreenTarget(64, 64)
+    return target, glGetString(GL_RENDERER).decode()
+
+def run(args: argparse.Namespace) -> None:
+    #release mode like the apps, chosen before any benchmark imports OpenGL
+    import gl_dispatch
+    gl_dispatch.configure(debug=args.gl_debug or gl_dispatch.debug_requested())
+
+    benches = select(args.patterns)
+    if args.no_gl:
+        benches = [bench for bench in benches if not bench.gl]
+
+    results = {}
+    target = None
+    renderer = None
+    for bench in benches:
+        if bench.gl and target is None:
+            target, renderer = make_context()
+
+        params = bench.params[:1] if args.quick else bench.params
+        for param in params:
+            case = f"{bench.name}[{param}]"
+            with bench.setup(param) as fn:
+                result = measure(fn, args.repeat or bench.repeat, bench.warmup, args.budget)
+            results[case] = result
+            print(f"{case:<40} {result['p50_ms']:>10.4f} ms p50 {result['min_ms']:>10.4f} ms min  x{result['repeat']}")
+
+    if target is not None:
+        target.destroy()
+
+    report = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "renderer": renderer,
+        "gl_debug": gl_dispatch.DEBUG,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"wrote {len(results)} results to {args.output}")
+
+def compare(args: argparse.Namespace) -> None:
+    """ Exit with status 1 when any case both runs share got slower than the threshold allows. """
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)["results"]
+    with open(args.current, 'r') as f:
+        current = json.load(f)["results"]
+
+    regressions = 0
+    print(f"{'case':<40} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for case in [case for case in baseline if case in current]:
+        before = baseline[case][args.stat]
+        after = current[case][args.stat]
+        change = after / before - 1 if before > 0 else 0.0
+        regressed = change > args.threshold
+        regressions += regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{case:<40} {before:>12.4f} {after:>12.4f} {change:>+8.1%}{flag}")
+
+    for case in sorted(baseline.keys() - current.keys()):
+        print(f"{case:<40} only in the baseline")
+    for case in sorted(current.keys() - baseline.keys()):
+        print(f"{case:<40} new, no baseline")
+
+    if regressions:
+        print(f"{regressions} regressions over {args.threshold:.0%} on {args.stat}")
+        sys.exit(1)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark suite with saved results and regression checks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="list the benchmarks and their parameters")
+
+    run_parser = commands.add_parser("run", help="run benchmarks and write their results as JSON")
+    run_parser.add_argument("patterns", nargs="*", help="benchmark names or globs, e.g. 'json.*', default all")
+    run_parser.add_argument("--no-gl", action="store_true", help="skip the benchmarks that need a GL context")
+    run_parser.add_argument("--quick", action="store_true", help="only the first parameter of each benchmark")
+    run_parser.add_argument("--repeat", type=int, help="measured calls per case, instead of each benchmark's own")
+    run_parser.add_argument("--budget", type=float, default=2.0, help="seconds of measured calls per case at most")
+    run_parser.add_argument("--gl-debug", action="store_true", help="keep PyOpenGL's error checking on, GL_DEBUG=1 does too")
+    run_parser.add_argument("--output", default=RESULTS_PATH)
+
+    compare_parser = commands.add_parser("compare", help="fail when results regressed against a baseline")
+    compare_parser.add_argument("baseline", help="results saved earlier, e.g. a copy of bench_results.json")
+    compare_parser.add_argument("current", nargs="?", default=RESULTS_PATH)
+    #sub-millisecond GL cases move by 10-20% between runs on llvmpipe
+    compare_parser.add_argument("--threshold", type=float, default=0.20, help="allowed slowdown, 0.20 is 20%%")
+    compare_parser.add_argument("--stat", default="p50_ms", choices=["mean_ms", "p50_ms", "p95_ms", "min_ms"])
+
+    args = parser.parse_args()
+    if args.command == "list":
+        for bench in BENCHMARKS.values():
+            print(f"{bench.name:<28} {'GL' if bench.gl else 'CPU':<4} {', '.join(str(p) for p in bench.params)}")
+    elif args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+if __name__ == "__main__":
+    main()
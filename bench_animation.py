@@ -0,0 +1,88 @@
+import numpy as np
+import pyrr
+
+from animation import AnimationClip, Animator, quaternion_from_axis_angle
+from bench_utils import time_call
+from entity_array import EntityArray
+
+SIZES = (10_000, 100_000)
+CLIPS = 16
+#share of animations crossfading into a second clip
+BLENDING = 0.25
+DT = 1 / 144
+#the per-entity Python loop is timed on this many animations and scaled up
+LOOP_SAMPLE = 2_000
+
+def random_clip(rng: np.random.Generator) -> AnimationClip:
+    keys = int(rng.integers(8, 33))
+    duration = rng.uniform(1, 4)
+    times = np.sort(rng.uniform(0, duration, keys))
+    times[0] = 0.0
+    axis = rng.normal(size=3)
+    return AnimationClip(
+        positions=(times, rng.uniform(-1, 1, (keys, 3))),
+        rotations=(times, quaternion_from_axis_angle(axis, np.cumsum(rng.uniform(0, 1, keys)))),
+        scales=(times, rng.uniform(0.5, 1.5, (keys, 3))),
+        duration=duration,
+    )
+
+def python_loop(clips: list[AnimationClip], clip_ids: list[int], times: list[float]) -> list[np.ndarray]:
+    """ One animation at a time with pyrr, the way it would be written per entity. """
+
+    models = []
+    for clip_id, t in zip(clip_ids, times):
+        clip = clips[clip_id]
+        t = t % clip.duration
+        pose = []
+        for name in ("position", "rotation", "scale"):
+            key_times, values = clip.tracks[name]
+            i = min(max(np.searchsorted(key_times, t, side="right") - 1, 0), len(key_times) - 1)
+            j = min(i + 1, len(key_times) - 1)
+            f = 0.0 if j == i else min(max((t - key_times[i]) / (key_times[j] - key_times[i]), 0.0), 1.0)
+            if name == "rotation":
+                pose.append(pyrr.quaternion.slerp(values[i], values[j], f))
+            else:
+                pose.append(values[i] + (values[j] - values[i]) * f)
+        position, rotation, scale = pose
+        model = pyrr.matrix44.create_from_scale(scale, dtype=np.float32)
+        model = pyrr.matrix44.multiply(model, pyrr.matrix44.create_from_quaternion(rotation, dtype=np.float32))
+        model = pyrr.matrix44.multiply(model, pyrr.matrix44.create_from_translation(position, dtype=np.float32))
+        models.append(model)
+    return models
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    clips = [random_clip(rng) for _ in range(CLIPS)]
+
+    print(f"{'animations':>11} {'advance ms':>11} {'sample ms':>10} {'write ms':>9} {'frame ms':>9} "
+          f"{'ns/anim':>8} {'python loop ms':>15} {'max diff':>9}")
+    for n in SIZES:
+        entities = EntityArray(n)
+        entities.count = n
+        animator = Animator(clips, n)
+        animator.play(np.arange(n), rng.integers(0, CLIPS, n), rng.uniform(0, 4, n), rng.uniform(0.5, 2, n))
+
+        advance_ms = time_call(lambda: animator.advance(DT), repeat=20)["mean_ms"]
+        sample_ms = time_call(animator.sample, repeat=20)["mean_ms"]
+        write_ms = time_call(lambda: animator.write_transforms(entities), repeat=20)["mean_ms"]
+
+        #check against the per-entity loop before any blending starts
+        models = python_loop(clips, animator.clips_a[:LOOP_SAMPLE].tolist(), animator.times_a[:LOOP_SAMPLE].tolist())
+        loop_ms = time_call(lambda: python_loop(clips, animator.clips_a[:LOOP_SAMPLE].tolist(),
+                                                animator.times_a[:LOOP_SAMPLE].tolist()),
+                            repeat=1, warmup=0)["mean_ms"] * n / LOOP_SAMPLE
+        max_diff = np.abs(entities.models[:LOOP_SAMPLE] - np.array(models)).max()
+
+        fading = rng.choice(n, int(n * BLENDING), replace=False)
+        animator.crossfade(fading, rng.integers(0, CLIPS, len(fading)), 0.5)
+
+        def frame() -> None:
+            animator.advance(DT)
+            animator.write_transforms(entities)
+
+        frame_ms = time_call(frame, repeat=20)["mean_ms"]
+        print(f"{n:>11} {advance_ms:>11.2f} {sample_ms:>10.2f} {write_ms:>9.2f} {frame_ms:>9.2f} "
+              f"{frame_ms * 1e6 / n:>8.0f} {loop_ms:>15.0f} {max_diff:>9.1e}")
+
+if __name__ == "__main__":
+    main()
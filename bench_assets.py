@@ -0,0 +1,84 @@
+import os
+import tempfile
+import time
+
+os.environ["PYOPENGL_PLATFORM"] = "egl"
+
+from OpenGL.GL import *
+import numpy as np
+
+from asset_manager import AssetManager
+from bench_mesh_loading import grid
+from bench_utils import summarize
+from gl_context import OffscreenTarget, create_headless_context
+from mesh_format import POSITION_COLOR, BinaryMesh, write_mesh
+from shader_scheduler import ShaderScheduler
+
+MESHES = 4
+#grid side in quads, ~24 MB of vertices and indices per mesh
+SIDE = 700
+FRAMES = 240
+LOAD_AT = 20
+
+def run(paths: list[str], mode: str) -> tuple[np.ndarray, int]:
+    """ Frame times in ms with the meshes requested at frame LOAD_AT, and the frame the last one was ready. """
+
+    scheduler = ShaderScheduler()
+    if mode == "budget":
+        assets = AssetManager(scheduler)
+    else:
+        assets = AssetManager(scheduler, budget_ms=None, budget_bytes=None)
+
+    handles = []
+    meshes = []
+    ready_at = -1
+    samples = np.empty(FRAMES, dtype=np.float64)
+    for frame in range(FRAMES):
+        start = time.perf_counter()
+        glClear(GL_COLOR_BUFFER_BIT)
+        if frame == LOAD_AT:
+            if mode == "sync":
+                meshes = [BinaryMesh(path) for path in paths]
+            else:
+                handles = [assets.load_mesh(path) for path in paths]
+        assets.update()
+        glFinish()
+        samples[frame] = (time.perf_counter() - start) * 1000
+
+        if ready_at < 0 and frame >= LOAD_AT and (mode == "sync" or all(handle.ready for handle in handles)):
+            ready_at = frame - LOAD_AT
+        #a frame's worth of time in a real app, it lets the loader threads run
+        time.sleep(0.004)
+
+    assets.shutdown()
+    for mesh in meshes + [handle.value for handle in handles if handle.ready]:
+        mesh.destroy()
+    return samples, ready_at
+
+def main() -> None:
+    create_headless_context()
+    target = OffscreenTarget(64, 64)
+
+    directory = tempfile.mkdtemp()
+    vertices, indices = grid(SIDE)
+    paths = []
+    for i in range(MESHES):
+        path = os.path.join(directory, f"mesh{i}.mesh")
+        write_mesh(path, vertices, indices, POSITION_COLOR)
+        paths.append(path)
+    megabytes = sum(os.path.getsize(path) for path in paths) / 1e6
+
+    print(f"{MESHES} meshes, {megabytes:.0f} MB, requested at frame {LOAD_AT}")
+    print(f"{'mode':>8} {'p50 ms':>7} {'p99 ms':>7} {'max ms':>7} {'ready after frames':>19}")
+    for mode in ("sync", "no limit", "budget"):
+        samples, ready_at = run(paths, mode)
+        stats = summarize(samples)
+        print(f"{mode:>8} {stats['p50_ms']:>7.2f} {stats['p99_ms']:>7.2f} {stats['max_ms']:>7.2f} {ready_at:>19}")
+
+    for path in paths:
+        os.remove(path)
+    os.rmdir(directory)
+    target.destroy()
+
+if __name__ == "__main__":
+    main()
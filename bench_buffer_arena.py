@@ -0,0 +1,131 @@
+import os
+
+os.environ["PYOPENGL_PLATFORM"] = "egl"
+
+from OpenGL.GL import *
+import numpy as np
+
+from bench_utils import time_call
+from buffer_arena import MeshArena
+from gl_context import OffscreenTarget, create_headless_context
+from mesh_format import IndexedMesh
+from shader_cache import shader_cache
+from vertex_format import POSITION_COLOR_F32
+
+MESHES = (1_000, 5_000)
+#vertices on the rim of each mesh's fan, picked per mesh
+RIM = (4, 64)
+WIDTH = HEIGHT = 256
+
+#positions are already in clip space, so the timing is the draw submission only
+PASSTHROUGH_VERTEX = """#version 330 core
+
+layout (location=0) in vec3 vertexPos;
+layout (location=1) in vec3 vertexColor;
+
+out vec3 fragmentColor;
+
+void main()
+{
+    gl_Position = vec4(vertexPos, 1.0);
+    fragmentColor = vertexColor;
+}
+"""
+
+def random_fan(rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    """ A small disc somewhere on screen, as POSITION_COLOR_F32 records and a triangle list. """
+
+    rim = int(rng.integers(*RIM))
+    angles = np.linspace(0, 2 * np.pi, rim, endpoint=False)
+    center = rng.uniform(-0.9, 0.9, 2)
+    radius = rng.uniform(0.01, 0.05)
+    positions = np.zeros((rim + 1, 3), dtype=np.float32)
+    positions[0, 0:2] = center
+    positions[1:, 0] = center[0] + radius * np.cos(angles)
+    positions[1:, 1] = center[1] + radius * np.sin(angles)
+    colors = np.tile(rng.uniform(0, 1, 3).astype(np.float32), (rim + 1, 1))
+
+    spokes = np.arange(1, rim + 1, dtype=np.uint32)
+    indices = np.stack([np.zeros(rim, dtype=np.uint32), spokes, np.roll(spokes, -1)], axis=1).reshape(-1)
+    return POSITION_COLOR_F32.pack(position=positions, color=colors), indices
+
+def read_pixels() -> np.ndarray:
+    glFinish()
+    return np.frombuffer(glReadPixels(0, 0, WIDTH, HEIGHT, GL_RGBA, GL_UNSIGNED_BYTE), dtype=np.uint8)
+
+def main() -> None:
+    create_headless_context()
+    target = OffscreenTarget(WIDTH, HEIGHT)
+    with open("shaders/fragment.txt") as f:
+        shader = shader_cache.load_source(PASSTHROUGH_VERTEX, f.read())
+    glUseProgram(shader)
+
+    print(f"{'meshes':>7} {'GL objects':>11} {'arena objects':>14} {'per-VAO ms':>11} {'arena ms':>9} "
+          f"{'multi-draw ms':>14} {'same pixels':>12}")
+    for n in MESHES:
+        rng = np.random.default_rng(n)
+        sources = [random_fan(rng) for _ in range(n)]
+
+        separate = [IndexedMesh(vertices, indices, POSITION_COLOR_F32.stride, POSITION_COLOR_F32.attributes)
+                    for vertices, indices in sources]
+        #start small so the benchmark also goes through growth
+        arena = MeshArena(POSITION_COLOR_F32, vertex_capacity=1024, index_capacity=4096)
+        meshes = [arena.allocate(vertices, indices) for vertices, indices in sources]
+
+        def draw_separate() -> None:
+            for mesh in separate:
+                mesh.draw()
+            glFinish()
+
+        def draw_arena() -> None:
+            for mesh in meshes:
+                mesh.draw()
+            glFinish()
+
+        def draw_multi() -> None:
+            arena.draw_many(meshes)
+            glFinish()
+
+        images = []
+        for draw in (draw_separate, draw_arena, draw_multi):
+            glClear(GL_COLOR_BUFFER_BIT)
+            draw()
+            images.append(read_pixels())
+        same = all(np.array_equal(images[0], image) for image in images[1:])
+
+        separate_ms = time_call(draw_separate, repeat=10, warmup=2)["mean_ms"]
+        arena_ms = time_call(draw_arena, repeat=10, warmup=2)["mean_ms"]
+        multi_ms = time_call(draw_multi, repeat=10, warmup=2)["mean_ms"]
+        print(f"{n:>7} {3 * n:>11} {3:>14} {separate_ms:>11.2f} {arena_ms:>9.2f} {multi_ms:>14.2f} {str(same):>12}")
+
+        for mesh in separate:
+            mesh.destroy()
+
+        #churn: free every other mesh and refill with differently sized ones,
+        #which leaves holes that are too small for most new meshes
+        for mesh in meshes[::2]:
+            mesh.destroy()
+        meshes = meshes[1::2] + [arena.allocate(*random_fan(rng)) for _ in range(n // 4)]
+        glClear(GL_COLOR_BUFFER_BIT)
+        draw_multi()
+        before_image = read_pixels()
+        before = arena.stats()
+
+        defragment_ms = time_call(arena.defragment, repeat=1, warmup=0)["mean_ms"]
+        glClear(GL_COLOR_BUFFER_BIT)
+        draw_multi()
+        after = arena.stats()
+
+        print(f"        churned: {before['meshes']} meshes, vertex occupancy {before['vertex_occupancy']:.2f}, "
+              f"fragmentation vertex {before['vertex_fragmentation']:.2f} index {before['index_fragmentation']:.2f} "
+              f"in {before['vertex_free_blocks']}/{before['index_free_blocks']} free blocks")
+        print(f"        defragmented in {defragment_ms:.2f} ms: fragmentation vertex {after['vertex_fragmentation']:.2f} "
+              f"index {after['index_fragmentation']:.2f}, same pixels {np.array_equal(before_image, read_pixels())}")
+
+        arena.destroy()
+
+    shader_cache.delete_program(shader)
+    target.destroy()
+
+if __name__ == "__main__":
+    main()
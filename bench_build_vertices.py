@@ -0,0 +1,56 @@
+import tracemalloc
+
+import numpy as np
+import pyrr
+
+from bench_utils import time_call
+from cpu_transform import CpuVertexTransform
+
+SIZES = (3, 300, 3_000, 30_000, 300_000)
+#the np.append loop is quadratic, past this it takes minutes
+APPEND_LIMIT = 30_000
+
+def build_vertices_append(positions: np.ndarray, colors: np.ndarray, transform: np.ndarray) -> np.ndarray:
+    """ The previous TriangleMesh.build_vertices, without the GL upload. """
+
+    vertices = np.array([], dtype=np.float32)
+    for i in range(len(positions)):
+        transform_position = pyrr.matrix44.multiply(m1 = positions[i], m2 = transform)
+        vertices = np.append(vertices, transform_position[0:3])
+        vertices = np.append(vertices, colors[i])
+    return vertices
+
+def allocated_bytes(fn) -> int:
+    fn()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    transform = pyrr.matrix44.create_from_eulers(np.radians([10, 20, 30]), dtype=np.float32)
+
+    print(f"{'vertices':>10} {'np.append ms':>13} {'matmul ms':>10} {'Mvert/s':>9} {'peak alloc B':>12}")
+    for n in SIZES:
+        positions = np.ones((n, 4), dtype=np.float32)
+        positions[:, 0:3] = rng.uniform(-1, 1, (n, 3))
+        colors = rng.uniform(0, 1, (n, 3)).astype(np.float32)
+
+        mesh = CpuVertexTransform(positions, colors)
+        fast = time_call(lambda: mesh.apply(transform), repeat=20)
+
+        if n <= APPEND_LIMIT:
+            expected = build_vertices_append(positions, colors, transform)
+            np.testing.assert_allclose(mesh.apply(transform).ravel(), expected, rtol=1e-5, atol=1e-6)
+            slow = time_call(lambda: build_vertices_append(positions, colors, transform), repeat=3, warmup=1)
+            slow_text = f"{slow['mean_ms']:>13.3f}"
+        else:
+            slow_text = f"{'-':>13}"
+
+        throughput = n / fast["mean_ms"] / 1000
+        print(f"{n:>10} {slow_text} {fast['mean_ms']:>10.3f} {throughput:>9.1f} {allocated_bytes(lambda: mesh.apply(transform)):>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import numpy as np
+
+from bench_utils import time_call
+from camera import Camera
+from spatial_index import UniformGrid, spheres_in_frustum
+
+ENTITIES = 1_000_000
+WORLD = 100.0
+MOVING = 0.01
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    centers = rng.uniform(-WORLD, WORLD, (ENTITIES, 3)).astype(np.float32)
+    radii = rng.uniform(0.1, 1.0, ENTITIES).astype(np.float32)
+
+    grid = UniformGrid([-WORLD] * 3, [WORLD] * 3, cell_size=10.0, capacity=ENTITIES)
+    grid.add_many(centers, radii)
+
+    moving = rng.choice(ENTITIES, int(ENTITIES * MOVING), replace=False)
+    step = rng.normal(0, 0.1, (len(moving), 3)).astype(np.float32)
+    incremental = time_call(lambda: grid.update(moving, grid.centers[moving] + step), repeat=20)
+
+    #the first query after a move rebuilds the per-cell entity lists, timed with a near-empty frustum
+    near = Camera(position=[0, 0, -WORLD - 10], target=[0, 0, 0], fovy=60, aspect=16/9, near=0.1, far=15.0).frustum_planes()
+
+    def move_and_query() -> None:
+        grid.update(moving, grid.centers[moving] + step)
+        grid.query_frustum(near)
+
+    moved = time_call(move_and_query, repeat=20)
+
+    print(f"{ENTITIES} entities in {grid.cell_count} cells, incremental update of {len(moving)}: {incremental['mean_ms']:.2f} ms, "
+          f"with the next query: {moved['mean_ms']:.2f} ms")
+    print(f"{'far':>6} {'visible %':>10} {'brute ms':>9} {'grid ms':>8} {'speedup':>8}")
+    for far in (15.0, 60.0, 120.0, 260.0):
+        camera = Camera(position=[0, 0, -WORLD - 10], target=[0, 0, 0], fovy=60, aspect=16/9, near=0.1, far=far)
+        planes = camera.frustum_planes()
+
+        expected = np.flatnonzero(spheres_in_frustum(grid.centers, grid.radii, planes))
+        visible = grid.query_frustum(planes)
+        assert np.array_equal(expected, visible)
+
+        brute = time_call(lambda: np.flatnonzero(spheres_in_frustum(grid.centers, grid.radii, planes)), repeat=5)
+        culled = time_call(lambda: grid.query_frustum(planes), repeat=5)
+        print(f"{far:>6.0f} {100 * len(visible) / ENTITIES:>10.2f} {brute['mean_ms']:>9.2f} {culled['mean_ms']:>8.2f} "
+              f"{brute['mean_ms'] / culled['mean_ms']:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
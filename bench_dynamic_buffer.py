@@ -0,0 +1,101 @@
+import os
+import time
+
+os.environ["PYOPENGL_PLATFORM"] = "egl"
+
+from OpenGL.GL import *
+import numpy as np
+
+from dynamic_buffer import DynamicBuffer
+from gl_context import OffscreenTarget, create_headless_context
+from main import createShader
+from uniform_buffers import DRAW_BINDING, DRAW_DATA, FrameUniforms, UniformArena
+
+SIZES_KB = (64, 1024, 8192)
+FRAMES = 60
+STRIDE = 24
+
+def attach(vao: int, buffer: int) -> None:
+    """ Point the x, y, z, r, g, b layout of shaders/vertex.txt at the buffer. """
+
+    glBindVertexArray(vao)
+    glBindBuffer(GL_ARRAY_BUFFER, buffer)
+    glEnableVertexAttribArray(0)
+    glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, STRIDE, ctypes.c_void_p(0))
+    glEnableVertexAttribArray(1)
+    glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, STRIDE, ctypes.c_void_p(12))
+
+def run(frame, nbytes: int) -> float:
+    """ Upload throughput in MB/s over FRAMES frames that each draw from the new data. """
+
+    frame(0)
+    glFinish()
+    start = time.perf_counter()
+    for i in range(FRAMES):
+        frame(i)
+    glFinish()
+    return nbytes * FRAMES / (time.perf_counter() - start) / 1e6
+
+def main() -> None:
+    create_headless_context()
+    target = OffscreenTarget(64, 64)
+    shader = createShader("shaders/vertex.txt", "shaders/fragment.txt")
+    glUseProgram(shader)
+    identity = np.identity(4, dtype=np.float32)
+    frame_uniforms = FrameUniforms()
+    frame_uniforms.data["view"] = identity
+    frame_uniforms.data["projection"] = identity
+    frame_uniforms.upload()
+    draw_uniforms = UniformArena(DRAW_DATA, DRAW_BINDING, capacity=1)
+    draw_uniforms.reserve(1)["model"] = identity
+    draw_uniforms.upload()
+    draw_uniforms.bind(0)
+    vao = glGenVertexArrays(1)
+
+    print(f"{'KB/frame':>9} {'BufferData STATIC':>18} {'BufferSubData':>14} {'orphaning':>10} {'persistent':>11}   (MB/s)")
+    for size_kb in SIZES_KB:
+        vertices = np.random.default_rng(0).uniform(-1, 1, (size_kb * 1024 // STRIDE, 6)).astype(np.float32)
+        nbytes = vertices.nbytes
+        results = []
+
+        plain = glGenBuffers(1)
+        attach(vao, plain)
+        glBufferData(GL_ARRAY_BUFFER, nbytes, None, GL_DYNAMIC_DRAW)
+
+        def buffer_data(i: int) -> None:
+            glBindBuffer(GL_ARRAY_BUFFER, plain)
+            glBufferData(GL_ARRAY_BUFFER, nbytes, vertices, GL_STATIC_DRAW)
+            glDrawArrays(GL_TRIANGLES, 0, 3)
+
+        def buffer_sub_data(i: int) -> None:
+            glBindBuffer(GL_ARRAY_BUFFER, plain)
+            glBufferSubData(GL_ARRAY_BUFFER, 0, nbytes, vertices)
+            glDrawArrays(GL_TRIANGLES, 0, 3)
+
+        results.append(run(buffer_data, nbytes))
+        results.append(run(buffer_sub_data, nbytes))
+        glDeleteBuffers(1, (plain,))
+
+        for persistent in (False, True):
+            dynamic = DynamicBuffer(nbytes, stride=STRIDE, persistent=persistent)
+            attach(vao, dynamic.buffer)
+
+            def streamed(i: int) -> None:
+                np.copyto(dynamic.map(vertices.shape), vertices)
+                dynamic.unmap()
+                glDrawArrays(GL_TRIANGLES, dynamic.first_vertex, 3)
+                dynamic.fence()
+
+            results.append(run(streamed, nbytes))
+            dynamic.destroy()
+
+        print(f"{size_kb:>9} {results[0]:>18.0f} {results[1]:>14.0f} {results[2]:>10.0f} {results[3]:>11.0f}")
+
+    glDeleteVertexArrays(1, (vao,))
+    draw_uniforms.destroy()
+    frame_uniforms.destroy()
+    glDeleteProgram(shader)
+    target.destroy()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import json
+import os
+import subprocess
+import sys
+
+os.environ["PYOPENGL_PLATFORM"] = "egl"
+
+#before OpenGL.GL, GL_DEBUG picks whether PyOpenGL checks errors in this process
+import gl_dispatch
+gl_dispatch.configure(debug=gl_dispatch.debug_requested())
+from gl_dispatch import GLDispatch
+from OpenGL.GL import *
+import numpy as np
+
+from bench_utils import time_call
+from gl_context import OffscreenTarget, create_headless_context
+from shader_cache import shader_cache
+
+CALLS = 20_000
+
+#a uniform matrix to upload, the vertex shader reads it so it is not optimized away
+MATRIX_VERTEX = """#version 330 core
+
+layout (location=0) in vec3 vertexPos;
+
+uniform mat4 model;
+
+void main()
+{
+    gl_Position = model * vec4(vertexPos, 1.0);
+}
+"""
+
+MATRIX_FRAGMENT = """#version 330 core
+
+out vec4 color;
+
+void main()
+{
+    color = vec4(1.0);
+}
+"""
+
+def measure() -> dict[str, dict[str, float]]:
+    """ ns per call of each hot-path function, through PyOpenGL and through GLDispatch's raw entry points. """
+
+    create_headless_context()
+    target = OffscreenTarget(16, 16)
+    program = shader_cache.load_source(MATRIX_VERTEX, MATRIX_FRAGMENT)
+    glUseProgram(program)
+    location = glGetUniformLocation(program, "model")
+    vao = glGenVertexArrays(1)
+    buffer = glGenBuffers(1)
+    glBindBuffer(GL_UNIFORM_BUFFER, buffer)
+    glBufferData(GL_UNIFORM_BUFFER, 256, None, GL_DYNAMIC_DRAW)
+    matrix = np.identity(4, dtype=np.float32)
+    address = matrix.ctypes.data
+    raw = GLDispatch(debug=False)
+
+    calls = {
+        "glUseProgram": (lambda: glUseProgram(program), lambda: raw.glUseProgram(program)),
+        "glBindVertexArray": (lambda: glBindVertexArray(vao), lambda: raw.glBindVertexArray(vao)),
+        "glBindBufferRange": (lambda: glBindBufferRange(GL_UNIFORM_BUFFER, 1, buffer, 0, 64),
+                              lambda: raw.glBindBufferRange(GL_UNIFORM_BUFFER, 1, buffer, 0, 64)),
+        "glUniformMatrix4fv": (lambda: glUniformMatrix4fv(location, 1, GL_FALSE, matrix),
+                               lambda: raw.glUniformMatrix4fv(location, 1, GL_FALSE, address)),
+        "glBufferSubData": (lambda: glBufferSubData(GL_UNIFORM_BUFFER, 0, 64, matrix),
+                            lambda: raw.glBufferSubData(GL_UNIFORM_BUFFER, 0, 64, address)),
+        #nothing to draw, so this is the dispatch and the driver's validation only
+        "glDrawArrays": (lambda: glDrawArrays(GL_TRIANGLES, 0, 0), lambda: raw.glDrawArrays(GL_TRIANGLES, 0, 0)),
+    }
+    glBindVertexArray(vao)
+
+    results = {}
+    for name, (wrapped, direct) in calls.items():
+        results[name] = {}
+        for path, call in (("pyopengl", wrapped), ("raw", direct)):
+            def run() -> None:
+                for _ in range(CALLS):
+                    call()
+            results[name][path] = time_call(run, repeat=5, warmup=1)["mean_ms"] * 1e6 / CALLS
+    glFinish()
+
+    shader_cache.delete_program(program)
+    target.destroy()
+    return results
+
+def main() -> None:
+    #checking is fixed when OpenGL.GL is first imported, so each mode gets its own process
+    modes = {}
+    for mode, debug in (("checked", "1"), ("release", "0")):
+        output = subprocess.run([sys.executable, __file__, "--measure"], env={**os.environ, "GL_DEBUG": debug},
+                                check=True, capture_output=True, text=True).stdout
+        modes[mode] = json.loads(output)
+
+    print(f"{'ns per call':>20} {'PyOpenGL checked':>17} {'PyOpenGL release':>17} {'raw ctypes':>11} {'speedup':>8}")
+    for name in modes["checked"]:
+        checked = modes["checked"][name]["pyopengl"]
+        release = modes["release"][name]["pyopengl"]
+        raw = modes["release"][name]["raw"]
+        print(f"{name:>20} {checked:>17.0f} {release:>17.0f} {raw:>11.0f} {checked / raw:>7.1f}x")
+
+if __name__ == "__main__":
+    if "--measure" in sys.argv:
+        print(json.dumps(measure()))
+    else:
+        main()
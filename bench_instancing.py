@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+
+if "--window" not in sys.argv:
+    os.environ["PYOPENGL_PLATFORM"] = "egl"
+
+from OpenGL.GL import *
+import numpy as np
+
+from camera import Camera
+from entity_array import EntityArray
+from gl_context import OffscreenTarget, create_headless_context, create_window_context
+from instanced import InstancedRenderer
+from main import TriangleMesh, createShader
+from uniform_buffers import DRAW_BINDING, DRAW_DATA, FrameUniforms, UniformArena
+
+SIZES = (100, 1_000, 10_000, 100_000)
+FRAMES = 5
+
+def measure(draw_frame) -> float:
+    """ Average milliseconds per frame, with glFinish so GPU work is counted. """
+
+    draw_frame()
+    glFinish()
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        glClear(GL_COLOR_BUFFER_BIT)
+        draw_frame()
+        glFinish()
+    return (time.perf_counter() - start) * 1000 / FRAMES
+
+def main() -> None:
+    #headless runs draw into this target, destroyed after the last measure
+    target = None
+    if "--window" in sys.argv:
+        create_window_context()
+    else:
+        create_headless_context()
+        target = OffscreenTarget(640, 480)
+
+    mesh = TriangleMesh()
+    shader = createShader("shaders/vertex.txt", "shaders/fragment.txt")
+    instanced_shader = createShader("shaders/vertex_instanced.txt", "shaders/fragment.txt")
+    renderer = InstancedRenderer(mesh)
+
+    #both programs read view and projection from the shared per-frame block
+    camera = Camera(position=[0, 0, 8], target=[0, 0, 0])
+    frame_uniforms = FrameUniforms()
+    frame_uniforms.data["view"] = camera.view()
+    frame_uniforms.data["projection"] = camera.projection()
+    frame_uniforms.upload()
+    draw_uniforms = UniformArena(DRAW_DATA, DRAW_BINDING, capacity=max(SIZES))
+
+    print(f"{'instances':>10} {'per-object ms':>14} {'instanced ms':>13} {'speedup':>9}")
+    for n in SIZES:
+        rng = np.random.default_rng(n)
+        entities = EntityArray(n)
+        for _ in range(n):
+            entities.add(rng.uniform(-3, 3, 3).tolist(), rng.uniform(0, 360, 3).tolist())
+        models = entities.make_model_transforms_xy()
+
+        def per_object() -> None:
+            glUseProgram(shader)
+            draw_uniforms.reserve(n)["model"] = models
+            draw_uniforms.upload()
+            glBindVertexArray(mesh.vao)
+            for i in range(n):
+                draw_uniforms.bind(i)
+                glDrawArrays(GL_TRIANGLES, 0, mesh.vertex_count)
+
+        def instanced() -> None:
+            glUseProgram(instanced_shader)
+            renderer.draw(models)
+
+        slow = measure(per_object)
+        fast = measure(instanced)
+        print(f"{n:>10} {slow:>14.2f} {fast:>13.2f} {slow / fast:>8.1f}x")
+
+    renderer.destroy()
+    draw_uniforms.destroy()
+    frame_uniforms.destroy()
+    mesh.destroy()
+    glDeleteProgram(shader)
+    glDeleteProgram(instanced_shader)
+    if target is not None:
+        target.destroy()
+
+if __name__ == "__main__":
+    main()
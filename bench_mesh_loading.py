@@ -0,0 +1,100 @@
+import os
+import tempfile
+
+os.environ["PYOPENGL_PLATFORM"] = "egl"
+
+from OpenGL.GL import *
+import numpy as np
+
+from bench_utils import time_call
+from gl_context import OffscreenTarget, create_headless_context
+from mesh_format import BinaryMesh, MeshFile, convert, import_obj, import_ply
+
+#grid side in quads, two triangles each
+SIDES = (1_000, 1_415)
+
+def grid(side: int) -> tuple[np.ndarray, np.ndarray]:
+    """ A side x side quad grid with per-vertex colors. """
+
+    u, v = np.meshgrid(np.linspace(-1, 1, side + 1), np.linspace(-1, 1, side + 1))
+    vertices = np.ones(((side + 1) ** 2, 6), dtype=np.float32)
+    vertices[:, 0] = u.reshape(-1)
+    vertices[:, 1] = v.reshape(-1)
+    vertices[:, 2] = 0.0
+    vertices[:, 3] = (u.reshape(-1) + 1) / 2
+
+    corner = (np.arange(side)[:, None] * (side + 1) + np.arange(side)[None, :]).reshape(-1)
+    quads = np.stack([corner, corner + 1, corner + side + 2, corner, corner + side + 2, corner + side + 1], axis=1)
+    return vertices, quads.reshape(-1).astype(np.uint32)
+
+def write_obj(path: str, vertices: np.ndarray, indices: np.ndarray) -> None:
+    with open(path, 'w') as f:
+        np.savetxt(f, vertices, fmt="v %.6f %.6f %.6f %.4f %.4f %.4f")
+        np.savetxt(f, indices.reshape(-1, 3) + 1, fmt="f %d %d %d")
+
+def write_ply(path: str, vertices: np.ndarray, indices: np.ndarray) -> None:
+    with open(path, 'wb') as f:
+        f.write(f"ply\nformat ascii 1.0\nelement vertex {len(vertices)}\n".encode())
+        for name in ("x", "y", "z", "red", "green", "blue"):
+            f.write(f"property float {name}\n".encode())
+        f.write(f"element face {len(indices) // 3}\nproperty list uchar int vertex_indices\nend_header\n".encode())
+        np.savetxt(f, vertices, fmt="%.6f")
+        np.savetxt(f, indices.reshape(-1, 3), fmt="3 %d %d %d")
+
+def main() -> None:
+    create_headless_context()
+    target = OffscreenTarget(64, 64)
+    directory = tempfile.mkdtemp()
+
+    print(f"{'triangles':>10} {'obj MB':>7} {'obj parse s':>12} {'ply parse s':>12} {'bin MB':>7} "
+          f"{'bin load+upload ms':>19} {'speedup':>8}")
+    for side in SIDES:
+        vertices, indices = grid(side)
+        obj = os.path.join(directory, "grid.obj")
+        ply = os.path.join(directory, "grid.ply")
+        binary = os.path.join(directory, "grid.mesh")
+        write_obj(obj, vertices, indices)
+        write_ply(ply, vertices, indices)
+        convert(obj, binary, optimize=False)
+
+        mesh = MeshFile(binary)
+        assert np.array_equal(mesh.indices, indices)
+        assert np.allclose(mesh.vertex_array()["a0"], vertices[:, 0:3], atol=1e-6)
+
+        def text_load() -> None:
+            parsed_vertices, parsed_indices = import_obj(obj)
+            upload(parsed_vertices, parsed_indices)
+
+        def binary_load() -> None:
+            BinaryMesh(binary).destroy()
+            glFinish()
+
+        obj_s = time_call(text_load, repeat=2, warmup=0)["mean_ms"] / 1000
+        ply_s = time_call(lambda: import_ply(ply), repeat=2, warmup=0)["mean_ms"] / 1000
+        binary_ms = time_call(binary_load, repeat=5, warmup=1)["mean_ms"]
+        print(f"{len(indices) // 3:>10} {os.path.getsize(obj) / 1e6:>7.0f} {obj_s:>12.2f} {ply_s:>12.2f} "
+              f"{os.path.getsize(binary) / 1e6:>7.0f} {binary_ms:>19.1f} {obj_s * 1000 / binary_ms:>7.0f}x")
+
+        for path in (obj, ply, binary):
+            os.remove(path)
+
+    os.rmdir(directory)
+    target.destroy()
+
+def upload(vertices: np.ndarray, indices: np.ndarray) -> None:
+    """ Same GL work as BinaryMesh, from parsed arrays. """
+
+    vao = glGenVertexArrays(1)
+    glBindVertexArray(vao)
+    buffers = glGenBuffers(2)
+    glBindBuffer(GL_ARRAY_BUFFER, buffers[0])
+    glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+    glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, buffers[1])
+    glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+    glFinish()
+    glBindVertexArray(0)
+    glDeleteVertexArrays(1, (vao,))
+    glDeleteBuffers(2, buffers)
+
+if __name__ == "__main__":
+    main()
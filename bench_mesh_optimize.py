@@ -0,0 +1,92 @@
+import os
+import time
+
+os.environ["PYOPENGL_PLATFORM"] = "egl"
+
+from OpenGL.GL import *
+import numpy as np
+
+from bench_mesh_loading import grid
+from bench_utils import time_call
+from gl_context import OffscreenTarget, create_headless_context
+from main import createShader
+from mesh_format import POSITION_COLOR, IndexedMesh
+from mesh_optimize import acmr, optimize_mesh, weld_vertices
+from uniform_buffers import DRAW_BINDING, DRAW_DATA, FrameUniforms, UniformArena
+
+#grid side in quads, two triangles each
+SIDES = (150, 300, 1_000)
+STRIDE = 24
+
+def main() -> None:
+    create_headless_context()
+    target = OffscreenTarget(640, 480)
+    shader = createShader("shaders/vertex.txt", "shaders/fragment.txt")
+    glUseProgram(shader)
+    identity = np.identity(4, dtype=np.float32)
+    frame_uniforms = FrameUniforms()
+    frame_uniforms.data["view"] = identity
+    frame_uniforms.data["projection"] = identity
+    frame_uniforms.upload()
+    draw_uniforms = UniformArena(DRAW_DATA, DRAW_BINDING, capacity=1)
+    draw_uniforms.reserve(1)["model"] = identity
+    draw_uniforms.upload()
+    draw_uniforms.bind(0)
+
+    print(f"{'triangles':>10} {'layout':>10} {'vertices':>9} {'index':>6} {'MB':>6} {'ACMR':>5} {'draw ms':>8}")
+    for side in SIDES:
+        vertices, indices = grid(side)
+        #exporters often write a triangle soup in no particular order
+        order = np.random.default_rng(side).permutation(len(indices) // 3)
+        soup = vertices[indices.reshape(-1, 3)[order].reshape(-1)]
+
+        start = time.perf_counter()
+        welded, welded_indices = weld_vertices(soup)
+        weld_s = time.perf_counter() - start
+        start = time.perf_counter()
+        optimized, optimized_indices = optimize_mesh(soup)
+        optimize_s = time.perf_counter() - start
+
+        vao = glGenVertexArrays(1)
+        glBindVertexArray(vao)
+        vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, vbo)
+        glBufferData(GL_ARRAY_BUFFER, soup.nbytes, soup, GL_STATIC_DRAW)
+        for location, components, gl_type, normalized, offset in POSITION_COLOR:
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, components, gl_type, GL_FALSE, STRIDE, ctypes.c_void_p(offset))
+
+        def draw_soup() -> None:
+            glBindVertexArray(vao)
+            glDrawArrays(GL_TRIANGLES, 0, len(soup))
+            glFinish()
+
+        rows = [("soup", len(soup), "-", soup.nbytes, 3.0, time_call(draw_soup, repeat=10)["mean_ms"])]
+        for name, mesh_vertices, mesh_indices in (("welded", welded, welded_indices),
+                                                  ("optimized", optimized, optimized_indices)):
+            mesh = IndexedMesh(mesh_vertices, mesh_indices, STRIDE, POSITION_COLOR)
+
+            def draw_indexed() -> None:
+                mesh.draw()
+                glFinish()
+
+            index_bits = 16 if mesh.index_type == GL_UNSIGNED_SHORT else 32
+            nbytes = mesh_vertices.nbytes + mesh.index_count * index_bits // 8
+            rows.append((name, len(mesh_vertices), index_bits, nbytes, acmr(mesh_indices),
+                         time_call(draw_indexed, repeat=10)["mean_ms"]))
+            mesh.destroy()
+
+        glDeleteVertexArrays(1, (vao,))
+        glDeleteBuffers(1, (vbo,))
+
+        for name, count, bits, nbytes, ratio, ms in rows:
+            print(f"{len(indices) // 3:>10} {name:>10} {count:>9} {bits:>6} {nbytes / 1e6:>6.1f} {ratio:>5.2f} {ms:>8.2f}")
+        print(f"{'':>10} weld {weld_s:.2f} s, full optimize {optimize_s:.2f} s")
+
+    draw_uniforms.destroy()
+    frame_uniforms.destroy()
+    glDeleteProgram(shader)
+    target.destroy()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import time
+
+os.environ["PYOPENGL_PLATFORM"] = "egl"
+
+from OpenGL.GL import glFinish
+import numpy as np
+
+from frame_pacing import FixedTimestep, FramePacer
+from main import App
+
+SECONDS = 3.0
+#every SLOW_EVERY-th frame stalls for SLOW_MS, to see the loop catch up
+SLOW_EVERY = 30
+SLOW_MS = 80
+
+def run(app: App, mode: str, slow: bool) -> dict[str, float]:
+    """ Run the fixed-timestep loop of App.mainLoop headless for SECONDS. """
+
+    pacer = FramePacer(mode, fps=144)
+    timestep = FixedTimestep(step=1 / 144)
+    frame_times = []
+    skipped = 0
+
+    cpu_start = time.process_time()
+    wall_start = last = time.perf_counter()
+    timestep.advance()
+    while time.perf_counter() - wall_start < SECONDS:
+        for _ in range(timestep.advance()):
+            app.update()
+        if timestep.behind:
+            skipped += 1
+            continue
+
+        app.render(timestep.alpha)
+        glFinish()
+        if slow and len(frame_times) % SLOW_EVERY == 0:
+            time.sleep(SLOW_MS / 1000)
+        pacer.pace()
+
+        now = time.perf_counter()
+        frame_times.append(now - last)
+        last = now
+
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    frame_ms = np.array(frame_times[1:]) * 1000
+
+    return {
+        "fps": len(frame_times) / wall,
+        "cpu_percent": 100 * cpu / wall,
+        "jitter_std_ms": float(frame_ms.std()),
+        "jitter_p99_minus_p50_ms": float(np.percentile(frame_ms, 99) - np.percentile(frame_ms, 50)),
+        "skipped_renders": skipped,
+        #simulation time given up to stalls, the only way it can drift from wall time
+        "dropped_ms": timestep.dropped * 1000,
+    }
+
+def main() -> None:
+    app = App(headless=True)
+
+    print(f"{'mode':>15} {'slow':>5} {'fps':>8} {'cpu %':>6} {'std ms':>7} {'p99-p50':>8} {'skipped':>8} {'dropped ms':>11}")
+    for mode in ("tick", "tick_busy_loop", "uncapped"):
+        for slow in (False, True):
+            r = run(app, mode, slow)
+            print(f"{mode:>15} {str(slow):>5} {r['fps']:>8.1f} {r['cpu_percent']:>6.1f} {r['jitter_std_ms']:>7.3f} "
+                  f"{r['jitter_p99_minus_p50_ms']:>8.3f} {r['skipped_renders']:>8} {r['dropped_ms']:>11.3f}")
+    print("vsync: needs a real display and swap chain, run main.py --vsync --profile to see it")
+
+    app.quit()
+
+if __name__ == "__main__":
+    main()
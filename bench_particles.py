@@ -0,0 +1,83 @@
+import os
+
+os.environ["PYOPENGL_PLATFORM"] = "egl"
+
+from OpenGL.GL import *
+import numpy as np
+
+from bench_utils import time_call
+from camera import Camera
+from gl_context import OffscreenTarget, create_headless_context
+from particles import PARTICLE_BYTES, ParticleEmitter, ParticleRenderer, ParticleSystem
+from shader_cache import shader_cache
+from uniform_buffers import FrameUniforms
+
+SIZES = (100_000, 1_000_000)
+DT = 1 / 60
+#mean lifetime of the emitted particles, the rate keeps the live count near the target
+LIFETIME = (1.0, 3.0)
+
+def steady_state(n: int) -> ParticleSystem:
+    """ A system at about n live particles, with emitters replacing what dies. """
+
+    system = ParticleSystem(n + n // 4, seed=n)
+    rate = n / (sum(LIFETIME) / 2) / 4
+    for x in (-2.0, -0.7, 0.7, 2.0):
+        system.emitters.append(ParticleEmitter([x, -1.0, 0.0], rate, velocity=[0.0, 6.0, 0.0],
+                                               spread=1.5, lifetime=LIFETIME))
+    #run a few simulated seconds so ages are spread like in a long running effect
+    for _ in range(int(LIFETIME[1] / DT) + 30):
+        system.update(DT)
+    return system
+
+def main() -> None:
+    create_headless_context()
+    target = OffscreenTarget(640, 480)
+    shader = shader_cache.load("shaders/particle_vertex.txt", "shaders/particle_fragment.txt")
+    glUseProgram(shader)
+
+    camera = Camera(position=[0, 2, 10], target=[0, 2, 0])
+    frame_uniforms = FrameUniforms()
+    frame_uniforms.data["view"] = camera.view()
+    frame_uniforms.data["projection"] = camera.projection()
+    frame_uniforms.upload()
+
+    print(f"{'live':>9} {'update ms':>10} {'died/frame':>11} {'upload ms':>10} {'draw ms':>8} {'frame ms':>9} "
+          f"{'MB/frame':>9} {'update ms/M':>12} {'upload ms/M':>12}")
+    for n in SIZES:
+        system = steady_state(n)
+        renderer = ParticleRenderer(system.capacity)
+        live = system.count
+
+        deaths = []
+        update_ms = time_call(lambda: deaths.append(system.update(DT)), repeat=30)["mean_ms"]
+
+        def upload() -> None:
+            renderer.upload(system)
+            renderer.buffer.fence()
+
+        upload_ms = time_call(upload, repeat=30)["mean_ms"]
+
+        def draw() -> None:
+            glClear(GL_COLOR_BUFFER_BIT)
+            renderer.draw(system)
+            glFinish()
+
+        draw_ms = time_call(draw, repeat=10, warmup=2)["mean_ms"]
+
+        def frame() -> None:
+            system.update(DT)
+            draw()
+
+        frame_ms = time_call(frame, repeat=10, warmup=2)["mean_ms"]
+        print(f"{live:>9} {update_ms:>10.2f} {np.mean(deaths):>11.0f} {upload_ms:>10.2f} {draw_ms:>8.2f} "
+              f"{frame_ms:>9.2f} {live * PARTICLE_BYTES / 1e6:>9.1f} {update_ms * 1e6 / live:>12.2f} "
+              f"{upload_ms * 1e6 / live:>12.2f}")
+        renderer.destroy()
+
+    frame_uniforms.destroy()
+    shader_cache.delete_program(shader)
+    target.destroy()
+
+if __name__ == "__main__":
+    main()
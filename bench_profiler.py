@@ -0,0 +1,44 @@
+import time
+
+from profiler import NullProfiler, Profiler
+
+SCOPES = 100_000
+
+def per_scope_us(profiler) -> float:
+    """ Microseconds spent entering and leaving one empty scope. """
+
+    scope = profiler.scope
+    profiler.begin_frame()
+    start = time.perf_counter_ns()
+    for _ in range(SCOPES):
+        with scope("empty"):
+            pass
+    elapsed = time.perf_counter_ns() - start
+    profiler.end_frame()
+    return elapsed / SCOPES / 1000
+
+def skipped_us(profiler) -> float:
+    """ Microseconds per block that tests profiler.enabled and skips the scope when off. """
+
+    start = time.perf_counter_ns()
+    for _ in range(SCOPES):
+        if profiler.enabled:
+            with profiler.scope("empty"):
+                pass
+    return (time.perf_counter_ns() - start) / SCOPES / 1000
+
+def baseline_us() -> float:
+    start = time.perf_counter_ns()
+    for _ in range(SCOPES):
+        pass
+    return (time.perf_counter_ns() - start) / SCOPES / 1000
+
+def main() -> None:
+    loop = baseline_us()
+    print(f"empty loop:            {loop:6.3f} us")
+    print(f"NullProfiler scope:    {per_scope_us(NullProfiler()) - loop:6.3f} us")
+    print(f"enabled check, off:    {skipped_us(NullProfiler()) - loop:6.3f} us")
+    print(f"Profiler scope (cpu):  {per_scope_us(Profiler()) - loop:6.3f} us")
+
+if __name__ == "__main__":
+    main()
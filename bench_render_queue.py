@@ -0,0 +1,102 @@
+import os
+
+os.environ["PYOPENGL_PLATFORM"] = "egl"
+
+from OpenGL.GL import *
+import numpy as np
+
+from bench_utils import time_call
+from camera import Camera
+from gl_context import OffscreenTarget, create_headless_context
+from gl_state import GLStateCache
+from main import TriangleMesh
+from render_queue import RenderQueue, radix_argsort
+from shader_cache import shader_cache
+from uniform_buffers import DRAW_BINDING, DRAW_DATA, FrameUniforms, UniformArena
+
+SIZES = (1_000, 10_000, 50_000)
+MESHES = 8
+PROGRAMS = 4
+MATERIALS = 16
+
+def main() -> None:
+    create_headless_context()
+    target = OffscreenTarget(640, 480)
+
+    with open("shaders/vertex.txt") as f:
+        vertex = f.read()
+    with open("shaders/fragment.txt") as f:
+        fragment = f.read()
+    programs = np.array([shader_cache.load_source(vertex + f"\n//variant {p}\n", fragment) for p in range(PROGRAMS)])
+    meshes = [TriangleMesh() for _ in range(MESHES)]
+    vaos = np.array([mesh.vao for mesh in meshes])
+
+    camera = Camera(position=[0, 0, 8], target=[0, 0, 0])
+    frame_uniforms = FrameUniforms()
+    frame_uniforms.data["view"] = camera.view()
+    frame_uniforms.data["projection"] = camera.projection()
+    frame_uniforms.upload()
+    draw_uniforms = UniformArena(DRAW_DATA, DRAW_BINDING, capacity=max(SIZES))
+
+    state = GLStateCache()
+    queue = RenderQueue()
+
+    print(f"{'draws':>7} {'naive binds':>12} {'queued binds':>13} {'avoided':>8} {'naive ms':>9} {'queued ms':>10} "
+          f"{'radix ms':>9} {'argsort ms':>11}")
+    for n in SIZES:
+        rng = np.random.default_rng(n)
+        #draws arrive in scene order, state is shuffled across them
+        item_programs = programs[rng.integers(0, PROGRAMS, n)]
+        item_vaos = vaos[rng.integers(0, MESHES, n)]
+        item_materials = rng.integers(0, MATERIALS, n)
+        item_depths = rng.uniform(0, 1, n).astype(np.float32)
+        records = np.arange(n)
+
+        models = np.tile(np.identity(4, dtype=np.float32), (n, 1, 1))
+        models[:, 3, 0:3] = rng.uniform(-3, 3, (n, 3))
+        draw_uniforms.reserve(n)["model"] = models
+        draw_uniforms.upload()
+
+        program_list = item_programs.tolist()
+        vao_list = item_vaos.tolist()
+
+        def naive() -> None:
+            for i in range(n):
+                glUseProgram(program_list[i])
+                glBindVertexArray(vao_list[i])
+                draw_uniforms.bind(i)
+                glDrawArrays(GL_TRIANGLES, 0, 3)
+            glFinish()
+
+        def queued() -> None:
+            queue.clear()
+            queue.submit_many(item_programs, item_vaos, 0, 3, item_materials, item_depths, records)
+            queue.sort()
+            state.invalidate()
+            queue.execute(state, draw_uniforms)
+            glFinish()
+
+        state.reset_counters()
+        queued()
+        binds, avoided = state.binds, state.avoided
+
+        naive_ms = time_call(naive, repeat=5, warmup=1)["mean_ms"]
+        queued_ms = time_call(queued, repeat=5, warmup=1)["mean_ms"]
+
+        keys = queue.keys[:queue.count].copy()
+        radix_ms = time_call(lambda: radix_argsort(keys), repeat=20)["mean_ms"]
+        argsort_ms = time_call(lambda: np.argsort(keys, kind="stable"), repeat=20)["mean_ms"]
+
+        print(f"{n:>7} {2 * n:>12} {binds:>13} {avoided:>8} {naive_ms:>9.2f} {queued_ms:>10.2f} "
+              f"{radix_ms:>9.3f} {argsort_ms:>11.3f}")
+
+    draw_uniforms.destroy()
+    frame_uniforms.destroy()
+    for mesh in meshes:
+        mesh.destroy()
+    for program in programs.tolist():
+        shader_cache.delete_program(program)
+    target.destroy()
+
+if __name__ == "__main__":
+    main()
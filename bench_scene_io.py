@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from entity_array import EntityArray
+from scene_io import SceneSaver, iter_entities, load_snapshot, read_scene, save_snapshot, write_scene
+
+SIZES = (100_000, 500_000)
+
+def measure(fn) -> tuple[float, float]:
+    """ Seconds of one call, and peak traced MB of another, tracing slows the call down. """
+
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak / 1e6
+
+def main() -> None:
+    directory = tempfile.mkdtemp()
+    plain = os.path.join(directory, "plain.json")
+    streamed = os.path.join(directory, "scene.json")
+    snapshot = os.path.join(directory, "scene.npy")
+
+    print(f"{'entities':>9} {'method':>16} {'MB':>6} {'write s':>8} {'write peak MB':>14} {'read s':>7} {'read peak MB':>13}")
+    for n in SIZES:
+        rng = np.random.default_rng(n)
+        entities = EntityArray(n)
+        entities.positions[:] = rng.uniform(-100, 100, (n, 3))
+        entities.eulers[:] = rng.uniform(0, 360, (n, 3))
+        entities.count = n
+
+        def plain_write() -> None:
+            document = {"entities": [{"position": p, "eulers": e}
+                                     for p, e in zip(entities.positions.tolist(), entities.eulers.tolist())]}
+            with open(plain, 'w') as f:
+                json.dump(document, f)
+
+        def plain_read() -> None:
+            with open(plain) as f:
+                document = json.load(f)
+            loaded = EntityArray(len(document["entities"]))
+            for entity in document["entities"]:
+                loaded.add(entity["position"], entity["eulers"])
+
+        rows = [
+            ("json", plain, plain_write, plain_read),
+            ("streamed json", streamed, lambda: write_scene(streamed, entities), lambda: read_scene(streamed)),
+            ("npy snapshot", snapshot, lambda: save_snapshot(snapshot, entities), lambda: load_snapshot(snapshot)),
+        ]
+        for name, path, write, read in rows:
+            write_s, write_peak = measure(write)
+            read_s, read_peak = measure(read)
+            print(f"{n:>9} {name:>16} {os.path.getsize(path) / 1e6:>6.1f} {write_s:>8.2f} {write_peak:>14.1f} "
+                  f"{read_s:>7.2f} {read_peak:>13.1f}")
+
+        #time to first entity, the streaming reader does not wait for the whole document
+        start = time.perf_counter()
+        next(iter(iter_entities(streamed)))
+        first_ms = (time.perf_counter() - start) * 1000
+
+        #what a background save costs the frame that asks for it
+        saver = SceneSaver()
+        start = time.perf_counter()
+        saver.save(streamed, entities)
+        stall_ms = (time.perf_counter() - start) * 1000
+        saver.wait()
+        total_s = time.perf_counter() - start
+        saver.close()
+        print(f"{'':>9} first streamed entity {first_ms:.2f} ms, background save blocks {stall_ms:.2f} ms of {total_s:.2f} s")
+
+    for path in (plain, streamed, snapshot):
+        os.remove(path)
+    os.rmdir(directory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os
+import tempfile
+import time
+
+os.environ["PYOPENGL_PLATFORM"] = "egl"
+#start Mesa's own on-disk cache empty so the cold numbers are really cold,
+#disabling it outright would also turn off program binaries on Mesa
+os.environ["MESA_SHADER_CACHE_DIR"] = tempfile.mkdtemp(prefix="mesa_cache_")
+
+from gl_context import create_headless_context
+from shader_cache import ShaderCache
+
+SHADERS = (
+    ("shaders/vertex.txt", "shaders/fragment.txt"),
+    ("shaders/vertex_instanced.txt", "shaders/fragment.txt"),
+    ("triangle_shaders/vertex.txt", "triangle_shaders/fragment.txt"),
+)
+
+def startup(cache: ShaderCache) -> float:
+    """ Milliseconds to load every program once. """
+
+    start = time.perf_counter()
+    for vertexFilepath, fragmentFilepath in SHADERS:
+        cache.load(vertexFilepath, fragmentFilepath)
+    return (time.perf_counter() - start) * 1000
+
+def main() -> None:
+    create_headless_context()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ShaderCache(directory)
+        cold = startup(cache)
+        duplicate = startup(cache)
+
+        #a fresh cache object over the same directory is what the next start sees
+        for program in list(cache.programs.values()):
+            cache.delete_program(program)
+        warm_cache = ShaderCache(directory)
+        warm = startup(warm_cache)
+
+    print(f"{len(SHADERS)} programs")
+    print(f"cold start (compile + link + store): {cold:8.2f} ms  compiles={cache.compiles}")
+    print(f"warm start (glProgramBinary):        {warm:8.2f} ms  disk hits={warm_cache.disk_hits}")
+    print(f"duplicate createShader calls:        {duplicate:8.2f} ms  memory hits={cache.hits}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import multiprocessing
+
+import numpy as np
+
+from bench_utils import time_call
+from entity_array import EntityArray
+from shared_simulation import BOUNDS, SPIN, SimulationPool, drift_and_spin
+
+ENTITIES = 1_000_000
+DT = 1 / 144
+#the per-entity Python loop is timed on this many entities and scaled up
+LOOP_SAMPLE = 20_000
+
+def random_entities(n: int) -> tuple[EntityArray, np.ndarray]:
+    rng = np.random.default_rng(n)
+    entities = EntityArray(n)
+    entities.positions[:] = rng.uniform(-BOUNDS, BOUNDS, (n, 3))
+    entities.eulers[:] = rng.uniform(0, 360, (n, 3))
+    entities.count = n
+    return entities, rng.uniform(-20, 20, (n, 3)).astype(np.float32)
+
+def python_loop(positions: list, eulers: list, velocities: list, dt: float) -> None:
+    """ The per-entity update, written the way mainLoop updates the triangle. """
+
+    for position, euler, velocity in zip(positions, eulers, velocities):
+        for axis in range(3):
+            position[axis] += velocity[axis] * dt
+            if abs(position[axis]) > BOUNDS:
+                velocity[axis] = -velocity[axis]
+                position[axis] = max(-BOUNDS, min(BOUNDS, position[axis]))
+        euler[2] = (euler[2] + SPIN * dt) % 360.0
+
+def main() -> None:
+    entities, velocities = random_entities(ENTITIES)
+
+    sample = slice(0, LOOP_SAMPLE)
+    loop_state = (entities.positions[sample].tolist(), entities.eulers[sample].tolist(), velocities[sample].tolist())
+    loop_ms = time_call(lambda: python_loop(*loop_state, DT), repeat=3, warmup=1)["mean_ms"] * ENTITIES / LOOP_SAMPLE
+
+    #single process, same kernel on the whole arrays
+    positions = entities.positions.copy()
+    eulers = entities.eulers.copy()
+    out_positions = np.empty_like(positions)
+    out_eulers = np.empty_like(eulers)
+    own_velocities = velocities.copy()
+    single_ms = time_call(lambda: drift_and_spin(positions, eulers, out_positions, out_eulers, own_velocities, DT),
+                          repeat=20)["mean_ms"]
+    transform_ms = time_call(lambda: entities.make_model_transforms_xy(0.5), repeat=10)["mean_ms"]
+
+    cores = multiprocessing.cpu_count()
+    print(f"{ENTITIES} entities, {cores} cores")
+    print(f"per-entity Python loop {loop_ms:>9.1f} ms/step (scaled from {LOOP_SAMPLE})")
+    print(f"single process NumPy   {single_ms:>9.2f} ms/step")
+    print(f"render-side transforms {transform_ms:>9.2f} ms/frame")
+    print(f"{'workers':>8} {'step ms':>8} {'speedup':>8} {'step + transforms overlapped ms':>32} {'serial ms':>10}")
+
+    for workers in sorted({1, 2, 4, cores}):
+        pool = SimulationPool(entities, workers=workers, velocities=velocities)
+        pool.attach(entities)
+        step_ms = time_call(lambda: pool.step(DT), repeat=20)["mean_ms"]
+
+        def overlapped() -> None:
+            #the renderer works on the latest slots while the workers write the next one
+            pool.begin_step(DT)
+            pool.attach(entities)
+            entities.make_model_transforms_xy(0.5)
+            pool.end_step()
+
+        overlapped_ms = time_call(overlapped, repeat=10)["mean_ms"]
+        pool.close()
+        print(f"{workers:>8} {step_ms:>8.2f} {single_ms / step_ms:>8.2f} {overlapped_ms:>32.2f} "
+              f"{step_ms + transform_ms:>10.2f}")
+
+if __name__ == "__main__":
+    main()
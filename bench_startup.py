@@ -0,0 +1,118 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+#standard library only up here: the measured process imports the app first,
+#so its import stage is what a real start pays
+
+def measure(app_module: str) -> dict[str, dict[str, float]]:
+    """ Start an app headless, render its first frame and return its startup timeline. """
+
+    #release mode, as the app picks when started on its own. OpenGL's package and
+    #platform are then loaded here, ahead of the app's import stage
+    import gl_dispatch
+    gl_dispatch.configure(debug=False)
+
+    #importlib.import_module skips the import statement's path, which -X importtime reports from
+    module = __import__(app_module)
+    from OpenGL.GL import glFinish
+
+    app = module.App(headless=True)
+    app.update()
+    app.render()
+    #stands in for the buffer swap, as in frame_bench.py
+    glFinish()
+    app.finish_startup()
+    timeline = app.startup.summary()
+    app.quit()
+    return timeline
+
+def run_child(app_module: str, *options: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYOPENGL_PLATFORM": "egl"}
+    return subprocess.run([sys.executable, *options, __file__, app_module, "--measure"], env=env,
+                          check=True, capture_output=True, text=True)
+
+def parse_importtime(stderr: str, app_module: str) -> dict[str, list[tuple[str, float, float]]]:
+    """
+        Read python -X importtime output around the app module.
+
+        Returns:
+
+            "app": the app module followed by its direct imports,
+            "later": top-level imports made after it, the lazy ones of
+            startup, e.g. the EGL bindings at context creation,
+            each as (module, self ms, cumulative ms), slowest first
+    """
+
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        #nested imports are indented two spaces per level under their parent
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(own) / 1000, int(cumulative) / 1000))
+
+    #a module is reported after its imports, so the app's own block runs back to the previous top-level entry
+    end = next(i for i, entry in enumerate(entries) if entry[:2] == (0, app_module))
+    begin = max((i for i in range(end) if entries[i][0] == 0), default=-1) + 1
+
+    slowest = lambda found: sorted(found, key=lambda entry: entry[2], reverse=True)
+    return {
+        "app": [entries[end][1:]] + slowest(entry[1:] for entry in entries[begin:end] if entry[0] == 1),
+        "later": slowest(entry[1:] for entry in entries[end + 1:] if entry[0] == 0),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Startup timeline of main.py or triangle.py, headless")
+    parser.add_argument("app", choices=["main", "triangle"], help="app module to start")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes to time, the median is reported")
+    parser.add_argument("--top", type=int, default=10, help="imports to list in each group")
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.app)))
+        return
+
+    runs = [json.loads(run_child(args.app).stdout) for _ in range(args.runs)]
+    #-X importtime slows the imports down, so it gets a run of its own
+    imports = parse_importtime(run_child(args.app, "-X", "importtime").stderr, args.app)
+
+    timeline = {
+        stage: {key: statistics.median(run[stage][key] for run in runs) for key in ("ms", "at_ms")}
+        for stage in runs[0]
+    }
+
+    print(f"{args.app}.py headless startup, median of {args.runs} runs")
+    print(f"{'stage':>12} {'ms':>8} {'at ms':>8}")
+    for stage, entry in timeline.items():
+        print(f"{stage:>12} {entry['ms']:>8.1f} {entry['at_ms']:>8.1f}")
+
+    print(f"\npython -X importtime, {args.app} and its imports, then imports made during startup")
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    app, *direct = imports["app"]
+    for name, own, cumulative in [app] + [(f"  {name}", own, cumulative) for name, own, cumulative in direct[:args.top]]:
+        print(f"{cumulative:>14.1f} {own:>8.1f}  {name}")
+    for name, own, cumulative in imports["later"][:args.top]:
+        print(f"{cumulative:>14.1f} {own:>8.1f}  {name}")
+
+    if args.output:
+        report = {
+            "app": args.app,
+            "runs": args.runs,
+            "timeline": timeline,
+            "imports": {
+                group: [{"module": name, "self_ms": own, "cumulative_ms": cumulative} for name, own, cumulative in found]
+                for group, found in imports.items()
+            },
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+
+if __name__ == "__main__":
+    main()
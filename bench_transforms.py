@@ -0,0 +1,44 @@
+import numpy as np
+
+from bench_utils import time_call
+from entity_array import EntityArray
+from main import Entity
+
+SIZES = (1, 100, 1_000, 10_000)
+
+def check_matches(n: int = 64) -> None:
+    """ Make sure the vectorized path gives the same matrices as Entity. """
+
+    rng = np.random.default_rng(0)
+    entities = EntityArray(n)
+    reference = []
+    for _ in range(n):
+        position = rng.uniform(-5, 5, 3).tolist()
+        eulers = rng.uniform(0, 360, 3).tolist()
+        entities.add(position, eulers)
+        reference.append(Entity(position, eulers))
+
+    for variant in ("x", "y", "xy"):
+        batched = getattr(entities, f"make_model_transforms_{variant}")()
+        for i, entity in enumerate(reference):
+            expected = getattr(entity, f"make_model_transform_{variant}")()
+            np.testing.assert_allclose(batched[i], expected, rtol=1e-5, atol=1e-5)
+
+def main() -> None:
+    check_matches()
+
+    print(f"{'entities':>10} {'per-entity ms':>15} {'batched ms':>12} {'speedup':>9}")
+    for n in SIZES:
+        entities = EntityArray(n)
+        reference = []
+        for i in range(n):
+            entities.add([i * 0.01, 0, 0], [0, 0, i])
+            reference.append(Entity([i * 0.01, 0, 0], [0, 0, i]))
+
+        repeat = max(3, 2000 // n)
+        slow = time_call(lambda: [entity.make_model_transform_xy() for entity in reference], repeat=repeat)
+        fast = time_call(entities.make_model_transforms_xy, repeat=max(repeat, 20))
+        print(f"{n:>10} {slow['mean_ms']:>15.3f} {fast['mean_ms']:>12.3f} {slow['mean_ms'] / fast['mean_ms']:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import os
+import sys
+
+os.environ["PYOPENGL_PLATFORM"] = "egl"
+
+from OpenGL.GL import *
+import numpy as np
+
+import uniform_buffers
+from bench_utils import time_call
+from camera import Camera
+from entity_array import EntityArray
+from gl_context import OffscreenTarget, create_headless_context
+from gl_dispatch import SIGNATURES, GLDispatch
+from main import TriangleMesh
+from shader_cache import shader_cache
+from uniform_buffers import DRAW_BINDING, DRAW_DATA, FrameUniforms, UniformArena
+
+SIZES = (100, 1_000, 10_000)
+MATERIALS = 4
+
+#shaders/vertex.txt as it was before the uniform blocks, one glUniform per matrix
+PLAIN_VERTEX = """#version 330 core
+
+layout (location=0) in vec3 vertexPos;
+layout (location=1) in vec3 vertexColor;
+
+uniform mat4 model;
+uniform mat4 view;
+uniform mat4 projection;
+uniform float time;
+
+out vec3 fragmentColor;
+
+void main()
+{
+    gl_Position = projection * view * model * vec4(vertexPos, 1.0);
+    fragmentColor = vertexColor;
+}
+"""
+
+def count_calls(frame, modules: list) -> int:
+    """
+        Run frame once with every gl* function of the given modules wrapped in a counter.
+
+        GLDispatch instances in the modules, e.g. gl_dispatch.gl, have their
+        hot-path entry points wrapped too.
+    """
+
+    count = 0
+
+    def counted(fn):
+        def call(*args):
+            nonlocal count
+            count += 1
+            return fn(*args)
+        return call
+
+    saved = []
+    dispatches = set()
+    for module in modules:
+        namespace = vars(module) if hasattr(module, "__dict__") else module
+        for name, fn in list(namespace.items()):
+            if name.startswith("gl") and callable(fn):
+                saved.append((namespace, name, fn))
+                namespace[name] = counted(fn)
+            elif isinstance(fn, GLDispatch) and id(fn) not in dispatches:
+                dispatches.add(id(fn))
+                #resolved entry points are cached as instance attributes, wrap those
+                dispatch = vars(fn)
+                for entry in SIGNATURES:
+                    saved.append((dispatch, entry, getattr(fn, entry)))
+                    dispatch[entry] = counted(dispatch[entry])
+    try:
+        frame()
+    finally:
+        for namespace, name, fn in saved:
+            namespace[name] = fn
+
+    return count
+
+def main() -> None:
+    create_headless_context()
+    target = OffscreenTarget(640, 480)
+
+    with open("shaders/vertex.txt") as f:
+        block_vertex = f.read()
+    with open("shaders/fragment.txt") as f:
+        fragment = f.read()
+
+    #distinct programs per material, as a real scene would switch between them
+    plain_programs = [shader_cache.load_source(PLAIN_VERTEX + f"//material {m}\n", fragment) for m in range(MATERIALS)]
+    block_programs = [shader_cache.load_source(block_vertex + f"\n//material {m}\n", fragment) for m in range(MATERIALS)]
+    plain_locations = [{name: glGetUniformLocation(program, name) for name in ("model", "view", "projection", "time")}
+                       for program in plain_programs]
+
+    mesh = TriangleMesh()
+    camera = Camera(position=[0, 0, 8], target=[0, 0, 0])
+    view = camera.view()
+    projection = camera.projection()
+
+    frame_uniforms = FrameUniforms()
+    frame_uniforms.data["view"] = view
+    frame_uniforms.data["projection"] = projection
+    draw_uniforms = UniformArena(DRAW_DATA, DRAW_BINDING, capacity=max(SIZES))
+
+    print(f"{'draws':>7} {'uniform calls/draw':>19} {'block calls/draw':>17} {'uniform ms':>11} {'block ms':>9} {'speedup':>8}")
+    for n in SIZES:
+        rng = np.random.default_rng(n)
+        entities = EntityArray(n)
+        for _ in range(n):
+            entities.add(rng.uniform(-3, 3, 3).tolist(), rng.uniform(0, 360, 3).tolist())
+        models = entities.make_model_transforms_xy()
+        #contiguous runs of draws per material
+        bounds = np.linspace(0, n, MATERIALS + 1).astype(int)
+
+        def plain_frame() -> None:
+            glBindVertexArray(mesh.vao)
+            for m, program in enumerate(plain_programs):
+                locations = plain_locations[m]
+                glUseProgram(program)
+                #every program keeps its own copy of the shared values
+                glUniformMatrix4fv(locations["view"], 1, GL_FALSE, view)
+                glUniformMatrix4fv(locations["projection"], 1, GL_FALSE, projection)
+                glUniform1f(locations["time"], 0.0)
+                for i in range(bounds[m], bounds[m + 1]):
+                    glUniformMatrix4fv(locations["model"], 1, GL_FALSE, models[i])
+                    glDrawArrays(GL_TRIANGLES, 0, mesh.vertex_count)
+            glFinish()
+
+        def block_frame() -> None:
+            frame_uniforms.data["time"] = 0.0
+            frame_uniforms.upload()
+            draw_uniforms.reserve(n)["model"] = models
+            draw_uniforms.upload()
+            glBindVertexArray(mesh.vao)
+            for m, program in enumerate(block_programs):
+                glUseProgram(program)
+                for i in range(bounds[m], bounds[m + 1]):
+                    draw_uniforms.bind(i)
+                    glDrawArrays(GL_TRIANGLES, 0, mesh.vertex_count)
+            glFinish()
+
+        this_module = sys.modules[__name__]
+        plain_calls = count_calls(plain_frame, [this_module]) - 1
+        block_calls = count_calls(block_frame, [this_module, uniform_buffers]) - 1
+
+        plain = time_call(plain_frame, repeat=10, warmup=2)
+        block = time_call(block_frame, repeat=10, warmup=2)
+        print(f"{n:>7} {plain_calls / n:>19.2f} {block_calls / n:>17.2f} {plain['mean_ms']:>11.2f} {block['mean_ms']:>9.2f} "
+              f"{plain['mean_ms'] / block['mean_ms']:>7.1f}x")
+
+    draw_uniforms.destroy()
+    frame_uniforms.destroy()
+    mesh.destroy()
+    for program in plain_programs + block_programs:
+        shader_cache.delete_program(program)
+    target.destroy()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import time
+
+import numpy as np
+
+def time_call(fn, repeat: int = 50, warmup: int = 5) -> dict[str, float]:
+    """
+        Time repeated calls of fn and summarize them.
+
+        Parameters:
+
+            fn: zero-argument callable to measure
+
+            repeat: number of measured calls
+
+            warmup: number of unmeasured calls made first
+
+        Returns:
+
+            A dict of mean/p50/p95/p99/min/max in milliseconds
+    """
+
+    for _ in range(warmup):
+        fn()
+
+    samples = np.empty(repeat, dtype=np.float64)
+    for i in range(repeat):
+        start = time.perf_counter_ns()
+        fn()
+        samples[i] = time.perf_counter_ns() - start
+
+    samples /= 1e6
+    return summarize(samples)
+
+def summarize(samples_ms: np.ndarray) -> dict[str, float]:
+    """ mean/p50/p95/p99/min/max of a set of millisecond samples. """
+
+    return {
+        "mean_ms": float(samples_ms.mean()),
+        "p50_ms": float(np.percentile(samples_ms, 50)),
+        "p95_ms": float(np.percentile(samples_ms, 95)),
+        "p99_ms": float(np.percentile(samples_ms, 99)),
+        "min_ms": float(samples_ms.min()),
+        "max_ms": float(samples_ms.max()),
+    }
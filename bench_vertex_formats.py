@@ -0,0 +1,88 @@
+import os
+
+os.environ["PYOPENGL_PLATFORM"] = "egl"
+
+from OpenGL.GL import *
+import numpy as np
+
+from bench_utils import time_call
+from gl_context import OffscreenTarget, create_headless_context
+from shader_cache import shader_cache
+from vertex_format import (POSITION_NORMAL_UV_COLOR_F32, POSITION_NORMAL_UV_COLOR_PACKED,
+                           unpack_snorm_2_10_10_10_rev)
+
+VERTICES = (1_000_000, 4_000_000)
+
+#reads every attribute so none of them can be skipped, and puts every vertex
+#outside the clip volume so the timing is fetch and vertex shading only
+FETCH_VERTEX = """#version 330 core
+
+layout (location=0) in vec3 vertexPos;
+layout (location=1) in vec3 vertexColor;
+layout (location=2) in vec3 vertexNormal;
+layout (location=3) in vec2 vertexUV;
+
+out vec3 fragmentColor;
+
+void main()
+{
+    gl_Position = vec4(vertexPos + vertexNormal + vec3(vertexUV, 0.0), 1.0) + vec4(0.0, 0.0, 10.0, 0.0);
+    fragmentColor = vertexColor;
+}
+"""
+
+def random_mesh(count: int) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(count)
+    normals = rng.normal(size=(count, 3)).astype(np.float32)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    return {
+        "position": rng.uniform(-1, 1, (count, 3)).astype(np.float32),
+        "color": rng.uniform(0, 1, (count, 3)).astype(np.float32),
+        "normal": normals,
+        "uv": rng.uniform(0, 1, (count, 2)).astype(np.float32),
+    }
+
+def main() -> None:
+    create_headless_context()
+    target = OffscreenTarget(64, 64)
+    with open("shaders/fragment.txt") as f:
+        shader = shader_cache.load_source(FETCH_VERTEX, f.read())
+    glUseProgram(shader)
+
+    print(f"{'vertices':>9} {'format':>7} {'stride':>7} {'MB':>6} {'pack ms':>8} {'draw ms':>8} {'GB/s':>6} "
+          f"{'max pos err':>12} {'max normal err':>15}")
+    for count in VERTICES:
+        sources = random_mesh(count)
+        for name, vertex_format in (("f32", POSITION_NORMAL_UV_COLOR_F32), ("packed", POSITION_NORMAL_UV_COLOR_PACKED)):
+            pack_ms = time_call(lambda: vertex_format.pack(**sources), repeat=3, warmup=1)["mean_ms"]
+            vertices = vertex_format.pack(**sources)
+
+            position_error = np.abs(vertices["position"][:, 0:3].astype(np.float32) - sources["position"]).max()
+            normals = vertices["normal"]
+            if normals.dtype == np.uint32:
+                normals = unpack_snorm_2_10_10_10_rev(normals)
+            normal_error = np.abs(normals - sources["normal"]).max()
+
+            vao = glGenVertexArrays(1)
+            glBindVertexArray(vao)
+            vbo = glGenBuffers(1)
+            glBindBuffer(GL_ARRAY_BUFFER, vbo)
+            glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+            vertex_format.set_up_attributes()
+
+            def draw() -> None:
+                glDrawArrays(GL_POINTS, 0, count)
+                glFinish()
+
+            draw_ms = time_call(draw, repeat=10, warmup=2)["mean_ms"]
+            print(f"{count:>9} {name:>7} {vertex_format.stride:>7} {vertices.nbytes / 1e6:>6.1f} {pack_ms:>8.1f} "
+                  f"{draw_ms:>8.2f} {vertices.nbytes / draw_ms / 1e6:>6.2f} {position_error:>12.2e} {normal_error:>15.2e}")
+
+            glDeleteVertexArrays(1, (vao,))
+            glDeleteBuffers(1, (vbo,))
+
+    shader_cache.delete_program(shader)
+    target.destroy()
+
+if __name__ == "__main__":
+    main()
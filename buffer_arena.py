@@ -0,0 +1,310 @@
+import bisect
+
+from OpenGL.GL import *
+import numpy as np
+
+from vertex_format import VertexFormat
+
+class FreeList:
+    """
+        First-fit allocator over a range of units, e.g. vertices or indices.
+
+        Free blocks are kept sorted by offset and merged with their
+        neighbours when freed, so the list stays as short as the holes are.
+    """
+
+    def __init__(self, capacity: int):
+
+        self.capacity = capacity
+        self.offsets: list[int] = [0] if capacity else []
+        self.sizes: list[int] = [capacity] if capacity else []
+        self.used = 0
+
+    def allocate(self, size: int) -> int | None:
+        """ Offset of a free run of size units, None when no hole is big enough. """
+
+        for i, block in enumerate(self.sizes):
+            if block >= size:
+                offset = self.offsets[i]
+                if block == size:
+                    del self.offsets[i]
+                    del self.sizes[i]
+                else:
+                    self.offsets[i] += size
+                    self.sizes[i] -= size
+                self.used += size
+                return offset
+        return None
+
+    def free(self, offset: int, size: int) -> None:
+
+        i = bisect.bisect_left(self.offsets, offset)
+        self.offsets.insert(i, offset)
+        self.sizes.insert(i, size)
+        self.used -= size
+
+        #merge with the next block, then with the previous one
+        if i + 1 < len(self.offsets) and offset + size == self.offsets[i + 1]:
+            self.sizes[i] += self.sizes.pop(i + 1)
+            del self.offsets[i + 1]
+        if i > 0 and self.offsets[i - 1] + self.sizes[i - 1] == offset:
+            self.sizes[i - 1] += self.sizes.pop(i)
+            del self.offsets[i]
+
+    def grow(self, capacity: int) -> None:
+        """ Extend the range, the new units join a trailing free block. """
+
+        added = capacity - self.capacity
+        old = self.capacity
+        self.capacity = capacity
+        self.used += added
+        self.free(old, added)
+
+    def reset(self, used: int) -> None:
+        """ Everything below used is allocated and the rest is one free block, as after compaction. """
+
+        self.used = used
+        self.offsets = [used] if used < self.capacity else []
+        self.sizes = [self.capacity - used] if used < self.capacity else []
+
+    @property
+    def largest(self) -> int:
+
+        return max(self.sizes, default=0)
+
+    @property
+    def tail(self) -> int:
+        """ Size of the free block touching the end of the range, 0 if the end is allocated. """
+
+        if self.sizes and self.offsets[-1] + self.sizes[-1] == self.capacity:
+            return self.sizes[-1]
+        return 0
+
+class ArenaMesh:
+    """ A mesh living in a MeshArena, drawn with a base vertex. Offsets change when the arena defragments. """
+
+    def __init__(self, arena: "MeshArena", vertex_offset: int, vertex_count: int, index_offset: int, index_count: int):
+
+        self.arena = arena
+        self.vertex_offset = vertex_offset
+        self.vertex_count = vertex_count
+        self.index_offset = index_offset
+        self.index_count = index_count
+
+    @property
+    def vao(self) -> int:
+
+        return self.arena.vao
+
+    def draw(self) -> None:
+
+        self.arena.draw(self)
+
+    def destroy(self) -> None:
+
+        self.arena.free(self)
+
+class MeshArena:
+    """
+        Many meshes of one vertex format suballocated from one vertex buffer
+        and one index buffer, all drawn through a single shared VAO.
+
+        Indices are stored relative to their mesh and glDrawElementsBaseVertex
+        adds the mesh's first vertex. Buffers double when full, and
+        defragment() compacts the live meshes to the front.
+    """
+
+    def __init__(self, vertex_format: VertexFormat, vertex_capacity: int = 1 << 16,
+                 index_capacity: int = 1 << 18, index_type: int = GL_UNSIGNED_INT):
+        """
+            Parameters:
+
+                vertex_format: layout every mesh in the arena uses
+
+                vertex_capacity, index_capacity: initial sizes, in vertices and indices
+
+                index_type: GL_UNSIGNED_INT, or GL_UNSIGNED_SHORT for meshes below 65536 vertices
+        """
+
+        self.format = vertex_format
+        self.index_type = int(index_type)
+        self.index_dtype = np.dtype(np.uint16 if self.index_type == GL_UNSIGNED_SHORT else np.uint32)
+
+        self.vertices = FreeList(vertex_capacity)
+        self.indices = FreeList(index_capacity)
+        self.meshes: set[ArenaMesh] = set()
+
+        self.vao = glGenVertexArrays(1)
+        self.vbo = self._create_buffer(vertex_capacity * self.format.stride)
+        self.ebo = self._create_buffer(index_capacity * self.index_dtype.itemsize)
+        self._attach()
+
+    @staticmethod
+    def _create_buffer(nbytes: int) -> int:
+        buffer = glGenBuffers(1)
+        glBindBuffer(GL_COPY_WRITE_BUFFER, buffer)
+        glBufferData(GL_COPY_WRITE_BUFFER, max(nbytes, 1), None, GL_DYNAMIC_DRAW)
+        return buffer
+
+    def _attach(self) -> None:
+        #the shared VAO is the only one pointing at the arena buffers
+        glBindVertexArray(self.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        self.format.set_up_attributes()
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        glBindVertexArray(0)
+
+    def allocate(self, vertices: np.ndarray, indices: np.ndarray) -> ArenaMesh:
+        """
+            Copy a mesh into the arena.
+
+            Parameters:
+
+                vertices: records of the arena's vertex format, or raw bytes of them
+
+                indices: (M,) triangle list starting at 0 for the mesh's first vertex
+        """
+
+        vertex_bytes = np.ascontiguousarray(vertices).view(np.uint8).reshape(-1)
+        vertex_count = len(vertex_bytes) // self.format.stride
+        if len(indices) and int(np.max(indices)) >= vertex_count:
+            raise ValueError("index out of range of the mesh's vertices")
+        if vertex_count > np.iinfo(self.index_dtype).max + 1:
+            raise ValueError(f"{vertex_count} vertices do not fit {self.index_dtype} indices")
+        index_data = np.ascontiguousarray(indices, dtype=self.index_dtype)
+
+        vertex_offset = self._allocate(self.vertices, vertex_count)
+        index_offset = self._allocate(self.indices, len(index_data))
+
+        glBindBuffer(GL_COPY_WRITE_BUFFER, self.vbo)
+        glBufferSubData(GL_COPY_WRITE_BUFFER, vertex_offset * self.format.stride, len(vertex_bytes), vertex_bytes)
+        glBindBuffer(GL_COPY_WRITE_BUFFER, self.ebo)
+        glBufferSubData(GL_COPY_WRITE_BUFFER, index_offset * self.index_dtype.itemsize, index_data.nbytes, index_data)
+
+        mesh = ArenaMesh(self, vertex_offset, vertex_count, index_offset, len(index_data))
+        self.meshes.add(mesh)
+        return mesh
+
+    def _allocate(self, free_list: FreeList, size: int) -> int:
+        offset = free_list.allocate(size)
+        if offset is None:
+            #double until the request fits at the end, the old contents are copied over
+            capacity = max(free_list.capacity, 1)
+            while capacity - free_list.capacity + free_list.tail < size:
+                capacity *= 2
+            self._grow(free_list, capacity)
+            offset = free_list.allocate(size)
+        return offset
+
+    def _grow(self, free_list: FreeList, capacity: int) -> None:
+        if free_list is self.vertices:
+            self.vbo = self._resize(self.vbo, free_list.capacity * self.format.stride, capacity * self.format.stride)
+        else:
+            self.ebo = self._resize(self.ebo, free_list.capacity * self.index_dtype.itemsize,
+                                    capacity * self.index_dtype.itemsize)
+        free_list.grow(capacity)
+        self._attach()
+
+    def _resize(self, buffer: int, old_bytes: int, new_bytes: int) -> int:
+        resized = self._create_buffer(new_bytes)
+        glBindBuffer(GL_COPY_READ_BUFFER, buffer)
+        glBindBuffer(GL_COPY_WRITE_BUFFER, resized)
+        if old_bytes:
+            glCopyBufferSubData(GL_COPY_READ_BUFFER, GL_COPY_WRITE_BUFFER, 0, 0, old_bytes)
+        glDeleteBuffers(1, (buffer,))
+        return resized
+
+    def free(self, mesh: ArenaMesh) -> None:
+
+        self.meshes.remove(mesh)
+        self.vertices.free(mesh.vertex_offset, mesh.vertex_count)
+        self.indices.free(mesh.index_offset, mesh.index_count)
+
+    def draw(self, mesh: ArenaMesh) -> None:
+
+        glBindVertexArray(self.vao)
+        glDrawElementsBaseVertex(GL_TRIANGLES, mesh.index_count, self.index_type,
+                                 ctypes.c_void_p(mesh.index_offset * self.index_dtype.itemsize), mesh.vertex_offset)
+
+    def draw_many(self, meshes: list[ArenaMesh]) -> None:
+        """ Every mesh in one glMultiDrawElementsBaseVertex call. """
+
+        if not meshes:
+            return
+        counts = np.array([mesh.index_count for mesh in meshes], dtype=np.int32)
+        offsets = np.array([mesh.index_offset * self.index_dtype.itemsize for mesh in meshes], dtype=np.uintp)
+        base_vertices = np.array([mesh.vertex_offset for mesh in meshes], dtype=np.int32)
+
+        glBindVertexArray(self.vao)
+        glMultiDrawElementsBaseVertex(GL_TRIANGLES, counts, self.index_type,
+                                      offsets.ctypes.data_as(ctypes.POINTER(ctypes.c_void_p)),
+                                      len(meshes), base_vertices)
+
+    def defragment(self) -> None:
+        """
+            Move every live mesh to the front of fresh buffers of the same size.
+
+            Mesh handles stay valid, only their offsets change. Copies stay on
+            the GPU with glCopyBufferSubData.
+        """
+
+        vertex_bytes = self.vertices.capacity * self.format.stride
+        index_bytes = self.indices.capacity * self.index_dtype.itemsize
+        vbo = self._create_buffer(vertex_bytes)
+        ebo = self._create_buffer(index_bytes)
+
+        vertex_end = self._compact(self.vbo, vbo, "vertex_offset", "vertex_count", self.format.stride)
+        index_end = self._compact(self.ebo, ebo, "index_offset", "index_count", self.index_dtype.itemsize)
+
+        glDeleteBuffers(2, (self.vbo, self.ebo))
+        self.vbo = vbo
+        self.ebo = ebo
+        self.vertices.reset(vertex_end)
+        self.indices.reset(index_end)
+        self._attach()
+
+    def _compact(self, source: int, destination: int, offset_name: str, count_name: str, unit: int) -> int:
+        glBindBuffer(GL_COPY_READ_BUFFER, source)
+        glBindBuffer(GL_COPY_WRITE_BUFFER, destination)
+
+        #meshes that sit next to each other move together in one copy
+        end = 0
+        run_source = run_destination = run_size = 0
+        for mesh in sorted(self.meshes, key=lambda mesh: getattr(mesh, offset_name)):
+            offset = getattr(mesh, offset_name)
+            count = getattr(mesh, count_name)
+            if offset != run_source + run_size:
+                if run_size:
+                    glCopyBufferSubData(GL_COPY_READ_BUFFER, GL_COPY_WRITE_BUFFER,
+                                        run_source * unit, run_destination * unit, run_size * unit)
+                run_source, run_destination, run_size = offset, end, 0
+            setattr(mesh, offset_name, end)
+            run_size += count
+            end += count
+        if run_size:
+            glCopyBufferSubData(GL_COPY_READ_BUFFER, GL_COPY_WRITE_BUFFER,
+                                run_source * unit, run_destination * unit, run_size * unit)
+        return end
+
+    def stats(self) -> dict[str, float]:
+        """
+            Occupancy and fragmentation of both buffers.
+
+            Fragmentation is 1 - largest free block / all free space: 0 when the
+            free space is one block, close to 1 when it is scattered in small holes.
+        """
+
+        stats = {"meshes": len(self.meshes)}
+        for name, free_list in (("vertex", self.vertices), ("index", self.indices)):
+            free = free_list.capacity - free_list.used
+            stats[f"{name}_capacity"] = free_list.capacity
+            stats[f"{name}_used"] = free_list.used
+            stats[f"{name}_occupancy"] = free_list.used / max(free_list.capacity, 1)
+            stats[f"{name}_free_blocks"] = len(free_list.sizes)
+            stats[f"{name}_fragmentation"] = 1.0 - free_list.largest / free if free else 0.0
+        return stats
+
+    def destroy(self) -> None:
+
+        glDeleteVertexArrays(1, (self.vao,))
+        glDeleteBuffers(2, (self.vbo, self.ebo))
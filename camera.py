@@ -0,0 +1,47 @@
+import numpy as np
+import pyrr
+
+class Camera:
+    """
+        A perspective camera producing view and projection matrices.
+
+        Matrices follow pyrr's row-vector layout, so they can be uploaded with
+        transpose GL_FALSE and used in the shaders as projection * view * model.
+    """
+
+    def __init__(self, position: list[float], target: list[float], up: list[float] = (0, 1, 0),
+                 fovy: float = 90, aspect: float = 640/480, near: float = 0.1, far: float = 10.0):
+
+        self.position = np.array(position, dtype=np.float32)
+        self.target = np.array(target, dtype=np.float32)
+        self.up = np.array(up, dtype=np.float32)
+        self.fovy = fovy
+        self.aspect = aspect
+        self.near = near
+        self.far = far
+
+    def view(self) -> np.ndarray:
+
+        return pyrr.matrix44.create_look_at(self.position, self.target, self.up, dtype=np.float32)
+
+    def projection(self) -> np.ndarray:
+
+        return pyrr.matrix44.create_perspective_projection(self.fovy, self.aspect, self.near, self.far, dtype=np.float32)
+
+    def frustum_planes(self) -> np.ndarray:
+        """
+            The six clip planes in world space as a (6,4) array of normalized (a, b, c, d).
+
+            A point p is inside when a*x + b*y + c*z + d >= 0 for every plane.
+        """
+
+        #row vectors: clip = p @ view_projection, so the planes come from its columns
+        m = np.matmul(self.view(), self.projection()).astype(np.float64)
+        w = m[:, 3]
+        planes = np.stack([
+            w + m[:, 0], w - m[:, 0], #left, right
+            w + m[:, 1], w - m[:, 1], #bottom, top
+            w + m[:, 2], w - m[:, 2], #near, far
+        ])
+        planes /= np.linalg.norm(planes[:, 0:3], axis=1, keepdims=True)
+        return planes.astype(np.float32)
@@ -0,0 +1,57 @@
+import numpy as np
+
+class CpuVertexTransform:
+    """
+        Transforms a mesh's vertices on the CPU without allocating per frame.
+
+        All original positions are multiplied by the transform in one matmul
+        and written into a persistent interleaved (x, y, z, r, g, b) buffer
+        that already holds the colors.
+    """
+
+    def __init__(self, positions: np.ndarray, colors: np.ndarray):
+        """
+            Preallocate the buffers for the mesh.
+
+            Parameters:
+
+                positions: (N,4) homogeneous vertex positions
+
+                colors: (N,3) vertex colors
+        """
+
+        self.positions = np.ascontiguousarray(positions, dtype=np.float32)
+        self.vertex_count = len(self.positions)
+
+        self.vertices = np.zeros((self.vertex_count, 6), dtype=np.float32)
+        self.vertices[:, 3:6] = colors
+        self._transformed = np.empty((self.vertex_count, 4), dtype=np.float32)
+
+        #views made once, so apply() does not even create view objects
+        self._vertex_positions = self.vertices[:, 0:3]
+        self._transformed_positions = self._transformed[:, 0:3]
+
+    def apply(self, transform: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """
+            Transform every position and return the interleaved vertex buffer.
+
+            Row vectors times the matrix, like pyrr.matrix44.multiply(position, transform).
+
+            Parameters:
+
+                transform: 4x4 model matrix
+
+                out: optional (N,6) float32 array to fill instead of the internal
+                    buffer, e.g. a view of mapped GPU memory. Colors are written
+                    too, since such memory does not keep them between frames.
+        """
+
+        np.matmul(self.positions, transform, out=self._transformed)
+
+        if out is None:
+            np.copyto(self._vertex_positions, self._transformed_positions)
+            return self.vertices
+
+        np.copyto(out[:, 0:3], self._transformed_positions)
+        np.copyto(out[:, 3:6], self.vertices[:, 3:6])
+        return out
@@ -0,0 +1,136 @@
+from OpenGL.GL import *
+import numpy as np
+
+from gl_context import has_extension
+
+#how long map() waits on a fence before giving up, in nanoseconds
+FENCE_TIMEOUT = 1_000_000_000
+
+class DynamicBuffer:
+    """
+        A vertex buffer for geometry that changes every frame.
+
+        With ARB_buffer_storage the buffer is mapped once, persistently, and
+        split into a ring of segments guarded by fences, so the CPU writes the
+        next segment while the GPU still reads the previous ones. Without it,
+        every frame orphans the storage with glBufferData and maps it again.
+        Either way map() hands back a NumPy view of mapped memory, so data is
+        written in place instead of being copied from a separate array.
+    """
+
+    def __init__(self, size: int, stride: int = 1, segments: int = 3,
+                 target: int = GL_ARRAY_BUFFER, persistent: bool | None = None):
+        """
+            Create the buffer storage.
+
+            Parameters:
+
+                size: bytes written per frame
+
+                stride: vertex size in bytes, segments are rounded up to a multiple of it
+                    so first_vertex is always a whole vertex
+
+                segments: ring length for persistent mapping, 3 covers a CPU frame
+                    ahead of two GPU frames in flight
+
+                target: buffer binding point
+
+                persistent: force persistent mapping on or off, None picks it
+                    from ARB_buffer_storage support
+        """
+
+        if persistent is None:
+            persistent = has_extension("GL_ARB_buffer_storage")
+
+        self.target = target
+        self.stride = stride
+        self.persistent = persistent
+        self.segment_size = -(-size // stride) * stride
+        self.segments = segments if persistent else 1
+        self.index = 0
+
+        self.buffer = glGenBuffers(1)
+        glBindBuffer(target, self.buffer)
+
+        if persistent:
+            flags = GL_MAP_WRITE_BIT | GL_MAP_PERSISTENT_BIT | GL_MAP_COHERENT_BIT
+            total = self.segment_size * self.segments
+            glBufferStorage(target, total, None, flags)
+            self._mapped = self._as_array(glMapBufferRange(target, 0, total, flags), total)
+            self._fences = [None] * self.segments
+        else:
+            glBufferData(target, self.segment_size, None, GL_STREAM_DRAW)
+            self._mapped = None
+
+    @staticmethod
+    def _as_array(pointer: int, size: int) -> np.ndarray:
+        if not pointer:
+            raise RuntimeError("glMapBufferRange failed")
+        return np.ctypeslib.as_array(ctypes.cast(pointer, ctypes.POINTER(ctypes.c_ubyte)), shape=(size,))
+
+    @property
+    def offset(self) -> int:
+        """ Byte offset of the segment written this frame. """
+
+        return self.index * self.segment_size
+
+    @property
+    def first_vertex(self) -> int:
+        """ First vertex of this frame's segment, for glDrawArrays. """
+
+        return self.offset // self.stride
+
+    def map(self, shape: tuple[int, ...], dtype: np.dtype = np.float32) -> np.ndarray:
+        """
+            Get a writable view of this frame's segment.
+
+            Waits for the GPU to release the segment when it is still in use.
+            The view is only valid until unmap().
+        """
+
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if nbytes > self.segment_size:
+            raise ValueError(f"{nbytes} bytes do not fit in a {self.segment_size} byte segment")
+
+        if self.persistent:
+            fence = self._fences[self.index]
+            if fence is not None:
+                status = glClientWaitSync(fence, GL_SYNC_FLUSH_COMMANDS_BIT, FENCE_TIMEOUT)
+                glDeleteSync(fence)
+                self._fences[self.index] = None
+                if status in (GL_TIMEOUT_EXPIRED, GL_WAIT_FAILED):
+                    raise RuntimeError("timed out waiting for the GPU to release a buffer segment")
+            segment = self._mapped[self.offset:self.offset + nbytes]
+        else:
+            glBindBuffer(self.target, self.buffer)
+            #orphaning: the driver hands out fresh storage, the old one lives until the GPU is done with it
+            glBufferData(self.target, self.segment_size, None, GL_STREAM_DRAW)
+            pointer = glMapBufferRange(self.target, 0, nbytes, GL_MAP_WRITE_BIT | GL_MAP_INVALIDATE_BUFFER_BIT)
+            segment = self._as_array(pointer, nbytes)
+
+        return segment.view(dtype).reshape(shape)
+
+    def unmap(self) -> None:
+        """ Finish writing this frame's segment, before drawing from it. """
+
+        if not self.persistent:
+            glBindBuffer(self.target, self.buffer)
+            glUnmapBuffer(self.target)
+
+    def fence(self) -> None:
+        """ Mark the end of the draws that read this frame's segment and move to the next one. """
+
+        if self.persistent:
+            self._fences[self.index] = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+            self.index = (self.index + 1) % self.segments
+
+    def destroy(self) -> None:
+
+        if self.persistent:
+            for fence in self._fences:
+                if fence is not None:
+                    glDeleteSync(fence)
+            glBindBuffer(self.target, self.buffer)
+            glUnmapBuffer(self.target)
+            self._mapped = None
+        glDeleteBuffers(1, (self.buffer,))
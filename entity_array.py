@@ -0,0 +1,195 @@
+import numpy as np
+
+def write_rotation(models: np.ndarray, c: np.ndarray, s: np.ndarray, order: str) -> None:
+    """
+        Write the upper 3x3 of the model matrices for one of Entity's rotation orders.
+
+        Parameters:
+
+            models: (N,4,4) output
+
+            c, s: (N,) cosine and sine of each entity's angle
+
+            order: "x", "y" or "xy", matching Entity.make_model_transform_x/_y/_xy
+    """
+
+    if order == "x":
+        models[:, 0, 0] = 1.0
+        models[:, 0, 1] = 0.0
+        models[:, 0, 2] = 0.0
+
+        models[:, 1, 0] = 0.0
+        models[:, 1, 1] = c
+        np.negative(s, out=models[:, 1, 2])
+
+        models[:, 2, 0] = 0.0
+        models[:, 2, 1] = s
+        models[:, 2, 2] = c
+    elif order == "y":
+        models[:, 0, 0] = c
+        models[:, 0, 1] = 0.0
+        models[:, 0, 2] = s
+
+        models[:, 1, 0] = 0.0
+        models[:, 1, 1] = 1.0
+        models[:, 1, 2] = 0.0
+
+        np.negative(s, out=models[:, 2, 0])
+        models[:, 2, 1] = 0.0
+        models[:, 2, 2] = c
+    elif order == "xy":
+        models[:, 0, 0] = c
+        models[:, 0, 1] = 0.0
+        models[:, 0, 2] = s
+
+        np.multiply(s, s, out=models[:, 1, 0])
+        models[:, 1, 1] = c
+        np.multiply(s, c, out=models[:, 1, 2])
+        np.negative(models[:, 1, 2], out=models[:, 1, 2])
+
+        models[:, 2, 0] = models[:, 1, 2]
+        models[:, 2, 1] = s
+        np.multiply(c, c, out=models[:, 2, 2])
+    else:
+        raise ValueError(f"unknown rotation order {order!r}")
+
+def model_transforms(positions: np.ndarray, eulers: np.ndarray, order: str = "xy",
+                     out: np.ndarray | None = None) -> np.ndarray:
+    """
+        Model matrices for arbitrary (N,3) positions and eulers, e.g. a gathered subset.
+
+        Allocates its temporaries, EntityArray's methods are the allocation-free path.
+    """
+
+    theta = np.radians(eulers[:, 2], dtype=np.float32)
+    c = np.cos(theta)
+    s = np.sin(theta)
+
+    if out is None:
+        out = np.empty((len(positions), 4, 4), dtype=np.float32)
+    out[:, 0:3, 3] = 0.0
+    out[:, 3, 0:3] = positions
+    out[:, 3, 3] = 1.0
+    write_rotation(out, c, s, order)
+
+    return out
+
+class EntityArray:
+    """
+        Structure-of-arrays storage for many entities.
+
+        Positions and eulers live in contiguous (N,3) float32 buffers and
+        every model matrix is written in one vectorized pass into a
+        preallocated (N,4,4) float32 array, matching the matrices produced
+        by Entity.make_model_transform_x/_y/_xy in main.py.
+
+        Passing alpha to the make_model_transforms_* methods renders the state
+        that far between the previous and the current simulation step.
+    """
+
+    def __init__(self, capacity: int):
+        """
+            Allocate the buffers for up to capacity entities.
+
+            Parameters:
+
+                capacity: maximum number of entities the array can hold
+        """
+
+        self.capacity = capacity
+        self.count = 0
+
+        self.positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.eulers = np.zeros((capacity, 3), dtype=np.float32)
+        self.models = np.zeros((capacity, 4, 4), dtype=np.float32)
+
+        #state at the previous simulation step, for render interpolation
+        self.previous_positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.previous_eulers = np.zeros((capacity, 3), dtype=np.float32)
+
+        #scratch buffers, reused every frame so the transform pass never allocates
+        self._theta = np.zeros(capacity, dtype=np.float32)
+        self._cos = np.zeros(capacity, dtype=np.float32)
+        self._sin = np.zeros(capacity, dtype=np.float32)
+        self._blend_positions = np.zeros((capacity, 3), dtype=np.float32)
+        self._blend_angle = np.zeros(capacity, dtype=np.float32)
+
+        self.models[:, 3, 3] = 1.0
+
+    def add(self, position: list[float], eulers: list[float]) -> int:
+        """ Append an entity and return its index. """
+
+        if self.count == self.capacity:
+            raise IndexError(f"EntityArray is full ({self.capacity} entities)")
+
+        index = self.count
+        self.positions[index] = position
+        self.eulers[index] = eulers
+        self.previous_positions[index] = position
+        self.previous_eulers[index] = eulers
+        self.count += 1
+
+        return index
+
+    def store_previous(self) -> None:
+        """ Remember the current state, call at the start of every simulation step. """
+
+        n = self.count
+        np.copyto(self.previous_positions[:n], self.positions[:n])
+        np.copyto(self.previous_eulers[:n], self.eulers[:n])
+
+    def _rotation_terms(self, n: int, alpha: float | None) -> tuple[np.ndarray, np.ndarray]:
+        #the per-entity methods rotate by eulers[2] on every axis, keep that
+        theta = self._theta[:n]
+        if alpha is None:
+            np.radians(self.eulers[:n, 2], out=theta)
+        else:
+            #blend along the short way round, so 359 -> 1 does not spin backwards
+            angle = self._blend_angle[:n]
+            previous = self.previous_eulers[:n, 2]
+            np.subtract(self.eulers[:n, 2], previous, out=angle)
+            angle += 180.0
+            np.mod(angle, 360.0, out=angle)
+            angle -= 180.0
+            angle *= alpha
+            angle += previous
+            np.radians(angle, out=theta)
+        c = self._cos[:n]
+        s = self._sin[:n]
+        np.cos(theta, out=c)
+        np.sin(theta, out=s)
+        return c, s
+
+    def _write_translation(self, n: int, alpha: float | None) -> np.ndarray:
+        models = self.models[:n]
+        if alpha is None:
+            models[:, 3, 0:3] = self.positions[:n]
+        else:
+            blend = self._blend_positions[:n]
+            np.subtract(self.positions[:n], self.previous_positions[:n], out=blend)
+            blend *= alpha
+            blend += self.previous_positions[:n]
+            models[:, 3, 0:3] = blend
+        return models
+
+    def _make_model_transforms(self, order: str, alpha: float | None) -> np.ndarray:
+        n = self.count
+        c, s = self._rotation_terms(n, alpha)
+        models = self._write_translation(n, alpha)
+        write_rotation(models, c, s, order)
+        return models
+
+    def make_model_transforms_x(self, alpha: float | None = None) -> np.ndarray:
+        """ Vectorized Entity.make_model_transform_x: R_x(theta) * T. """
+
+        return self._make_model_transforms("x", alpha)
+
+    def make_model_transforms_y(self, alpha: float | None = None) -> np.ndarray:
+        """ Vectorized Entity.make_model_transform_y: R_y(theta) * T. """
+
+        return self._make_model_transforms("y", alpha)
+
+    def make_model_transforms_xy(self, alpha: float | None = None) -> np.ndarray:
+        """ Vectorized Entity.make_model_transform_xy: R_x(theta) * R_y(theta) * T. """
+
+        return self._make_model_transforms("xy", alpha)
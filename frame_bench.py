@@ -0,0 +1,99 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from bench_utils import summarize
+
+def run(app_module: str, frames: int, warmup: int, profile: str | None = None) -> dict:
+    """
+        Render a fixed number of frames of an app headless and time them.
+
+        There is no frame cap and every frame runs exactly one simulation
+        step, so two runs on the same machine render the same frames.
+    """
+
+    from OpenGL.GL import GL_RENDERER, GL_RGBA, GL_UNSIGNED_BYTE, glFinish, glGetString, glReadPixels
+
+    module = importlib.import_module(app_module)
+    app = module.App(headless=True, profile=profile is not None)
+    profiler = app.profiler
+
+    for _ in range(warmup):
+        app.update()
+        app.render()
+    glFinish()
+    profiler.frame = 0
+
+    samples = np.empty(frames, dtype=np.float64)
+    start = time.perf_counter_ns()
+    for i in range(frames):
+        frame_start = time.perf_counter_ns()
+        profiler.begin_frame()
+        with profiler.scope("update"):
+            app.update()
+        app.render()
+        #stands in for the buffer swap, so GPU time is part of the frame
+        with profiler.scope("finish"):
+            glFinish()
+        profiler.end_frame()
+        samples[i] = time.perf_counter_ns() - frame_start
+    total_seconds = (time.perf_counter_ns() - start) / 1e9
+
+    target = app.offscreen
+    pixels = glReadPixels(0, 0, target.width, target.height, GL_RGBA, GL_UNSIGNED_BYTE)
+    renderer = glGetString(GL_RENDERER).decode()
+    app.quit()
+
+    extra = {}
+    if profile is not None:
+        profiler.export_chrome_trace(profile)
+        extra["profile"] = profiler.summary()
+
+    return {
+        "app": app_module,
+        "platform": os.environ["PYOPENGL_PLATFORM"],
+        "renderer": renderer,
+        "frames": frames,
+        "warmup_frames": warmup,
+        **summarize(samples / 1e6),
+        "fps": frames / total_seconds,
+        #crc of the last frame, equal across runs when rendering is deterministic
+        "frame_crc32": zlib.crc32(pixels),
+        **extra,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Headless frame benchmark for main.py and triangle.py")
+    parser.add_argument("app", choices=["main", "triangle"], help="app module to run")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=60)
+    parser.add_argument("--platform", choices=["egl", "osmesa"], default="egl")
+    parser.add_argument("--profile", metavar="TRACE", help="profile each phase and write a Chrome trace here")
+    parser.add_argument("--output", help="write the JSON report to this file as well as stdout")
+    parser.add_argument("--gl-debug", action="store_true", help="keep PyOpenGL's error checking on, GL_DEBUG=1 does too")
+    args = parser.parse_args()
+
+    if "OpenGL" in sys.modules:
+        raise RuntimeError("OpenGL was imported before the headless platform was chosen")
+    os.environ["PYOPENGL_PLATFORM"] = args.platform
+
+    #the apps run in release mode, as they do when started on their own
+    import gl_dispatch
+    gl_dispatch.configure(debug=args.gl_debug or gl_dispatch.debug_requested())
+
+    report = run(args.app, args.frames, args.warmup, args.profile)
+
+    text = json.dumps(report, indent=4)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import time
+
+PACING_MODES = ("vsync", "tick", "tick_busy_loop", "uncapped")
+
+class FixedTimestep:
+    """
+        Accumulator that turns variable frame times into fixed simulation steps.
+
+        Simulation always advances in steps of exactly step seconds. When a
+        frame takes long, the loop runs several steps before the next render,
+        so render frames are skipped instead of letting simulation time fall
+        behind wall time. Only a stall longer than max_backlog seconds (a
+        breakpoint, a dragged window) is dropped.
+    """
+
+    def __init__(self, step: float = 1 / 144, max_steps_per_frame: int = 8, max_backlog: float = 0.25):
+        """
+            Parameters:
+
+                step: simulation step in seconds
+
+                max_steps_per_frame: steps run before control returns to the loop,
+                    any backlog left makes the loop skip rendering and come back
+
+                max_backlog: accumulated seconds beyond which time is dropped
+        """
+
+        self.step = step
+        self.max_steps_per_frame = max_steps_per_frame
+        self.max_backlog = max_backlog
+
+        self.accumulator = 0.0
+        self.simulated = 0.0
+        self.dropped = 0.0
+        self._last = None
+
+    def advance(self) -> int:
+        """ Add the wall time since the last call and return how many steps to run now. """
+
+        now = time.perf_counter()
+        if self._last is not None:
+            self.accumulator += now - self._last
+        self._last = now
+
+        if self.accumulator > self.max_backlog:
+            self.dropped += self.accumulator - self.max_backlog
+            self.accumulator = self.max_backlog
+
+        steps = min(int(self.accumulator / self.step), self.max_steps_per_frame)
+        self.accumulator -= steps * self.step
+        self.simulated += steps * self.step
+        return steps
+
+    @property
+    def behind(self) -> bool:
+        """ Whether whole steps are still pending, in which case this frame should not be rendered. """
+
+        return self.accumulator >= self.step
+
+    @property
+    def alpha(self) -> float:
+        """ How far between the last two simulation states the render should be, 0 to 1. """
+
+        return self.accumulator / self.step
+
+class FramePacer:
+    """
+        Paces the render loop.
+
+        vsync: the buffer swap waits for the display, pygame's clock only measures
+
+        tick: pygame.time.Clock.tick, sleeps to the cap, cheap on the CPU but coarse
+
+        tick_busy_loop: spins to the cap, precise but keeps a core busy
+
+        uncapped: no waiting at all
+    """
+
+    def __init__(self, mode: str = "tick", fps: int = 144):
+
+        if mode not in PACING_MODES:
+            raise ValueError(f"unknown pacing mode {mode!r}, expected one of {PACING_MODES}")
+
+        self.mode = mode
+        self.fps = fps
+        #made on the first pace, so a headless app never imports pygame
+        self.clock = None
+
+    def set_up_display(self) -> None:
+        """ Ask for a swap interval, call before pg.display.set_mode. """
+
+        import pygame as pg
+
+        pg.display.gl_set_attribute(pg.GL_SWAP_CONTROL, 1 if self.mode == "vsync" else 0)
+
+    def pace(self) -> None:
+        """ Call once per rendered frame, after the flip. """
+
+        if self.clock is None:
+            import pygame as pg
+            self.clock = pg.time.Clock()
+        if self.mode == "tick":
+            self.clock.tick(self.fps)
+        elif self.mode == "tick_busy_loop":
+            self.clock.tick_busy_loop(self.fps)
+        else:
+            self.clock.tick()
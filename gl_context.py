@@ -0,0 +1,139 @@
+import ctypes
+import os
+
+def create_window_context(width: int = 640, height: int = 480) -> None:
+    """ Open a pygame window with a 3.3 core context, like App.set_up_pygame. """
+
+    import pygame as pg
+
+    pg.init()
+    pg.display.gl_set_attribute(pg.GL_CONTEXT_MAJOR_VERSION, 3)
+    pg.display.gl_set_attribute(pg.GL_CONTEXT_MINOR_VERSION, 3)
+    pg.display.gl_set_attribute(pg.GL_CONTEXT_PROFILE_MASK, pg.GL_CONTEXT_PROFILE_CORE)
+    pg.display.set_mode((width, height), pg.OPENGL|pg.DOUBLEBUF)
+
+_headless_buffer = None
+
+def create_headless_context() -> None:
+    """
+        Make a 3.3 core context current with no window or display.
+
+        PyOpenGL picks its platform at import time, so PYOPENGL_PLATFORM has to
+        be set to "egl" (surfaceless EGL) or "osmesa" before anything imports
+        OpenGL. Both work on Mesa llvmpipe without a GPU.
+    """
+
+    platform = os.environ.get("PYOPENGL_PLATFORM")
+    if platform == "egl":
+        _create_egl_context()
+    elif platform == "osmesa":
+        _create_osmesa_context()
+    else:
+        raise RuntimeError("set PYOPENGL_PLATFORM=egl or osmesa before importing OpenGL to use a headless context")
+
+def _create_osmesa_context() -> None:
+    global _headless_buffer
+
+    from OpenGL import arrays, osmesa
+    from OpenGL.GL import GL_UNSIGNED_BYTE
+
+    attribs = [
+        osmesa.OSMESA_FORMAT, osmesa.OSMESA_RGBA,
+        osmesa.OSMESA_PROFILE, osmesa.OSMESA_CORE_PROFILE,
+        osmesa.OSMESA_CONTEXT_MAJOR_VERSION, 3,
+        osmesa.OSMESA_CONTEXT_MINOR_VERSION, 3,
+        0
+    ]
+    context = osmesa.OSMesaCreateContextAttribs(attribs, None)
+    if not context:
+        raise RuntimeError("OSMesaCreateContextAttribs failed")
+
+    #OSMesa needs a client-side color buffer to be current, rendering goes to an FBO anyway
+    _headless_buffer = arrays.GLubyteArray.zeros((1, 1, 4))
+    if not osmesa.OSMesaMakeCurrent(context, _headless_buffer, GL_UNSIGNED_BYTE, 1, 1):
+        raise RuntimeError("OSMesaMakeCurrent failed")
+
+def _create_egl_context() -> None:
+    os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+    from OpenGL import EGL
+
+    display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    major, minor = EGL.EGLint(), EGL.EGLint()
+    if not EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor)):
+        raise RuntimeError("eglInitialize failed")
+
+    config_attribs = [
+        EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+        EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+        EGL.EGL_NONE
+    ]
+    config = EGL.EGLConfig()
+    config_count = EGL.EGLint()
+    EGL.eglChooseConfig(display, (EGL.EGLint * len(config_attribs))(*config_attribs),
+                        ctypes.pointer(config), 1, ctypes.pointer(config_count))
+    if config_count.value == 0:
+        raise RuntimeError("no EGL config with desktop OpenGL support")
+
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    context_attribs = [
+        EGL.EGL_CONTEXT_MAJOR_VERSION, 3,
+        EGL.EGL_CONTEXT_MINOR_VERSION, 3,
+        EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK, EGL.EGL_CONTEXT_OPENGL_CORE_PROFILE_BIT,
+        EGL.EGL_NONE
+    ]
+    context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT,
+                                   (EGL.EGLint * len(context_attribs))(*context_attribs))
+    if context == EGL.EGL_NO_CONTEXT:
+        raise RuntimeError("eglCreateContext failed")
+
+    EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, context)
+
+_extension_cache: set[str] | None = None
+
+def has_extension(name: str) -> bool:
+    """ Whether the current context exposes the extension, e.g. "GL_ARB_buffer_storage". """
+
+    global _extension_cache
+
+    if _extension_cache is None:
+        from OpenGL.GL import glGetIntegerv, glGetStringi, GL_EXTENSIONS, GL_NUM_EXTENSIONS
+
+        count = int(glGetIntegerv(GL_NUM_EXTENSIONS))
+        _extension_cache = {glGetStringi(GL_EXTENSIONS, i).decode() for i in range(count)}
+
+    return name in _extension_cache
+
+class OffscreenTarget:
+    """ A framebuffer object with a color renderbuffer, for rendering without a window. """
+
+    def __init__(self, width: int, height: int):
+
+        from OpenGL.GL import (
+            glGenFramebuffers, glBindFramebuffer, glGenRenderbuffers, glBindRenderbuffer,
+            glRenderbufferStorage, glFramebufferRenderbuffer, glCheckFramebufferStatus,
+            glViewport, GL_FRAMEBUFFER, GL_RENDERBUFFER, GL_RGBA8, GL_COLOR_ATTACHMENT0,
+            GL_FRAMEBUFFER_COMPLETE
+        )
+
+        self.width = width
+        self.height = height
+
+        self.fbo = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        self.color = glGenRenderbuffers(1)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.color)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, width, height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, self.color)
+
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError("offscreen framebuffer is incomplete")
+
+        glViewport(0, 0, width, height)
+
+    def destroy(self) -> None:
+
+        from OpenGL.GL import glDeleteFramebuffers, glDeleteRenderbuffers
+
+        glDeleteRenderbuffers(1, (self.color,))
+        glDeleteFramebuffers(1, (self.fbo,))
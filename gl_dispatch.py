@@ -0,0 +1,130 @@
+import ctypes
+import os
+import sys
+
+import OpenGL
+
+#PyOpenGL checks every call until an entry point opts into release mode with configure()
+DEBUG = True
+
+def debug_requested() -> bool:
+    """ --gl-debug on the command line or GL_DEBUG=1 in the environment. """
+
+    return "--gl-debug" in sys.argv or os.environ.get("GL_DEBUG", "0") not in ("", "0")
+
+def configure(debug: bool) -> None:
+    """
+        Pick the process's GL mode, before anything is imported from OpenGL.
+
+        Release mode (debug=False) turns off PyOpenGL's error checking and
+        logging and resolves GLDispatch's names to raw entry points. PyOpenGL
+        copies its flags into OpenGL._configflags when its first submodule is
+        imported, so changing the mode after that raises instead of silently
+        doing nothing.
+    """
+
+    global DEBUG
+
+    flags = sys.modules.get("OpenGL._configflags")
+    if flags is not None and flags.ERROR_CHECKING != debug:
+        raise RuntimeError("gl_dispatch.configure() has to run before anything is imported from OpenGL")
+
+    if not debug:
+        OpenGL.ERROR_CHECKING = False
+        OpenGL.ERROR_LOGGING = False
+        if os.environ.get("PYOPENGL_PLATFORM") == "egl":
+            #PyOpenGL 3.1 leaves the EGL error checker undefined when checking is off,
+            #and OpenGL.EGL then fails to import
+            from OpenGL.raw.EGL import _errors
+            if not hasattr(_errors, "_error_checker"):
+                _errors._error_checker = None
+    DEBUG = debug
+
+_enum = ctypes.c_uint
+_int = ctypes.c_int
+_uint = ctypes.c_uint
+_boolean = ctypes.c_ubyte
+_intptr = ctypes.c_ssize_t
+_pointer = ctypes.c_void_p
+
+#C signatures of the hot-path entry points called without PyOpenGL
+SIGNATURES = {
+    "glUseProgram": (_uint,),
+    "glBindVertexArray": (_uint,),
+    "glBindBuffer": (_enum, _uint),
+    "glBindBufferRange": (_enum, _uint, _uint, _intptr, _intptr),
+    "glBufferSubData": (_enum, _intptr, _intptr, _pointer),
+    "glUniformMatrix4fv": (_int, _int, _boolean, _pointer),
+    "glDrawArrays": (_enum, _int, _int),
+    "glDrawElementsBaseVertex": (_enum, _int, _enum, _pointer, _int),
+}
+
+#arguments that are raw addresses, PyOpenGL wants them as ctypes pointers
+_POINTER_ARGUMENTS = {
+    "glBufferSubData": 3,
+    "glUniformMatrix4fv": 3,
+    "glDrawElementsBaseVertex": 3,
+}
+
+class GLDispatch:
+    """
+        GL entry points for the per-draw hot paths.
+
+        In release mode each name resolves once to the driver's function,
+        called through a bare ctypes prototype: no error check, no logging,
+        no array handler. Pointer arguments are plain addresses, e.g.
+        array.ctypes.data computed once for a persistent NumPy buffer.
+
+        In debug mode, the default, the same names go through PyOpenGL with
+        full error checking, so a bad call raises where it is made.
+
+        debug=None follows the mode set by configure(). Entry points resolve
+        on first use, after a context exists.
+    """
+
+    def __init__(self, debug: bool | None = None):
+
+        self._debug = debug
+
+    @property
+    def debug(self) -> bool:
+        return DEBUG if self._debug is None else self._debug
+
+    def __getattr__(self, name: str):
+        if name not in SIGNATURES:
+            raise AttributeError(name)
+        function = self._checked(name) if self.debug else self._raw(name)
+        setattr(self, name, function)
+        return function
+
+    @staticmethod
+    def _raw(name: str):
+        from OpenGL import platform
+
+        address = platform.PLATFORM.getExtensionProcedure(name.encode())
+        if not address:
+            #some platforms only export core 1.x functions from the library itself
+            address = ctypes.cast(getattr(platform.PLATFORM.GL, name), ctypes.c_void_p).value
+        if not address:
+            raise RuntimeError(f"{name} is not available in this context")
+        prototype = platform.PLATFORM.functionTypeFor(platform.PLATFORM.GL)(None, *SIGNATURES[name])
+        return prototype(address)
+
+    @staticmethod
+    def _checked(name: str):
+        import OpenGL.GL as GL
+
+        function = getattr(GL, name)
+        position = _POINTER_ARGUMENTS.get(name)
+        if position is None:
+            return function
+
+        def call(*args):
+            args = list(args)
+            args[position] = ctypes.c_void_p(args[position])
+            return function(*args)
+
+        call.__name__ = name
+        return call
+
+gl = GLDispatch()
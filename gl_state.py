@@ -0,0 +1,62 @@
+from OpenGL.GL import *
+
+from gl_dispatch import gl
+
+class GLStateCache:
+    """
+        Shadows the currently bound program and vertex array so redundant
+        binds never reach the driver.
+
+        Code that binds through GL directly (overlays, warm_up, other
+        renderers) leaves the shadow stale, call invalidate() afterwards.
+    """
+
+    def __init__(self):
+
+        self.program = None
+        self.vao = None
+        self.material = None
+
+        self.binds = 0
+        self.avoided = 0
+
+    def invalidate(self) -> None:
+        """ Forget what is bound, the next bind of each kind always goes through. """
+
+        self.program = None
+        self.vao = None
+        self.material = None
+
+    def reset_counters(self) -> None:
+
+        self.binds = 0
+        self.avoided = 0
+
+    def use_program(self, program: int) -> None:
+
+        if program == self.program:
+            self.avoided += 1
+            return
+        gl.glUseProgram(program)
+        self.program = program
+        self.binds += 1
+
+    def bind_vertex_array(self, vao: int) -> None:
+
+        if vao == self.vao:
+            self.avoided += 1
+            return
+        gl.glBindVertexArray(vao)
+        self.vao = vao
+        self.binds += 1
+
+    def set_material(self, material: int, bind_material=None) -> None:
+        """ Track the material, calling bind_material(material) only when it changes. """
+
+        if material == self.material:
+            self.avoided += 1
+            return
+        if bind_material is not None:
+            bind_material(material)
+        self.material = material
+        self.binds += 1
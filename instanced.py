@@ -0,0 +1,68 @@
+from OpenGL.GL import *
+import numpy as np
+
+#a mat4 attribute takes four consecutive vec4 locations, after vertexPos and vertexColor
+INSTANCE_MODEL_LOCATION = 2
+MATRIX_BYTES = 64
+
+class InstancedRenderer:
+    """
+        Draws many copies of one mesh with a single glDrawArraysInstanced call.
+
+        Per-instance model matrices are streamed into their own vertex buffer
+        and read by shaders/vertex_instanced.txt through attribute divisors.
+    """
+
+    def __init__(self, mesh, capacity: int = 1024):
+        """
+            Attach an instance buffer to the mesh's vertex array.
+
+            Parameters:
+
+                mesh: any mesh with vao and vertex_count attributes, e.g. TriangleMesh
+
+                capacity: initial number of instances, the buffer grows on demand
+        """
+
+        self.mesh = mesh
+        self.capacity = capacity
+
+        self.instance_vbo = glGenBuffers(1)
+        glBindVertexArray(mesh.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glBufferData(GL_ARRAY_BUFFER, capacity * MATRIX_BYTES, None, GL_DYNAMIC_DRAW)
+
+        for column in range(4):
+            location = INSTANCE_MODEL_LOCATION + column
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, 4, GL_FLOAT, GL_FALSE, MATRIX_BYTES, ctypes.c_void_p(16 * column))
+            glVertexAttribDivisor(location, 1)
+
+        glBindVertexArray(0)
+
+    def draw(self, models: np.ndarray) -> None:
+        """
+            Upload the model matrices and draw one instance per matrix.
+
+            Parameters:
+
+                models: contiguous (N,4,4) float32 array, e.g. EntityArray.models[:count]
+        """
+
+        count = len(models)
+        if count == 0:
+            return
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        if count > self.capacity:
+            while self.capacity < count:
+                self.capacity *= 2
+            glBufferData(GL_ARRAY_BUFFER, self.capacity * MATRIX_BYTES, None, GL_DYNAMIC_DRAW)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, count * MATRIX_BYTES, models)
+
+        glBindVertexArray(self.mesh.vao)
+        glDrawArraysInstanced(GL_TRIANGLES, 0, self.mesh.vertex_count, count)
+
+    def destroy(self) -> None:
+
+        glDeleteBuffers(1, (self.instance_vbo,))
@@ -1,20 +1,47 @@
-import pygame as pg
-from OpenGL.GL import *
-from OpenGL.GL.shaders import compileProgram, compileShader
-import numpy as np
-import pyrr
+import sys
+import time
 
-def createShader(vertexFilepath: str, fragmentFilepath: str) -> int:
-    
-    with open(vertexFilepath,'r') as f:
-        vertex_src = f.readlines()
+#startup is timed from here, so the imports below count towards it
+STARTED = time.perf_counter_ns()
 
-    with open(fragmentFilepath,'r') as f:
-        fragment_src = f.readlines()
+#run as the app it opts into release mode (--gl-debug or GL_DEBUG=1 keep checking) before
+#anything is imported from OpenGL. Imported as a module, the importer picks, e.g. frame_bench.py
+if __name__ == "__main__":
+    import gl_dispatch
+    gl_dispatch.configure(debug=gl_dispatch.debug_requested())
+from OpenGL.GL import (
+    GL_ARRAY_BUFFER, GL_BUFFER_SIZE, GL_COLOR_BUFFER_BIT, GL_STATIC_DRAW,
+    glBindBuffer, glBindVertexArray, glBufferData, glClear, glClearColor, glDeleteBuffers,
+    glDeleteVertexArrays, glGenBuffers, glGenVertexArrays, glGetBufferParameteriv,
+)
+import numpy as np
+from pyrr import matrix44
+
+from asset_manager import AssetManager
+from camera import Camera
+from entity_array import EntityArray
+from frame_pacing import PACING_MODES, FixedTimestep, FramePacer
+from gl_context import OffscreenTarget, create_headless_context
+from gl_state import GLStateCache
+from profiler import NullProfiler, Profiler, ProfilerOverlay, StartupTimeline
+from render_queue import RenderQueue
+from scene_io import SceneSaver
+from shader_cache import shader_cache
+from shader_scheduler import ShaderScheduler
+from spatial_index import UniformGrid
+from uniform_buffers import DRAW_BINDING, DRAW_DATA, FrameUniforms, UniformArena
+from vertex_format import POSITION_COLOR_PACKED
+
+IMPORTED = time.perf_counter_ns()
+
+#bounding sphere of TriangleMesh around the entity position, sqrt(0.5^2 + 0.5^2)
+TRIANGLE_RADIUS = 0.7072
+#F5 writes the entities here, on a background thread
+SCENE_PATH = "scene.npy"
 
-    shader = compileProgram(compileShader(vertex_src, GL_VERTEX_SHADER), compileShader(fragment_src, GL_FRAGMENT_SHADER))
+def createShader(vertexFilepath: str, fragmentFilepath: str) -> int:
 
-    return shader
+    return shader_cache.load(vertexFilepath, fragmentFilepath)
 
 class Entity:
 
@@ -23,19 +50,19 @@ class Entity:
         self.eulers = np.array(eulers, dtype=np.float32)
         
     def make_model_transform_y(self) -> np.ndarray:
-        model_transform = pyrr.matrix44.create_identity(dtype=np.float32)
+        model_transform = matrix44.create_identity(dtype=np.float32)
 
-        model_transform = pyrr.matrix44.multiply(
+        model_transform = matrix44.multiply(
             m1 = model_transform,
-            m2 = pyrr.matrix44.create_from_y_rotation(
+            m2 = matrix44.create_from_y_rotation(
                 theta=np.radians(self.eulers[2]),
                 dtype=np.float32
             )
         )
 
-        model_transform = pyrr.matrix44.multiply(
+        model_transform = matrix44.multiply(
             m1 = model_transform,
-            m2 = pyrr.matrix44.create_from_translation(
+            m2 = matrix44.create_from_translation(
                 vec=self.position,
                 dtype=np.float32
             )
@@ -44,19 +71,19 @@ class Entity:
         return model_transform
     
     def make_model_transform_x(self) -> np.ndarray:
-        model_transform = pyrr.matrix44.create_identity(dtype=np.float32)
+        model_transform = matrix44.create_identity(dtype=np.float32)
 
-        model_transform = pyrr.matrix44.multiply(
+        model_transform = matrix44.multiply(
             m1 = model_transform,
-            m2 = pyrr.matrix44.create_from_x_rotation(
+            m2 = matrix44.create_from_x_rotation(
                 theta=np.radians(self.eulers[2]),
                 dtype=np.float32
             )
         )
 
-        model_transform = pyrr.matrix44.multiply(
+        model_transform = matrix44.multiply(
             m1 = model_transform,
-            m2 = pyrr.matrix44.create_from_translation(
+            m2 = matrix44.create_from_translation(
                 vec=self.position,
                 dtype=np.float32
             )
@@ -65,26 +92,26 @@ class Entity:
         return model_transform
     
     def make_model_transform_xy(self) -> np.ndarray:
-        model_transform = pyrr.matrix44.create_identity(dtype=np.float32)
+        model_transform = matrix44.create_identity(dtype=np.float32)
 
-        model_transform = pyrr.matrix44.multiply(
+        model_transform = matrix44.multiply(
             m1 = model_transform,
-            m2 = pyrr.matrix44.create_from_x_rotation(
+            m2 = matrix44.create_from_x_rotation(
                 theta=np.radians(self.eulers[2]),
                 dtype=np.float32
             )
         )
-        model_transform = pyrr.matrix44.multiply(
+        model_transform = matrix44.multiply(
             m1 = model_transform,
-            m2 = pyrr.matrix44.create_from_y_rotation(
+            m2 = matrix44.create_from_y_rotation(
                 theta=np.radians(self.eulers[2]),
                 dtype=np.float32
             )
         )
 
-        model_transform = pyrr.matrix44.multiply(
+        model_transform = matrix44.multiply(
             m1 = model_transform,
-            m2 = pyrr.matrix44.create_from_translation(
+            m2 = matrix44.create_from_translation(
                 vec=self.position,
                 dtype=np.float32
             )
@@ -94,89 +121,264 @@ class Entity:
 
 class App:
 
-    def __init__(self):        
-        self.set_up_pygame()
+    def __init__(self, headless: bool = False, profile: bool = False, pacing: str = "tick"):
+        """
+            Set up the program.
 
-        self.make_assets()
+            Parameters:
 
-        self.set_onetime_unforms()
+                headless: render into an offscreen framebuffer through an EGL/OSMesa
+                    context instead of opening a window, and leave driving the
+                    frames (update, render) to the caller, e.g. frame_bench.py
+
+                profile: time each phase of the frame, with an on-screen overlay
+                    and profile_trace.json written on exit when windowed
+
+                pacing: how mainLoop waits between frames, one of frame_pacing.PACING_MODES
+        """
+
+        self.headless = headless
+        self.startup = StartupTimeline(STARTED)
+        self.startup.mark("import", IMPORTED)
+        self.pacer = FramePacer(pacing, fps=144)
+        self.profiler = Profiler() if profile else NullProfiler()
 
-        self.get_uniform_locations()
+        #the first frame does not need these, finish_startup makes them once it is presented
+        self.started = False
+        self.scene_saver = None
+        self.overlay = None
 
-        self.mainLoop()
+        if headless:
+            self.set_up_headless()
+        else:
+            self.set_up_pygame()
+        self.startup.mark("context")
+
+        self.make_assets()
+
+        if headless:
+            self.assets.wait_all()
+            self.finish_loading()
+            glClearColor(0.00, 0.33, 0.50, 1)
+        else:
+            self.mainLoop()
 
     def set_up_pygame(self) -> None:
+        #pygame is imported by the windowed set up only, headless runs never load it
+        import pygame as pg
+
         pg.init()
         pg.display.gl_set_attribute(pg.GL_CONTEXT_MAJOR_VERSION, 3)
         pg.display.gl_set_attribute(pg.GL_CONTEXT_MINOR_VERSION, 3)
         pg.display.gl_set_attribute(pg.GL_CONTEXT_PROFILE_MASK, pg.GL_CONTEXT_PROFILE_CORE)
+        self.pacer.set_up_display()
 
         pg.display.set_mode((640, 480), pg.OPENGL|pg.DOUBLEBUF)
-        self.clock = pg.time.Clock()
+
+    def set_up_headless(self) -> None:
+        create_headless_context()
+        self.offscreen = OffscreenTarget(640, 480)
         
     def make_assets(self) -> None:
 
+        #shaders compile in the background, mainLoop draws loading frames until they are ready
         self.triangle_mesh = TriangleMesh()
+        self.startup.mark("mesh")
 
-        self.triangle = Entity(
+        #files are read on loader threads and uploaded a little each frame,
+        #meshes show the triangle until they are ready
+        self.shader_scheduler = ShaderScheduler()
+        self.assets = AssetManager(self.shader_scheduler, placeholders={"mesh": self.triangle_mesh})
+        self.shader_asset = self.assets.load_shader("shaders/vertex.txt", "shaders/fragment.txt")
+        self.shader = None
+
+        self.entities = EntityArray(capacity=1)
+        #simulated seconds, read by the shaders through FrameData.time
+        self.time = 0.0
+
+        #view, projection and time go up once per frame, the model matrices of
+        #every draw go up together and each draw binds its own range
+        self.frame_uniforms = FrameUniforms()
+        self.draw_uniforms = UniformArena(DRAW_DATA, DRAW_BINDING, capacity=self.entities.capacity)
+
+        #draws are queued with a state sort key and issued without redundant binds
+        self.render_queue = RenderQueue(capacity=self.entities.capacity)
+        self.gl_state = GLStateCache()
+
+        self.triangle = self.entities.add(
             position= [0.0, 0, 0],
             eulers=[0,0,0]
             )
-        
-        self.shader = createShader("shaders/vertex.txt", "shaders/fragment.txt")
 
-    def get_uniform_locations(self) -> None:
+        self.camera = Camera(position=[0, 0, 4], target=[0, 0, 0], fovy=90, aspect=640/480, near=0.1, far=10.0)
 
-        glUseProgram(self.shader)
+        #entities are culled against the camera through this grid before drawing
+        self.spatial_index = UniformGrid([-10, -10, -10], [10, 10, 10], cell_size=2.0, capacity=self.entities.capacity)
+        self.spatial_index.add(self.entities.positions[self.triangle], TRIANGLE_RADIUS)
 
-        self.modelMatrixLocation = glGetUniformLocation(self.shader, "model")
+    def finish_loading(self) -> bool:
+        """ Poll the asset loads, and once the shader is done set up everything that needs it. """
 
-    def set_onetime_unforms(self) -> None:
-        glUseProgram(self.shader)
+        self.assets.update()
+        if self.shader_asset.error is not None:
+            raise self.shader_asset.error
+        if not self.shader_asset.ready:
+            return False
+
+        self.shader = self.shader_asset.value
+        self.shader_scheduler.warm_up([self.shader])
+
+        self.set_onetime_unforms()
+        self.startup.mark("shader")
+
+        return True
+
+    def finish_startup(self) -> None:
+        """
+            Mark the first frame and set up what it could do without: the F5
+            scene saver and the profiler overlay. mainLoop calls this after the
+            first frame is presented, a headless driver after its first render.
 
-        projection_transform = pyrr.matrix44.create_perspective_projection(90, 640/480, 0.1, 10.0, dtype=np.float32)
+            The asset manager and the shader warm-up stay ahead of the first
+            frame on purpose: its shader is read on the loader pool, and the
+            warm-up exists to run before the program's first real draw.
+        """
 
+        self.startup.mark("first frame")
+        self.started = True
 
+        self.scene_saver = SceneSaver()
+        if self.profiler.enabled and not self.headless:
+            self.overlay = ProfilerOverlay(self.profiler, 640, 480)
+
+    def set_onetime_unforms(self) -> None:
+
+        self.frame_uniforms.data["projection"] = self.camera.projection()
+
+        #the camera does not move, so the view and its frustum are set once too
+        self.frame_uniforms.data["view"] = self.camera.view()
+        self.frustum_planes = self.camera.frustum_planes()
 
     def mainLoop(self) -> None:
         #run the app
+        import pygame as pg
 
         glClearColor(0.00, 0.33, 0.50, 1)
+        #the simulation runs at a fixed 144 steps per second whatever the render rate
+        timestep = FixedTimestep(step=1 / 144)
         running = True
         while (running):
-            #check for events
-            for event in pg.event.get():
-                if (event.type == pg.QUIT):
-                    running = False
+            self.profiler.begin_frame()
 
-            #update triangle
-            self.triangle.eulers[2] += 0.25
-            if self.triangle.eulers[2] > 360:
-                self.triangle.eulers[2] -= 360
-
-            #refresh screen
-            glClear(GL_COLOR_BUFFER_BIT)
-            glUseProgram(self.shader)
-
-            
-            glUniformMatrix4fv(self.modelMatrixLocation, 1, GL_FALSE, self.triangle.make_model_transform_xy())
+            #check for events
+            with self.profiler.scope("events"):
+                for event in pg.event.get():
+                    if (event.type == pg.QUIT):
+                        running = False
+                    elif event.type == pg.KEYDOWN and event.key == pg.K_F5 and self.started:
+                        self.scene_saver.save(SCENE_PATH, self.entities)
+
+            if self.shader is None and not self.finish_loading():
+                #loading frame
+                glClear(GL_COLOR_BUFFER_BIT)
+                pg.display.flip()
+                self.pacer.pace()
+                self.profiler.end_frame()
+                continue
+
+            #GL side of finished loads, within the frame's upload budget
+            with self.profiler.scope("assets"):
+                self.assets.update()
+
+            with self.profiler.scope("update"):
+                for _ in range(timestep.advance()):
+                    self.update()
+
+            if timestep.behind:
+                #still catching up, skip this render rather than let the simulation fall behind
+                self.profiler.end_frame()
+                continue
+
+            self.render(timestep.alpha)
+
+            if self.overlay is not None:
+                self.overlay.draw()
+
+            with self.profiler.scope("flip"):
+                pg.display.flip()
+            if not self.started:
+                self.finish_startup()
+            #timing
+            with self.profiler.scope("tick"):
+                self.pacer.pace()
 
-            #draw the triangle
-            glBindVertexArray(self.triangle_mesh.vao)
-            glDrawArrays(GL_TRIANGLES, 0, self.triangle_mesh.vertex_count)
+            self.profiler.end_frame()
 
+        if self.profiler.enabled:
+            self.profiler.export_chrome_trace("profile_trace.json")
 
+        self.quit()
 
-            pg.display.flip()
-            #timing
-            self.clock.tick(144)
+    def update(self) -> None:
+        #one fixed simulation step
+        self.entities.store_previous()
+        self.time += 1 / 144
+
+        #update triangle
+        self.entities.eulers[self.triangle, 2] += 0.25
+        if self.entities.eulers[self.triangle, 2] > 360:
+            self.entities.eulers[self.triangle, 2] -= 360
+
+    def render(self, alpha: float | None = None) -> None:
+        #refresh screen, alpha blends between the last two simulation steps
+        glClear(GL_COLOR_BUFFER_BIT)
+
+        with self.profiler.scope("transform"):
+            models = self.entities.make_model_transforms_xy(alpha)
+
+        with self.profiler.scope("cull"):
+            visible = self.spatial_index.query_frustum(self.frustum_planes)
+
+        with self.profiler.scope("uniforms"):
+            self.frame_uniforms.data["time"] = self.time
+            self.frame_uniforms.upload()
+            self.draw_uniforms.reserve(len(visible))["model"] = models[visible]
+            self.draw_uniforms.upload()
+
+        with self.profiler.scope("queue"):
+            #front to back, record i of the draw uniforms belongs to visible[i]
+            distances = np.linalg.norm(models[visible, 3, 0:3] - self.camera.position, axis=1)
+            self.render_queue.clear()
+            self.render_queue.submit_many(
+                self.shader, self.triangle_mesh.vao, 0, self.triangle_mesh.vertex_count,
+                depths=distances / self.camera.far, records=np.arange(len(visible))
+            )
+            self.render_queue.sort()
 
-        self.quit()
+        #draw the visible triangles
+        with self.profiler.scope("draw", gpu=True):
+            #the overlay binds its own program and vao between frames
+            self.gl_state.invalidate()
+            self.render_queue.execute(self.gl_state, self.draw_uniforms)
 
     def quit(self) -> None:
+        if self.scene_saver is not None:
+            self.scene_saver.close()
         self.triangle_mesh.destroy()
-        glDeleteProgram(self.shader)
-        pg.quit()
+        self.frame_uniforms.destroy()
+        self.draw_uniforms.destroy()
+        self.assets.shutdown()
+        self.shader_scheduler.wait_all()
+        if self.shader_asset.ready:
+            shader_cache.delete_program(self.shader_asset.value)
+        if self.headless:
+            self.offscreen.destroy()
+        else:
+            import pygame as pg
+
+            if self.overlay is not None:
+                self.overlay.destroy()
+            pg.quit()
         
 class TriangleMesh:
 
@@ -189,7 +391,10 @@ class TriangleMesh:
              0.0,  0.5, 0.0, 0.0, 0.0, 1.0
         )
 
-        self.vertices = np.array(self.vertices, dtype=np.float32)
+        self.vertices = np.array(self.vertices, dtype=np.float32).reshape(3, 6)
+
+        #half float positions and byte colors, 12 bytes a vertex instead of 24
+        self.vertices = POSITION_COLOR_PACKED.pack(position=self.vertices[:, 0:3], color=self.vertices[:, 3:6])
 
         self.vertex_count = 3
 
@@ -205,11 +410,8 @@ class TriangleMesh:
             buffer_size = glGetBufferParameteriv(GL_ARRAY_BUFFER, GL_BUFFER_SIZE)
             print(f"Our buffer is taking up {buffer_size} bytes in memory") #memoria del buffer, 9 puntos tipo float, de 4 bytes c/u = 36 bytes en buffer
 
-        glEnableVertexAttribArray(0) #tambien funciona glEnableVertexAttribArray que solo funciona con un parametro y es mas nuevo (o eso creo | video 1:04:30)
-        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(0))
-
-        glEnableVertexArrayAttrib(self.vao, 1)
-        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(12))
+        #attribute pointers come from the format, position at 0 and color at 1
+        POSITION_COLOR_PACKED.set_up_attributes()
 
 
     def destroy(self):
@@ -220,4 +422,7 @@ class TriangleMesh:
 
 if __name__ == "__main__":
 
-    myApp = App()
\ No newline at end of file
+    pacing = next((mode for mode in PACING_MODES if f"--{mode}" in sys.argv), "tick")
+    myApp = App(profile="--profile" in sys.argv, pacing=pacing)
+    if "--startup" in sys.argv:
+        print(myApp.startup.report())
\ No newline at end of file
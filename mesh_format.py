@@ -0,0 +1,389 @@
+import os
+
+from OpenGL.GL import *
+import numpy as np
+
+from mesh_optimize import narrow_indices, optimize_mesh
+from vertex_format import GL_TYPES, POSITION_COLOR_F32, attribute_dtype
+
+MAGIC = b"PMSH"
+VERSION = 1
+#header and both blobs start on this boundary, so mapped arrays are aligned
+ALIGNMENT = 64
+MAX_ATTRIBUTES = 8
+
+ATTRIBUTE = np.dtype([
+    ("location", "<u4"),
+    ("components", "<u4"),
+    ("type", "<u4"),
+    ("normalized", "<u4"),
+    ("offset", "<u4"),
+])
+
+HEADER = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u4"),
+    ("vertex_count", "<u8"),
+    ("index_count", "<u8"),
+    ("stride", "<u4"),
+    ("index_type", "<u4"),
+    ("attribute_count", "<u4"),
+    ("_reserved", "<u4"),
+    ("vertex_offset", "<u8"),
+    ("index_offset", "<u8"),
+    ("attributes", ATTRIBUTE, (MAX_ATTRIBUTES,)),
+])
+
+#x, y, z, r, g, b as float32, the layout shaders/vertex.txt reads
+POSITION_COLOR = POSITION_COLOR_F32.attributes
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def write_mesh(path: str, vertices: np.ndarray, indices: np.ndarray, attributes: list[tuple]) -> None:
+    """
+        Write a mesh in the binary format.
+
+        Parameters:
+
+            vertices: (N, stride) bytes or any C-contiguous array whose rows are one vertex each
+
+            indices: (M,) uint16 or uint32 triangle list
+
+            attributes: (location, components, gl type, normalized, offset) per attribute
+    """
+
+    vertices = np.ascontiguousarray(vertices)
+    indices = np.ascontiguousarray(indices)
+    if indices.dtype not in (np.uint16, np.uint32):
+        raise ValueError(f"indices must be uint16 or uint32, got {indices.dtype}")
+    if len(attributes) > MAX_ATTRIBUTES:
+        raise ValueError(f"at most {MAX_ATTRIBUTES} attributes, got {len(attributes)}")
+
+    header = np.zeros(1, dtype=HEADER)[0]
+    header["magic"] = MAGIC
+    header["version"] = VERSION
+    header["vertex_count"] = len(vertices)
+    header["index_count"] = len(indices)
+    header["stride"] = vertices.nbytes // max(len(vertices), 1)
+    header["index_type"] = GL_UNSIGNED_SHORT if indices.dtype == np.uint16 else GL_UNSIGNED_INT
+    header["attribute_count"] = len(attributes)
+    header["vertex_offset"] = _align(HEADER.itemsize)
+    header["index_offset"] = _align(int(header["vertex_offset"]) + vertices.nbytes)
+    header["attributes"][:len(attributes)] = attributes
+
+    #write then rename, a half written mesh is never picked up
+    temporary = path + ".tmp"
+    with open(temporary, 'wb') as f:
+        f.write(header.tobytes())
+        f.seek(int(header["vertex_offset"]))
+        f.write(vertices.data)
+        f.seek(int(header["index_offset"]))
+        f.write(indices.data)
+    os.replace(temporary, path)
+
+class MeshFile:
+    """
+        A binary mesh opened with np.memmap.
+
+        vertices and indices are views of the mapped file, nothing is read
+        until they are touched, e.g. by glBufferData copying them to the GPU.
+    """
+
+    def __init__(self, path: str):
+
+        self.path = path
+        self.header = np.fromfile(path, dtype=HEADER, count=1)[0]
+        if self.header["magic"] != MAGIC or self.header["version"] != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} mesh file")
+
+        self.vertex_count = int(self.header["vertex_count"])
+        self.index_count = int(self.header["index_count"])
+        self.stride = int(self.header["stride"])
+        self.index_type = int(self.header["index_type"])
+        self.attributes = self.header["attributes"][:int(self.header["attribute_count"])]
+
+        self.vertices = np.memmap(path, dtype=np.uint8, mode='r', offset=int(self.header["vertex_offset"]),
+                                  shape=(self.vertex_count * self.stride,))
+        index_dtype = GL_TYPES[self.index_type]
+        self.indices = np.memmap(path, dtype=index_dtype, mode='r', offset=int(self.header["index_offset"]),
+                                 shape=(self.index_count,))
+
+    def vertex_dtype(self) -> np.dtype:
+        """ Structured dtype of one vertex, fields named by attribute location. """
+
+        return np.dtype({
+            "names": [f"a{int(a['location'])}" for a in self.attributes],
+            "formats": [attribute_dtype(a["components"], a["type"]) for a in self.attributes],
+            "offsets": [int(a["offset"]) for a in self.attributes],
+            "itemsize": self.stride,
+        })
+
+    def vertex_array(self) -> np.ndarray:
+        """ The mapped vertices viewed as records of vertex_dtype(). """
+
+        return self.vertices.view(self.vertex_dtype())
+
+def _triangulate(faces: list[list[int]]) -> np.ndarray:
+    #fan out polygons, (first, i, i + 1)
+    triangles = []
+    for face in faces:
+        for i in range(1, len(face) - 1):
+            triangles.append((face[0], face[i], face[i + 1]))
+    return np.array(triangles, dtype=np.int64).reshape(-1)
+
+def _position_color_vertices(positions: np.ndarray, colors: np.ndarray | None) -> np.ndarray:
+    vertices = np.ones((len(positions), 6), dtype=np.float32)
+    vertices[:, 0:3] = positions
+    #without colors the mesh is drawn white
+    if colors is not None:
+        vertices[:, 3:6] = colors
+    return vertices
+
+def _index_array(indices: np.ndarray, vertex_count: int) -> np.ndarray:
+    if len(indices) and (indices.min() < 0 or indices.max() >= vertex_count):
+        raise ValueError("face index out of range")
+    return indices.astype(np.uint32)
+
+def import_obj(path: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+        Read the positions, optional vertex colors ("v x y z r g b") and faces of an OBJ file.
+
+        Texture and normal references in faces ("f 1/2/3 ...") are ignored,
+        polygons are fanned into triangles.
+
+        Returns:
+
+            (N,6) float32 x, y, z, r, g, b vertices and a (M,) uint32 triangle list
+    """
+
+    with open(path, 'rb') as f:
+        lines = f.read().splitlines()
+
+    vertex_lines = [line[2:] for line in lines if line.startswith(b"v ")]
+    face_lines = [line[2:] for line in lines if line.startswith(b"f ")]
+
+    #one split and one float conversion for all vertices at once
+    first = vertex_lines[0].split() if vertex_lines else []
+    width = len(first) if len(first) in (3, 6) else 3
+    values = np.array(b" ".join(vertex_lines).split(), dtype=np.float32)
+    if len(values) != width * len(vertex_lines):
+        raise ValueError(f"{path}: every vertex needs the same number of components")
+    values = values.reshape(-1, width)
+    vertices = _position_color_vertices(values[:, 0:3], values[:, 3:6] if width == 6 else None)
+
+    tokens = [line.split() for line in face_lines]
+    joined = b" ".join(face_lines)
+    if tokens and all(len(face) == 3 for face in tokens) and b"/" not in joined:
+        #plain triangles, the common case for converted assets
+        indices = np.array(joined.split(), dtype=np.int64)
+    else:
+        indices = _triangulate([[int(corner.split(b"/")[0]) for corner in face] for face in tokens])
+
+    #OBJ indices are 1-based, negative ones count back from the last vertex
+    indices = np.where(indices < 0, indices + len(vertices), indices - 1)
+    return vertices, _index_array(indices, len(vertices))
+
+#PLY property type -> NumPy dtype, byte order added per file
+PLY_TYPES = {
+    b"char": "i1", b"int8": "i1", b"uchar": "u1", b"uint8": "u1",
+    b"short": "i2", b"int16": "i2", b"ushort": "u2", b"uint16": "u2",
+    b"int": "i4", b"int32": "i4", b"uint": "u4", b"uint32": "u4",
+    b"float": "f4", b"float32": "f4", b"double": "f8", b"float64": "f8",
+}
+
+def import_ply(path: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+        Read the vertices (x, y, z and optional red, green, blue) and faces of an ASCII or binary PLY file.
+
+        Returns:
+
+            (N,6) float32 x, y, z, r, g, b vertices and a (M,) uint32 triangle list
+    """
+
+    with open(path, 'rb') as f:
+        if f.readline().strip() != b"ply":
+            raise ValueError(f"{path} is not a PLY file")
+
+        encoding = None
+        elements = []
+        while True:
+            line = f.readline()
+            if not line:
+                raise ValueError(f"{path}: header has no end_header")
+            words = line.split()
+            if not words or words[0] in (b"comment", b"obj_info"):
+                continue
+            if words[0] == b"format":
+                encoding = words[1]
+            elif words[0] == b"element":
+                elements.append((words[1], int(words[2]), []))
+            elif words[0] == b"property":
+                elements[-1][2].append(words[1:])
+            elif words[0] == b"end_header":
+                break
+
+        order = {b"binary_little_endian": "<", b"binary_big_endian": ">", b"ascii": "<"}[encoding]
+        body = f.read()
+
+    vertices = None
+    indices = None
+    position = 0
+    text = body.split() if encoding == b"ascii" else None
+    for name, count, properties in elements:
+        if name == b"vertex":
+            dtype = np.dtype([(p[1].decode(), order + PLY_TYPES[p[0]]) for p in properties])
+            if text is not None:
+                flat = np.array(text[position:position + count * len(properties)], dtype=np.float64)
+                position += count * len(properties)
+                records = np.zeros(count, dtype=dtype)
+                for i, field in enumerate(dtype.names):
+                    records[field] = flat[i::len(properties)]
+            else:
+                records = np.frombuffer(body, dtype=dtype, count=count, offset=position)
+                position += count * dtype.itemsize
+            positions = np.stack([records["x"], records["y"], records["z"]], axis=1)
+            colors = None
+            if "red" in dtype.names:
+                colors = np.stack([records["red"], records["green"], records["blue"]], axis=1).astype(np.float32)
+                if records.dtype["red"].kind in "ui":
+                    colors /= 255.0
+            vertices = _position_color_vertices(positions, colors)
+        elif name == b"face":
+            indices, position = _read_ply_faces(body, text, position, count, properties, order)
+        else:
+            raise ValueError(f"{path}: unsupported element {name.decode()}")
+
+    if vertices is None or indices is None:
+        raise ValueError(f"{path}: needs vertex and face elements")
+    return vertices, _index_array(indices, len(vertices))
+
+def _read_ply_faces(body: bytes, text: list | None, position: int, count: int,
+                    properties: list, order: str) -> tuple[np.ndarray, int]:
+    if len(properties) != 1 or properties[0][0] != b"list":
+        raise ValueError("faces must have a single vertex index list")
+    count_type = np.dtype(order + PLY_TYPES[properties[0][1]])
+    index_type = np.dtype(order + PLY_TYPES[properties[0][2]])
+
+    if text is not None:
+        #ascii: "3 a b c" per face
+        if count and text[position] == b"3":
+            flat = np.array(text[position:position + 4 * count], dtype=np.int64).reshape(count, 4)
+            if np.all(flat[:, 0] == 3):
+                return flat[:, 1:].reshape(-1), position + 4 * count
+        faces = []
+        for _ in range(count):
+            n = int(text[position])
+            faces.append([int(v) for v in text[position + 1:position + 1 + n]])
+            position += 1 + n
+        return _triangulate(faces), position
+
+    #binary: try all triangles first, a fixed size record per face
+    triangle = np.dtype([("n", count_type), ("v", index_type, (3,))])
+    if count and position + count * triangle.itemsize <= len(body):
+        records = np.frombuffer(body, dtype=triangle, count=count, offset=position)
+        if np.all(records["n"] == 3):
+            return records["v"].reshape(-1).astype(np.int64), position + count * triangle.itemsize
+    faces = []
+    for _ in range(count):
+        n = int(np.frombuffer(body, dtype=count_type, count=1, offset=position)[0])
+        position += count_type.itemsize
+        faces.append(np.frombuffer(body, dtype=index_type, count=n, offset=position).tolist())
+        position += n * index_type.itemsize
+    return _triangulate(faces), position
+
+def convert(source: str, destination: str, optimize: bool = True) -> None:
+    """
+        Import an OBJ or PLY file once and write it in the binary format.
+
+        With optimize, duplicate vertices are welded and triangles and vertices
+        are reordered for the vertex cache first, see mesh_optimize.
+    """
+
+    extension = os.path.splitext(source)[1].lower()
+    if extension == ".obj":
+        vertices, indices = import_obj(source)
+    elif extension == ".ply":
+        vertices, indices = import_ply(source)
+    else:
+        raise ValueError(f"unsupported mesh format {extension}")
+
+    if optimize:
+        vertices, indices = optimize_mesh(vertices, indices)
+    else:
+        indices = narrow_indices(indices, len(vertices))
+    write_mesh(destination, vertices, indices, POSITION_COLOR)
+
+class IndexedMesh:
+    """
+        A mesh drawn from a vertex buffer and an element buffer with glDrawElements.
+
+        Indices are uploaded as 16-bit when every vertex fits and 32-bit otherwise.
+    """
+
+    def __init__(self, vertices: np.ndarray, indices: np.ndarray, stride: int, attributes: list[tuple],
+                 upload: bool = True):
+        """
+            Parameters:
+
+                vertices: vertex data, stride bytes per vertex
+
+                indices: (M,) triangle list
+
+                stride: bytes per vertex
+
+                attributes: (location, components, gl type, normalized, offset) per attribute
+
+                upload: False only creates the buffer objects, the caller allocates
+                    and fills them later, e.g. AssetManager spreading the work over frames
+        """
+
+        self.vertex_count = vertices.nbytes // stride
+        #uint16 input that fits comes back as is, mapped file indices are not copied
+        indices = narrow_indices(indices, self.vertex_count)
+        self.index_count = len(indices)
+        self.index_type = GL_UNSIGNED_SHORT if indices.dtype == np.uint16 else GL_UNSIGNED_INT
+
+        self.vao = glGenVertexArrays(1)
+        glBindVertexArray(self.vao)
+
+        self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        if upload:
+            glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+
+        self.ebo = glGenBuffers(1)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        if upload:
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+
+        for location, components, gl_type, normalized, offset in attributes:
+            location = int(location)
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, int(components), int(gl_type), GL_TRUE if normalized else GL_FALSE,
+                                  stride, ctypes.c_void_p(int(offset)))
+
+        glBindVertexArray(0)
+
+    def draw(self) -> None:
+
+        glBindVertexArray(self.vao)
+        glDrawElements(GL_TRIANGLES, self.index_count, self.index_type, None)
+
+    def destroy(self):
+
+        glDeleteVertexArrays(1, (self.vao,))
+        glDeleteBuffers(2, (self.vbo, self.ebo))
+
+class BinaryMesh(IndexedMesh):
+    """
+        A mesh uploaded from a binary mesh file.
+
+        The mapped blobs go straight to glBufferData and the vertex attribute
+        pointers are set from the layout stored in the file header.
+    """
+
+    def __init__(self, path: str):
+
+        mesh = MeshFile(path)
+        super().__init__(mesh.vertices, mesh.indices, mesh.stride, mesh.attributes.tolist())
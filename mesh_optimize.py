@@ -0,0 +1,163 @@
+import numpy as np
+
+#post-transform cache size assumed when reordering and when measuring ACMR
+CACHE_SIZE = 16
+
+def weld_vertices(vertices: np.ndarray, indices: np.ndarray | None = None,
+                  decimals: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+        Merge bit-identical vertices in one vectorized pass.
+
+        Parameters:
+
+            vertices: (N,k) array, one row per vertex
+
+            indices: (M,) triangle list into vertices, None for a triangle soup
+                where every three rows are one triangle
+
+            decimals: round to this many decimals first, so nearly equal vertices merge too
+
+        Returns:
+
+            (unique vertices in first-use order, (M,) uint32 indices into them)
+    """
+
+    vertices = np.ascontiguousarray(vertices)
+    if decimals is not None:
+        vertices = np.round(vertices, decimals)
+    #+0.0 turns -0.0 into 0.0, so both compare equal as bytes
+    keys = np.ascontiguousarray(vertices + vertices.dtype.type(0))
+    rows = keys.reshape(len(keys), -1)
+    keys = rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).reshape(-1)
+
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    #keep the order vertices were first used in, np.unique sorts by bytes
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    remap = rank[inverse.reshape(-1)]
+
+    welded = vertices[first[order]]
+    if indices is None:
+        return welded, remap.astype(np.uint32)
+    return welded, remap[indices].astype(np.uint32)
+
+def narrow_indices(indices: np.ndarray, vertex_count: int) -> np.ndarray:
+    """ 16-bit indices when every vertex fits, 32-bit otherwise. """
+
+    if vertex_count <= 1 << 16:
+        return indices.astype(np.uint16, copy=False)
+    return indices.astype(np.uint32, copy=False)
+
+def acmr(indices: np.ndarray, cache_size: int = CACHE_SIZE) -> float:
+    """ Average cache miss ratio, vertex shader runs per triangle through a FIFO cache. """
+
+    #a vertex is cached while fewer than cache_size misses happened since it was loaded
+    loaded = {}
+    misses = 0
+    for v in indices.tolist():
+        stamp = loaded.get(v)
+        if stamp is None or misses - stamp >= cache_size:
+            loaded[v] = misses
+            misses += 1
+    return misses / max(len(indices) // 3, 1)
+
+def tipsify(indices: np.ndarray, vertex_count: int, cache_size: int = CACHE_SIZE) -> np.ndarray:
+    """
+        Reorder triangles for the post-transform vertex cache (Sander et al., Tipsify).
+
+        Fans around one vertex at a time, then moves to the candidate vertex
+        that is still in the cache and has the fewest triangles left, falling
+        back to recently used vertices and finally to a linear scan.
+
+        Returns:
+
+            The same triangles as a new (M,) index array, in cache friendly order
+    """
+
+    triangles = indices.reshape(-1, 3)
+    triangle_count = len(triangles)
+
+    #vertex -> triangles using it, in CSR form
+    live = np.bincount(indices, minlength=vertex_count)
+    starts = np.concatenate([[0], np.cumsum(live)]).tolist()
+    adjacency = (np.argsort(indices, kind="stable") // 3).tolist()
+    live = live.tolist()
+    corners = triangles.tolist()
+
+    cache_time = [-cache_size - 1] * vertex_count
+    emitted = bytearray(triangle_count)
+    dead_end = []
+    output = []
+    time = 0
+    cursor = 0
+
+    fan = _next_live(live, cursor)
+    while fan >= 0:
+        candidates = []
+        for t in adjacency[starts[fan]:starts[fan + 1]]:
+            if emitted[t]:
+                continue
+            emitted[t] = 1
+            for v in corners[t]:
+                output.append(v)
+                dead_end.append(v)
+                candidates.append(v)
+                live[v] -= 1
+                if time - cache_time[v] > cache_size:
+                    cache_time[v] = time
+                    time += 1
+
+        #best candidate: alive, and still cached once its remaining fans are emitted
+        fan = -1
+        best = -1
+        for v in candidates:
+            if live[v] > 0:
+                priority = 0
+                if time - cache_time[v] + 2 * live[v] <= cache_size:
+                    priority = time - cache_time[v]
+                if priority > best:
+                    best = priority
+                    fan = v
+
+        if fan < 0:
+            while dead_end:
+                v = dead_end.pop()
+                if live[v] > 0:
+                    fan = v
+                    break
+        if fan < 0:
+            cursor = _next_live(live, cursor)
+            fan = cursor
+
+    return np.array(output, dtype=indices.dtype)
+
+def _next_live(live: list[int], cursor: int) -> int:
+    while cursor < len(live):
+        if live[cursor] > 0:
+            return cursor
+        cursor += 1
+    return -1
+
+def reorder_vertices(vertices: np.ndarray, indices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ Renumber vertices in the order the indices first use them, so fetches walk memory forward. """
+
+    _, first = np.unique(indices, return_index=True)
+    used = indices[np.sort(first)]
+    remap = np.empty(len(vertices), dtype=np.int64)
+    remap[used] = np.arange(len(used))
+    return vertices[used], remap[indices].astype(indices.dtype)
+
+def optimize_mesh(vertices: np.ndarray, indices: np.ndarray | None = None,
+                  cache_size: int = CACHE_SIZE) -> tuple[np.ndarray, np.ndarray]:
+    """
+        Weld, reorder triangles for the vertex cache, reorder vertices for fetch,
+        and narrow the indices to 16 bits when they fit.
+
+        Unused vertices are dropped.
+    """
+
+    vertices, indices = weld_vertices(vertices, indices)
+    indices = tipsify(indices, len(vertices), cache_size)
+    vertices, indices = reorder_vertices(vertices, indices)
+    return vertices, narrow_indices(indices, len(vertices))
@@ -0,0 +1,226 @@
+from OpenGL.GL import *
+import numpy as np
+
+from dynamic_buffer import DynamicBuffer
+
+GRAVITY = (0.0, -9.81, 0.0)
+#bytes per particle on the GPU: position, rgba8 color, life fraction
+PARTICLE_BYTES = 12 + 4 + 4
+
+class ParticleEmitter:
+    """ Spawns particles at a point with randomized velocity and lifetime. """
+
+    def __init__(self, position: list[float], rate: float, velocity: list[float] = (0.0, 5.0, 0.0),
+                 spread: float = 1.0, lifetime: tuple[float, float] = (1.0, 2.0),
+                 color: tuple[int, int, int, int] = (255, 160, 64, 255)):
+        """
+            Parameters:
+
+                position: where particles are born
+
+                rate: particles per second
+
+                velocity: mean initial velocity
+
+                spread: standard deviation added to each velocity component
+
+                lifetime: (shortest, longest) seconds a particle lives
+
+                color: rgba, 0-255
+        """
+
+        self.position = np.array(position, dtype=np.float32)
+        self.rate = rate
+        self.velocity = np.array(velocity, dtype=np.float32)
+        self.spread = np.float32(spread)
+        self.lifetime = lifetime
+        self.color = np.array(color, dtype=np.uint8)
+        #fraction of a particle carried over to the next frame, so low rates still emit
+        self._carry = 0.0
+
+    def emit(self, system: "ParticleSystem", dt: float) -> int:
+        """ Spawn this frame's particles into the system, returns how many fit. """
+
+        wanted = self.rate * dt + self._carry
+        count = int(wanted)
+        self._carry = wanted - count
+        return system.spawn(self, count)
+
+class ParticleSystem:
+    """
+        Structure-of-arrays particle storage with vectorized integration.
+
+        Live particles are packed in [0, count). Dead particles are removed
+        by moving live particles from the end into their slots, so the arrays
+        never have holes and every pass works on contiguous slices.
+    """
+
+    def __init__(self, capacity: int, gravity: list[float] = GRAVITY, seed: int | None = None):
+        """
+            Parameters:
+
+                capacity: maximum number of live particles, spawns beyond it are dropped
+
+                gravity: acceleration applied to every particle
+
+                seed: random seed for the emitters
+        """
+
+        self.capacity = capacity
+        self.count = 0
+        self.gravity = np.array(gravity, dtype=np.float32)
+        self.emitters: list[ParticleEmitter] = []
+        self.rng = np.random.default_rng(seed)
+
+        self.positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.velocities = np.zeros((capacity, 3), dtype=np.float32)
+        self.ages = np.zeros(capacity, dtype=np.float32)
+        self.lifetimes = np.ones(capacity, dtype=np.float32)
+        self.colors = np.zeros((capacity, 4), dtype=np.uint8)
+
+        #scratch buffers, reused every frame so the update never allocates for the live particles
+        self._step = np.zeros((capacity, 3), dtype=np.float32)
+        self._dead = np.zeros(capacity, dtype=bool)
+
+    def spawn(self, emitter: ParticleEmitter, count: int) -> int:
+        """ Add up to count particles from an emitter, returns how many fit. """
+
+        count = min(count, self.capacity - self.count)
+        if count <= 0:
+            return 0
+        new = slice(self.count, self.count + count)
+
+        self.positions[new] = emitter.position
+        velocities = self.velocities[new]
+        self.rng.standard_normal(out=velocities, dtype=np.float32)
+        velocities *= emitter.spread
+        velocities += emitter.velocity
+        self.ages[new] = 0.0
+        self.rng.random(out=self.lifetimes[new], dtype=np.float32)
+        shortest, longest = emitter.lifetime
+        self.lifetimes[new] *= longest - shortest
+        self.lifetimes[new] += shortest
+        self.colors[new] = emitter.color
+
+        self.count += count
+        return count
+
+    def update(self, dt: float) -> int:
+        """
+            Integrate one step, remove expired particles, then let the emitters spawn.
+
+            Returns:
+
+                number of particles that died
+        """
+
+        n = self.count
+        dt = np.float32(dt)
+        velocities = self.velocities[:n]
+        step = self._step[:n]
+
+        #semi-implicit Euler: the velocity first, then the position with the new velocity
+        velocities += self.gravity * dt
+        np.multiply(velocities, dt, out=step)
+        self.positions[:n] += step
+        self.ages[:n] += dt
+
+        died = self._remove_dead()
+        for emitter in self.emitters:
+            emitter.emit(self, float(dt))
+        return died
+
+    def _remove_dead(self) -> int:
+        n = self.count
+        dead_mask = self._dead[:n]
+        np.greater_equal(self.ages[:n], self.lifetimes[:n], out=dead_mask)
+        dead = np.flatnonzero(dead_mask)
+        k = len(dead)
+        if k == 0:
+            return 0
+
+        #slots below the new end that died are filled by live particles above it
+        end = n - k
+        holes = dead[dead < end]
+        movers = end + np.flatnonzero(~dead_mask[end:])
+        for array in (self.positions, self.velocities, self.ages, self.lifetimes, self.colors):
+            array[holes] = array[movers]
+
+        self.count = end
+        return k
+
+    def clear(self) -> None:
+
+        self.count = 0
+
+class ParticleRenderer:
+    """
+        Draws a ParticleSystem as GL_POINTS streamed through a DynamicBuffer.
+
+        Each frame's segment holds the attributes as three blocks, positions,
+        colors and life fractions, so filling it is three contiguous copies
+        instead of an interleaving pass. Use with shaders/particle_vertex.txt
+        and shaders/particle_fragment.txt.
+    """
+
+    def __init__(self, capacity: int, persistent: bool | None = None):
+        """
+            Parameters:
+
+                capacity: particles per frame, usually the system's capacity
+
+                persistent: passed on to DynamicBuffer
+        """
+
+        self.capacity = capacity
+        self.buffer = DynamicBuffer(capacity * PARTICLE_BYTES, persistent=persistent)
+        self.vao = glGenVertexArrays(1)
+
+        glBindVertexArray(self.vao)
+        for location in range(3):
+            glEnableVertexAttribArray(location)
+        glBindVertexArray(0)
+
+    def upload(self, system: ParticleSystem) -> int:
+        """ Copy the live particles into this frame's segment and point the attributes at it. """
+
+        n = min(system.count, self.capacity)
+        capacity = self.capacity
+        segment = self.buffer.map((capacity * PARTICLE_BYTES,), np.uint8)
+
+        positions = segment[:n * 12].view(np.float32).reshape(n, 3)
+        colors = segment[capacity * 12:capacity * 12 + n * 4].reshape(n, 4)
+        life = segment[capacity * 16:capacity * 16 + n * 4].view(np.float32)
+        np.copyto(positions, system.positions[:n])
+        np.copyto(colors, system.colors[:n])
+        np.divide(system.ages[:n], system.lifetimes[:n], out=life)
+        self.buffer.unmap()
+
+        #the segment moves around the ring, so the pointers follow it every frame
+        offset = self.buffer.offset
+        glBindVertexArray(self.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.buffer.buffer)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 12, ctypes.c_void_p(offset))
+        glVertexAttribPointer(1, 4, GL_UNSIGNED_BYTE, GL_TRUE, 4, ctypes.c_void_p(offset + capacity * 12))
+        glVertexAttribPointer(2, 1, GL_FLOAT, GL_FALSE, 4, ctypes.c_void_p(offset + capacity * 16))
+        return n
+
+    def draw(self, system: ParticleSystem) -> None:
+        """ Upload and draw with additive blending and no depth writes, both back to the defaults afterwards. """
+
+        n = self.upload(system)
+        if n:
+            glEnable(GL_PROGRAM_POINT_SIZE)
+            glEnable(GL_BLEND)
+            glBlendFunc(GL_SRC_ALPHA, GL_ONE)
+            glDepthMask(GL_FALSE)
+            glDrawArrays(GL_POINTS, 0, n)
+            glDepthMask(GL_TRUE)
+            glDisable(GL_BLEND)
+            glDisable(GL_PROGRAM_POINT_SIZE)
+        self.buffer.fence()
+
+    def destroy(self) -> None:
+
+        glDeleteVertexArrays(1, (self.vao,))
+        self.buffer.destroy()
@@ -0,0 +1,350 @@
+import ctypes
+import json
+import time
+
+import numpy as np
+
+class _Scope:
+    """ One named scope, reused for every frame so entering it allocates nothing. """
+
+    __slots__ = ("profiler", "index", "gpu", "start")
+
+    def __init__(self, profiler: "Profiler", index: int, gpu: bool):
+
+        self.profiler = profiler
+        self.index = index
+        self.gpu = gpu
+        self.start = 0
+
+    def __enter__(self) -> None:
+        if self.gpu:
+            self.profiler._begin_gpu(self.index)
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc) -> None:
+        end = time.perf_counter_ns()
+        profiler = self.profiler
+        row = profiler.frame % profiler.capacity
+        profiler.cpu_start[row, self.index] = self.start
+        profiler.cpu_ns[row, self.index] += end - self.start
+        if self.gpu:
+            profiler._end_gpu()
+
+class Profiler:
+    """
+        Per-frame profiler with named scopes.
+
+        CPU time comes from perf_counter_ns. Scopes opened with gpu=True also
+        wrap their GL commands in a GL_TIME_ELAPSED query. Queries are double
+        buffered and read a frame later, only once their result is available,
+        so profiling never stalls the pipeline. Samples go into fixed-size
+        ring buffers holding the last capacity frames.
+    """
+
+    enabled = True
+
+    def __init__(self, capacity: int = 512, max_scopes: int = 32):
+        """
+            Parameters:
+
+                capacity: number of frames kept in the ring buffers
+
+                max_scopes: number of distinct scope names
+        """
+
+        self.capacity = capacity
+        self.max_scopes = max_scopes
+        self.frame = 0
+
+        self.names: list[str] = []
+        self._scopes: dict[str, _Scope] = {}
+
+        #nanoseconds, -1 for GPU samples that were not available or not measured
+        self.frame_start = np.zeros(capacity, dtype=np.int64)
+        self.frame_ns = np.zeros(capacity, dtype=np.int64)
+        self.cpu_start = np.zeros((capacity, max_scopes), dtype=np.int64)
+        self.cpu_ns = np.zeros((capacity, max_scopes), dtype=np.int64)
+        self.gpu_ns = np.full((capacity, max_scopes), -1, dtype=np.int64)
+
+        self._queries = None
+        self._issued = np.zeros((2, max_scopes), dtype=bool)
+        self._gpu_active = False
+        #the PyOpenGL wrapper has no array type for 64-bit query results,
+        #so they are read through the raw entry point into this buffer
+        self._available = np.zeros(1, dtype=np.int32)
+        self._result = np.zeros(1, dtype=np.uint64)
+        self._result_pointer = self._result.ctypes.data_as(ctypes.POINTER(ctypes.c_uint64))
+
+    def scope(self, name: str, gpu: bool = False) -> _Scope:
+        """ Context manager timing the code inside it under name. """
+
+        scope = self._scopes.get(name)
+        if scope is None:
+            if len(self.names) == self.max_scopes:
+                raise IndexError(f"more than {self.max_scopes} profiler scopes")
+            scope = _Scope(self, len(self.names), gpu)
+            self.names.append(name)
+            self._scopes[name] = scope
+        return scope
+
+    def begin_frame(self) -> None:
+
+        row = self.frame % self.capacity
+        self.cpu_start[row] = 0
+        self.cpu_ns[row] = 0
+        self.gpu_ns[row] = -1
+        self.frame_start[row] = time.perf_counter_ns()
+
+    def end_frame(self) -> None:
+
+        row = self.frame % self.capacity
+        self.frame_ns[row] = time.perf_counter_ns() - self.frame_start[row]
+        if self._queries is not None:
+            self._collect_gpu()
+        self.frame += 1
+
+    def _begin_gpu(self, index: int) -> None:
+        from OpenGL.GL import GL_TIME_ELAPSED, glBeginQuery, glGenQueries
+
+        if self._gpu_active:
+            raise RuntimeError("GL_TIME_ELAPSED scopes cannot be nested")
+        if self._queries is None:
+            self._queries = np.asarray(glGenQueries(2 * self.max_scopes), dtype=np.uint32).reshape(2, self.max_scopes)
+
+        parity = self.frame & 1
+        glBeginQuery(GL_TIME_ELAPSED, int(self._queries[parity, index]))
+        self._issued[parity, index] = True
+        self._gpu_active = True
+
+    def _end_gpu(self) -> None:
+        from OpenGL.GL import GL_TIME_ELAPSED, glEndQuery
+
+        glEndQuery(GL_TIME_ELAPSED)
+        self._gpu_active = False
+
+    def _collect_gpu(self) -> None:
+        from OpenGL.GL import GL_QUERY_RESULT, GL_QUERY_RESULT_AVAILABLE, glGetQueryObjectiv
+        from OpenGL.raw.GL.VERSION.GL_3_3 import glGetQueryObjectui64v
+
+        #the other parity holds the previous frame's queries
+        parity = (self.frame - 1) & 1
+        if self.frame == 0:
+            return
+        row = (self.frame - 1) % self.capacity
+        for index in np.flatnonzero(self._issued[parity]):
+            query = int(self._queries[parity, index])
+            glGetQueryObjectiv(query, GL_QUERY_RESULT_AVAILABLE, self._available)
+            if self._available[0]:
+                glGetQueryObjectui64v(query, GL_QUERY_RESULT, self._result_pointer)
+                self.gpu_ns[row, index] = self._result[0]
+            self._issued[parity, index] = False
+
+    def _recorded_rows(self) -> np.ndarray:
+        count = min(self.frame, self.capacity)
+        first = self.frame - count
+        return np.arange(first, self.frame) % self.capacity
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """ Mean CPU and GPU milliseconds per scope over the recorded frames. """
+
+        rows = self._recorded_rows()
+        result = {"frame": {"cpu_ms": float(self.frame_ns[rows].mean() / 1e6) if len(rows) else 0.0}}
+        for index, name in enumerate(self.names):
+            entry = {"cpu_ms": float(self.cpu_ns[rows, index].mean() / 1e6) if len(rows) else 0.0}
+            gpu = self.gpu_ns[rows, index]
+            gpu = gpu[gpu >= 0]
+            if len(gpu):
+                entry["gpu_ms"] = float(gpu.mean() / 1e6)
+            result[name] = entry
+        return result
+
+    def export_json(self, path: str) -> None:
+        """ Write one record per recorded frame with every scope's CPU/GPU milliseconds. """
+
+        frames = []
+        for row in self._recorded_rows():
+            record = {"frame_ms": self.frame_ns[row] / 1e6, "scopes": {}}
+            for index, name in enumerate(self.names):
+                record["scopes"][name] = {"cpu_ms": self.cpu_ns[row, index] / 1e6}
+                if self.gpu_ns[row, index] >= 0:
+                    record["scopes"][name]["gpu_ms"] = self.gpu_ns[row, index] / 1e6
+            frames.append(record)
+
+        with open(path, 'w') as f:
+            json.dump({"scopes": self.names, "frames": frames}, f, indent=1)
+
+    def export_chrome_trace(self, path: str) -> None:
+        """
+            Write the recorded frames as a Chrome trace, for chrome://tracing or Perfetto.
+
+            CPU scopes go on thread 0. GL_TIME_ELAPSED has no timestamp, so GPU
+            durations go on thread 1 starting where their CPU scope started.
+        """
+
+        rows = self._recorded_rows()
+        origin = int(self.frame_start[rows[0]]) if len(rows) else 0
+        events = []
+        for row in rows:
+            events.append({"name": "frame", "ph": "X", "pid": 0, "tid": 0,
+                           "ts": (int(self.frame_start[row]) - origin) / 1000, "dur": self.frame_ns[row] / 1000})
+            for index, name in enumerate(self.names):
+                if self.cpu_start[row, index] == 0:
+                    continue
+                ts = (int(self.cpu_start[row, index]) - origin) / 1000
+                events.append({"name": name, "ph": "X", "pid": 0, "tid": 0,
+                               "ts": ts, "dur": self.cpu_ns[row, index] / 1000})
+                if self.gpu_ns[row, index] >= 0:
+                    events.append({"name": name, "ph": "X", "pid": 0, "tid": 1,
+                                   "ts": ts, "dur": self.gpu_ns[row, index] / 1000})
+
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+class _NullScope:
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+class NullProfiler:
+    """
+        Drop-in Profiler that records nothing, for when profiling is switched off.
+
+        A disabled scope is not free: the scope() call and the empty with
+        block cost ~0.2-0.5 us, a few us for the ten or so phase scopes the
+        apps open per frame. Code running per draw or per entity should not
+        open scopes at all, or test profiler.enabled first and skip them,
+        which costs ~0.01 us when off (bench_profiler.py).
+    """
+
+    enabled = False
+    _scope = _NullScope()
+
+    def scope(self, name: str, gpu: bool = False) -> _NullScope:
+        return self._scope
+
+    def begin_frame(self) -> None:
+        pass
+
+    def end_frame(self) -> None:
+        pass
+
+class StartupTimeline:
+    """
+        Wall-clock marks from the start of the app's module to its first frame.
+
+        Each mark closes a stage, e.g. import, context, mesh, shader, first frame,
+        and a stage's time is the time since the mark before it. The start is
+        taken by the app module ahead of its own imports, so imports are counted
+        but interpreter startup is not.
+    """
+
+    def __init__(self, start_ns: int | None = None):
+
+        self.start_ns = time.perf_counter_ns() if start_ns is None else start_ns
+        self.marks: list[tuple[str, int]] = []
+
+    def mark(self, stage: str, at_ns: int | None = None) -> None:
+        """ End a stage now, or at at_ns for a stage timed before the timeline existed. """
+
+        self.marks.append((stage, time.perf_counter_ns() if at_ns is None else at_ns))
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """ Milliseconds spent in each stage and since the start when it ended. """
+
+        result = {}
+        last = self.start_ns
+        for stage, at in self.marks:
+            result[stage] = {"ms": (at - last) / 1e6, "at_ms": (at - self.start_ns) / 1e6}
+            last = at
+        return result
+
+    def report(self) -> str:
+
+        lines = [f"{'stage':>12} {'ms':>8} {'at ms':>8}"]
+        for stage, entry in self.summary().items():
+            lines.append(f"{stage:>12} {entry['ms']:>8.1f} {entry['at_ms']:>8.1f}")
+        return "\n".join(lines)
+
+class ProfilerOverlay:
+    """ Draws the profiler summary in a corner of the window, refreshed every few frames. """
+
+    def __init__(self, profiler: Profiler, width: int, height: int, refresh_frames: int = 30):
+
+        import pygame as pg
+        from OpenGL.GL import glGenTextures, glGenVertexArrays, glGetUniformLocation
+
+        from shader_cache import shader_cache
+
+        pg.font.init()
+        self.font = pg.font.SysFont("monospace", 14)
+        self.profiler = profiler
+        self.width = width
+        self.height = height
+        self.refresh_frames = refresh_frames
+
+        self.shader = shader_cache.load("shaders/overlay_vertex.txt", "shaders/overlay_fragment.txt")
+        self.rectLocation = glGetUniformLocation(self.shader, "rect")
+        self.texture = glGenTextures(1)
+        #the quad corners come from gl_VertexID, the VAO only has to exist
+        self.vao = glGenVertexArrays(1)
+        self.rect = (0, 0, 0, 0)
+
+    def _refresh(self) -> None:
+        import pygame as pg
+        from OpenGL.GL import (
+            GL_LINEAR, GL_RGBA, GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_TEXTURE_MIN_FILTER,
+            GL_UNSIGNED_BYTE, glBindTexture, glTexImage2D, glTexParameteri
+        )
+
+        lines = [f"{'scope':<12}{'cpu ms':>8}{'gpu ms':>8}"]
+        for name, entry in self.profiler.summary().items():
+            gpu = f"{entry['gpu_ms']:8.3f}" if "gpu_ms" in entry else f"{'':8}"
+            lines.append(f"{name:<12}{entry['cpu_ms']:8.3f}{gpu}")
+
+        rendered = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+        surface = pg.Surface((max(r.get_width() for r in rendered) + 8,
+                              sum(r.get_height() for r in rendered) + 8), pg.SRCALPHA)
+        surface.fill((0, 0, 0, 160))
+        y = 4
+        for r in rendered:
+            surface.blit(r, (4, y))
+            y += r.get_height()
+
+        w, h = surface.get_size()
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, w, h, 0, GL_RGBA, GL_UNSIGNED_BYTE, pg.image.tobytes(surface, "RGBA", True))
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+
+        #top left corner, in normalized device coordinates
+        self.rect = (-1.0, 1.0 - 2 * h / self.height, 2 * w / self.width, 2 * h / self.height)
+
+    def draw(self) -> None:
+        from OpenGL.GL import (
+            GL_BLEND, GL_ONE_MINUS_SRC_ALPHA, GL_SRC_ALPHA, GL_TEXTURE_2D, GL_TRIANGLE_STRIP,
+            glBindTexture, glBindVertexArray, glBlendFunc, glDisable, glDrawArrays, glEnable,
+            glUniform4f, glUseProgram
+        )
+
+        if self.profiler.frame % self.refresh_frames == 0:
+            self._refresh()
+
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glUseProgram(self.shader)
+        glUniform4f(self.rectLocation, *self.rect)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glBindVertexArray(self.vao)
+        glDrawArrays(GL_TRIANGLE_STRIP, 0, 4)
+        glDisable(GL_BLEND)
+
+    def destroy(self) -> None:
+        from OpenGL.GL import glDeleteTextures, glDeleteVertexArrays
+
+        glDeleteTextures(1, (self.texture,))
+        glDeleteVertexArrays(1, (self.vao,))
@@ -1,7 +1,10 @@
-import json
+from scene_io import iter_entities, read_metadata
 
-file = open('dump.json',)
-data = json.load(file)
+data = read_metadata('dump.json')
 
 for i in data:
-    print(i)
\ No newline at end of file
+    print(i)
+
+#entities are yielded one by one while the file is parsed
+for entity in iter_entities('dump.json'):
+    print(entity)
\ No newline at end of file
@@ -0,0 +1,197 @@
+from OpenGL.GL import *
+import numpy as np
+
+from gl_dispatch import gl
+from gl_state import GLStateCache
+
+#bytes per index, for turning an item's first index into a byte offset
+INDEX_SIZES = {GL_UNSIGNED_BYTE: 1, GL_UNSIGNED_SHORT: 2, GL_UNSIGNED_INT: 4}
+
+#sort key layout, most significant first: program | vao | material | depth, 16 bits each
+KEY_BITS = 16
+KEY_MASK = (1 << KEY_BITS) - 1
+PROGRAM_SHIFT = 48
+VAO_SHIFT = 32
+MATERIAL_SHIFT = 16
+
+def pack_sort_keys(programs: np.ndarray, vaos: np.ndarray, materials: np.ndarray, depths: np.ndarray) -> np.ndarray:
+    """
+        Pack draw state into 64-bit sort keys.
+
+        Parameters:
+
+            programs, vaos, materials: (N,) integer handles/ids, each below 2^16
+
+            depths: (N,) floats in [0, 1], quantized to 16 bits, 0 sorts first
+
+        Returns:
+
+            (N,) uint64 keys, sorting them groups draws by program, then vao,
+            then material, and front to back within a group
+    """
+
+    programs = np.asarray(programs, dtype=np.uint64)
+    vaos = np.asarray(vaos, dtype=np.uint64)
+    materials = np.asarray(materials, dtype=np.uint64)
+    if max(programs.max(initial=0), vaos.max(initial=0), materials.max(initial=0)) > KEY_MASK:
+        raise ValueError(f"program, vao and material ids must fit in {KEY_BITS} bits")
+
+    depths = np.clip(np.asarray(depths, dtype=np.float32), 0.0, 1.0)
+    quantized = (depths * KEY_MASK).astype(np.uint64)
+
+    keys = programs << np.uint64(PROGRAM_SHIFT)
+    keys |= vaos << np.uint64(VAO_SHIFT)
+    keys |= materials << np.uint64(MATERIAL_SHIFT)
+    keys |= quantized
+    return keys
+
+def radix_argsort(keys: np.ndarray) -> np.ndarray:
+    """
+        Stable LSD radix sort of uint64 keys, returning the sorting permutation.
+
+        Each pass sorts one 16-bit digit with NumPy's stable argsort, which is
+        itself a radix sort for 16-bit integers. Digits that are the same for
+        every key, e.g. an unused material field, are skipped.
+    """
+
+    order = np.arange(len(keys))
+    if len(keys) < 2:
+        return order
+
+    for shift in range(0, 64, KEY_BITS):
+        digits = ((keys[order] >> np.uint64(shift)) & np.uint64(KEY_MASK)).astype(np.uint16)
+        if digits.min() == digits.max():
+            continue
+        order = order[np.argsort(digits, kind="stable")]
+
+    return order
+
+class RenderQueue:
+    """
+        Draws collected during a frame, sorted by state and executed through a GLStateCache.
+
+        Items hold the program, vao, material, first vertex, vertex count and an
+        optional UniformArena record that is bound before the draw. Items with a
+        base vertex are indexed draws, e.g. meshes of a MeshArena: first and
+        count are then in indices and glDrawElementsBaseVertex is used.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+            Parameters:
+
+                capacity: number of items before the arrays grow
+        """
+
+        self.count = 0
+        self._allocate(capacity)
+        self.order = np.zeros(0, dtype=np.intp)
+
+    def _allocate(self, capacity: int) -> None:
+        self.capacity = capacity
+        fields = ("keys", "programs", "vaos", "materials", "firsts", "counts", "records",
+                  "base_vertices", "index_types")
+        previous = {name: getattr(self, name, None) for name in fields}
+
+        self.keys = np.zeros(capacity, dtype=np.uint64)
+        self.programs = np.zeros(capacity, dtype=np.int64)
+        self.vaos = np.zeros(capacity, dtype=np.int64)
+        self.materials = np.zeros(capacity, dtype=np.int64)
+        self.firsts = np.zeros(capacity, dtype=np.int64)
+        self.counts = np.zeros(capacity, dtype=np.int64)
+        self.records = np.full(capacity, -1, dtype=np.int64)
+        self.base_vertices = np.full(capacity, -1, dtype=np.int64)
+        self.index_types = np.zeros(capacity, dtype=np.int64)
+
+        for name, old in previous.items():
+            if old is not None:
+                getattr(self, name)[:self.count] = old[:self.count]
+
+    def clear(self) -> None:
+
+        self.count = 0
+        self.order = self.order[:0]
+
+    def submit(self, program: int, vao: int, first: int, count: int,
+               material: int = 0, depth: float = 0.0, record: int = -1,
+               base_vertex: int = -1, index_type: int = 0) -> None:
+        """ Queue one draw of count vertices, or indices when base_vertex is set, starting at first. """
+
+        self.submit_many(np.array([program]), np.array([vao]), np.array([first]), np.array([count]),
+                         np.array([material]), np.array([depth]), np.array([record]),
+                         np.array([base_vertex]), np.array([index_type]))
+
+    def submit_many(self, programs: np.ndarray, vaos: np.ndarray, firsts: np.ndarray, counts: np.ndarray,
+                    materials: np.ndarray | int = 0, depths: np.ndarray | float = 0.0,
+                    records: np.ndarray | int = -1, base_vertices: np.ndarray | int = -1,
+                    index_types: np.ndarray | int = 0) -> None:
+        """
+            Queue a batch of draws given as (N,) arrays, scalars broadcast.
+
+            base_vertices of -1 draw vertices first..first+count, others draw
+            indices first..first+count of the bound element buffer, of index_types.
+        """
+
+        n = np.broadcast(programs, vaos, firsts, counts, materials, depths, records, base_vertices).size
+        if self.count + n > self.capacity:
+            self._allocate(max(self.count + n, 2 * self.capacity))
+
+        items = slice(self.count, self.count + n)
+        self.programs[items] = programs
+        self.vaos[items] = vaos
+        self.materials[items] = materials
+        self.firsts[items] = firsts
+        self.counts[items] = counts
+        self.records[items] = records
+        self.base_vertices[items] = base_vertices
+        self.index_types[items] = index_types
+        self.keys[items] = pack_sort_keys(self.programs[items], self.vaos[items], self.materials[items],
+                                          np.broadcast_to(np.asarray(depths), (n,)))
+        self.count += n
+
+    def sort(self) -> np.ndarray:
+        """ Order the queued items by their keys, returns the item order. """
+
+        self.order = radix_argsort(self.keys[:self.count])
+        return self.order
+
+    def execute(self, state: GLStateCache, uniforms=None, bind_material=None, mode: int = GL_TRIANGLES) -> None:
+        """
+            Issue the draws in sorted order.
+
+            Parameters:
+
+                state: skips program, vao and material binds that are already current
+
+                uniforms: UniformArena whose record is bound for items that have one
+
+                bind_material: called with the material id whenever it changes
+        """
+
+        if len(self.order) != self.count:
+            self.sort()
+
+        #plain Python ints, indexing NumPy arrays per draw is the slow part of the loop
+        order = self.order
+        programs = self.programs[order].tolist()
+        vaos = self.vaos[order].tolist()
+        materials = self.materials[order].tolist()
+        firsts = self.firsts[order].tolist()
+        counts = self.counts[order].tolist()
+        records = self.records[order].tolist()
+        base_vertices = self.base_vertices[order].tolist()
+        index_types = self.index_types[order].tolist()
+        draw_arrays = gl.glDrawArrays
+        draw_elements = gl.glDrawElementsBaseVertex
+
+        for program, vao, material, first, count, record, base_vertex, index_type in zip(
+                programs, vaos, materials, firsts, counts, records, base_vertices, index_types):
+            state.use_program(program)
+            state.bind_vertex_array(vao)
+            state.set_material(material, bind_material)
+            if record >= 0:
+                uniforms.bind(record)
+            if base_vertex < 0:
+                draw_arrays(mode, first, count)
+            else:
+                draw_elements(mode, count, index_type, first * INDEX_SIZES[index_type], base_vertex)
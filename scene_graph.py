@@ -0,0 +1,154 @@
+import numpy as np
+
+from entity_array import EntityArray, model_transforms
+
+class SceneGraph:
+    """
+        Parent/child hierarchy over an EntityArray with cached matrices.
+
+        Each node's local matrix comes from its position and eulers, its world
+        matrix is local * parent world. Both are cached. Changing a node marks
+        it dirty, and update() recomputes only dirty nodes and the subtrees
+        under them, one depth level at a time. World matrices live in one
+        contiguous (N,4,4) float32 array, ready for InstancedRenderer.draw.
+
+        Parents are always added before their children, so node indices are
+        already in a valid update order.
+    """
+
+    def __init__(self, capacity: int, order: str = "xy"):
+        """
+            Parameters:
+
+                capacity: maximum number of nodes
+
+                order: rotation order of the local transforms, as in EntityArray
+        """
+
+        self.capacity = capacity
+        self.order = order
+        self.nodes = EntityArray(capacity)
+
+        self.parents = np.full(capacity, -1, dtype=np.int32)
+        self.depths = np.zeros(capacity, dtype=np.int32)
+        self.local = np.zeros((capacity, 4, 4), dtype=np.float32)
+        self.world = np.zeros((capacity, 4, 4), dtype=np.float32)
+        self.local[:] = np.identity(4, dtype=np.float32)
+        self.world[:] = np.identity(4, dtype=np.float32)
+
+        self.local_dirty = np.zeros(capacity, dtype=bool)
+        self._world_dirty = np.zeros(capacity, dtype=bool)
+
+        #children in CSR form, rebuilt lazily when nodes are added
+        self._child_start = None
+        self._children = None
+
+    @property
+    def count(self) -> int:
+        return self.nodes.count
+
+    def add(self, position: list[float], eulers: list[float], parent: int = -1) -> int:
+        """ Add a node under parent (-1 for a root) and return its index. """
+
+        if parent >= self.count:
+            raise IndexError(f"parent {parent} does not exist yet")
+
+        index = self.nodes.add(position, eulers)
+        self.parents[index] = parent
+        self.depths[index] = 0 if parent < 0 else self.depths[parent] + 1
+        self.local_dirty[index] = True
+        self._child_start = None
+
+        return index
+
+    def set_position(self, index: int, position: list[float]) -> None:
+
+        self.nodes.positions[index] = position
+        self.local_dirty[index] = True
+
+    def set_eulers(self, index: int, eulers: list[float]) -> None:
+
+        self.nodes.eulers[index] = eulers
+        self.local_dirty[index] = True
+
+    def mark_dirty(self, indices: np.ndarray) -> None:
+        """ Flag nodes whose positions/eulers were written directly through self.nodes. """
+
+        self.local_dirty[indices] = True
+
+    def _build_children(self) -> None:
+        n = self.count
+        parents = self.parents[:n]
+        has_parent = np.flatnonzero(parents >= 0)
+        #stable sort keeps children in index order under each parent
+        self._children = has_parent[np.argsort(parents[has_parent], kind="stable")].astype(np.int32)
+        counts = np.bincount(parents[has_parent], minlength=n)
+        self._child_start = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=self._child_start[1:])
+
+    def _descendants(self, nodes: np.ndarray) -> np.ndarray:
+        """ All nodes below the given ones, found level by level through the CSR children. """
+
+        found = []
+        frontier = nodes
+        while len(frontier):
+            starts = self._child_start[frontier]
+            counts = self._child_start[frontier + 1] - starts
+            total = int(counts.sum())
+            if total == 0:
+                break
+            #flat index of every child of every frontier node, without a Python loop
+            offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+            frontier = self._children[offsets]
+            found.append(frontier)
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int32)
+
+    def update(self) -> np.ndarray:
+        """
+            Recompute the matrices of dirty nodes and everything under them.
+
+            Returns:
+
+                the indices whose world matrix changed, sorted by depth
+        """
+
+        n = self.count
+        if self._child_start is None:
+            self._build_children()
+
+        changed_local = np.flatnonzero(self.local_dirty[:n])
+        if len(changed_local) == 0:
+            return changed_local
+
+        positions = self.nodes.positions[changed_local]
+        eulers = self.nodes.eulers[changed_local]
+        self.local[changed_local] = model_transforms(positions, eulers, self.order)
+        self.local_dirty[changed_local] = False
+
+        #a node's world changes when it or any ancestor changed, deduplicated with a mask
+        world_dirty = self._world_dirty
+        world_dirty[changed_local] = True
+        world_dirty[self._descendants(changed_local)] = True
+        changed = np.flatnonzero(world_dirty[:n])
+        world_dirty[changed] = False
+
+        changed = changed[np.argsort(self.depths[changed], kind="stable")]
+        depths = self.depths[changed]
+        bounds = np.flatnonzero(np.diff(depths)) + 1
+        for level in np.split(changed, bounds):
+            parents = self.parents[level]
+            roots = parents < 0
+            if roots.all():
+                self.world[level] = self.local[level]
+            else:
+                #row vectors: the child's local transform is applied before its parent's world
+                self.world[level] = np.matmul(self.local[level], self.world[np.maximum(parents, 0)])
+                self.world[level[roots]] = self.local[level[roots]]
+
+        return changed
+
+    def update_all(self) -> None:
+        """ Recompute every node, the baseline the dirty flags are measured against. """
+
+        self.local_dirty[:self.count] = True
+        self.update()
@@ -0,0 +1,239 @@
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+from entity_array import EntityArray
+
+SCENE_VERSION = 1
+#entities formatted and written per chunk, the document is never built whole
+WRITE_CHUNK = 4096
+READ_CHUNK = 1 << 16
+
+#%.9g round-trips every float32 exactly, and is shorter than repr of the float64
+ENTITY_FORMAT = '{"position":[%.9g,%.9g,%.9g],"eulers":[%.9g,%.9g,%.9g]}'
+
+#one record per entity in binary snapshots, np.load reads them directly
+SNAPSHOT = np.dtype([
+    ("position", np.float32, (3,)),
+    ("eulers", np.float32, (3,)),
+])
+
+_ENTITIES_KEY = re.compile(r'"entities"\s*:\s*\[')
+_decoder = json.JSONDecoder()
+
+def write_scene(path: str, entities: EntityArray, chunk: int = WRITE_CHUNK, **metadata) -> None:
+    """
+        Write the entities as a JSON document, chunk entities at a time.
+
+        The document is {"version", "count", <metadata>..., "entities": [...]},
+        with metadata before the entities so readers see it before streaming.
+    """
+
+    n = entities.count
+    _write_json(path, entities.positions[:n], entities.eulers[:n], chunk, metadata)
+
+def _write_json(path: str, positions: np.ndarray, eulers: np.ndarray, chunk: int, metadata: dict) -> None:
+    n = len(positions)
+    header = {"version": SCENE_VERSION, "count": n, **metadata}
+
+    #write then rename, so a crash never leaves half a scene behind
+    temporary = path + ".tmp"
+    with open(temporary, 'w') as f:
+        f.write(json.dumps(header)[:-1])
+        f.write(', "entities": [')
+        for start in range(0, n, chunk):
+            stop = min(start + chunk, n)
+            rows = np.concatenate([positions[start:stop], eulers[start:stop]], axis=1)
+            if start:
+                f.write(",\n")
+            f.write(",\n".join(ENTITY_FORMAT % tuple(row) for row in rows.tolist()))
+        f.write("]}\n")
+    os.replace(temporary, path)
+
+def iter_entities(path: str, chunk: int = READ_CHUNK):
+    """
+        Stream the entities of a scene document, yielding each entity dict as soon as it is parsed.
+
+        Only a chunk of the file and the entity being decoded are held in memory.
+    """
+
+    with open(path, 'r') as f:
+        buffer = ""
+        eof = False
+
+        #find the start of the entities array
+        while True:
+            match = _ENTITIES_KEY.search(buffer)
+            if match:
+                buffer = buffer[match.end():]
+                break
+            if eof:
+                raise ValueError(f"{path} has no entities array")
+            data = f.read(chunk)
+            eof = not data
+            #keep a tail, the key may be split across chunks
+            buffer = buffer[-32:] + data
+
+        position = 0
+        while True:
+            #skip separators
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                entity, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                #the entity continues in the next chunk
+                data = f.read(chunk)
+                eof = not data
+                buffer = buffer[position:] + data
+                position = 0
+                continue
+            yield entity
+            position = end
+
+def read_metadata(path: str, chunk: int = READ_CHUNK) -> dict:
+    """ The top-level values written before the entities array, e.g. version and count. """
+
+    with open(path, 'r') as f:
+        head = ""
+        while True:
+            data = f.read(chunk)
+            head += data
+            match = _ENTITIES_KEY.search(head)
+            if match or not data:
+                break
+    if match is None:
+        return json.loads(head)
+    #close the object right before the entities key
+    return json.loads(head[:match.start()].rstrip().rstrip(",") + "}")
+
+def read_scene(path: str) -> EntityArray:
+    """ Stream a scene document into a new EntityArray. """
+
+    count = read_metadata(path).get("count")
+    if count is None:
+        #written by something else, no count up front
+        count = sum(1 for _ in iter_entities(path))
+
+    entities = EntityArray(max(count, 1))
+    for entity in iter_entities(path):
+        entities.add(entity["position"], entity["eulers"])
+    return entities
+
+def save_snapshot(path: str, entities: EntityArray) -> None:
+    """ Write the entity arrays as a .npy file of SNAPSHOT records. """
+
+    _save_records(path, _entity_records(entities))
+
+def _entity_records(entities: EntityArray) -> np.ndarray:
+    records = np.empty(entities.count, dtype=SNAPSHOT)
+    records["position"] = entities.positions[:entities.count]
+    records["eulers"] = entities.eulers[:entities.count]
+    return records
+
+def _save_records(path: str, records: np.ndarray) -> None:
+    temporary = path + ".tmp"
+    with open(temporary, 'wb') as f:
+        np.save(f, records)
+    os.replace(temporary, path)
+
+def load_snapshot(path: str) -> EntityArray:
+    """ Read a snapshot back, the records are memory-mapped and copied once into the arrays. """
+
+    records = np.load(path, mmap_mode='r')
+    if records.dtype != SNAPSHOT:
+        raise ValueError(f"{path} is not an entity snapshot")
+
+    entities = EntityArray(max(len(records), 1))
+    n = len(records)
+    entities.positions[:n] = records["position"]
+    entities.eulers[:n] = records["eulers"]
+    entities.previous_positions[:n] = records["position"]
+    entities.previous_eulers[:n] = records["eulers"]
+    entities.count = n
+    return entities
+
+class SceneSaver:
+    """
+        Saves scenes on a background thread so the frame loop keeps running.
+
+        save() copies the entity arrays, a memcpy, and returns. The worker
+        thread formats and writes the copy. A save requested while another
+        one is running replaces any save still waiting, only the latest
+        state is worth writing.
+    """
+
+    def __init__(self):
+
+        self._condition = threading.Condition()
+        self._pending = None
+        self._busy = False
+        self._closed = False
+        self.saved = 0
+        self.error = None
+
+        self._thread = threading.Thread(target=self._run, name="scene-saver", daemon=True)
+        self._thread.start()
+
+    def save(self, path: str, entities: EntityArray, **metadata) -> None:
+        """ Queue a save, .npy paths are written as snapshots and anything else as JSON. """
+
+        records = _entity_records(entities)
+
+        with self._condition:
+            self._pending = (path, records, metadata)
+            self._condition.notify_all()
+
+    @property
+    def busy(self) -> bool:
+
+        with self._condition:
+            return self._busy or self._pending is not None
+
+    def wait(self) -> None:
+        """ Block until every queued save is written. """
+
+        with self._condition:
+            while self._busy or self._pending is not None:
+                self._condition.wait()
+
+    def close(self) -> None:
+        """ Finish queued saves and stop the worker. """
+
+        self.wait()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                path, records, metadata = self._pending
+                self._pending = None
+                self._busy = True
+
+            try:
+                if path.endswith(".npy"):
+                    _save_records(path, records)
+                else:
+                    _write_json(path, records["position"], records["eulers"], WRITE_CHUNK, metadata)
+                self.saved += 1
+            except Exception as error:
+                #reported to the caller, the worker keeps serving saves
+                self.error = error
+
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
@@ -0,0 +1,213 @@
+import hashlib
+import os
+
+from OpenGL.GL import *
+from OpenGL.GL.shaders import ShaderLinkError, compileShader
+import numpy as np
+
+from uniform_buffers import bind_uniform_blocks
+
+CACHE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".shader_cache")
+
+class ShaderCache:
+    """
+        Caches linked shader programs in memory and on disk.
+
+        Programs are stored with glGetProgramBinary under a key made from both
+        sources, the GL vendor/renderer/version and the driver's binary
+        formats, and restored with glProgramBinary on the next start. Any
+        mismatch or a binary the driver rejects falls back to a full compile.
+
+        Every program it hands out has its uniform blocks bound to the shared
+        binding points in uniform_buffers.
+    """
+
+    def __init__(self, directory: str = CACHE_DIRECTORY):
+        """
+            Parameters:
+
+                directory: where program binaries are stored, created on first write
+        """
+
+        self.directory = directory
+        self.programs: dict[str, int] = {}
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.compiles = 0
+
+    def load(self, vertexFilepath: str, fragmentFilepath: str) -> int:
+        """
+            Get a linked program for the pair of shader files.
+
+            Returns:
+
+                An integer, being a handle to the shader location on the graphics card.
+                Repeated calls for the same sources return the same handle.
+        """
+
+        with open(vertexFilepath,'r') as f:
+            vertex_src = f.read()
+
+        with open(fragmentFilepath,'r') as f:
+            fragment_src = f.read()
+
+        return self.load_source(vertex_src, fragment_src)
+
+    def load_source(self, vertex_src: str, fragment_src: str) -> int:
+
+        program = self.lookup(vertex_src, fragment_src)
+        if program is None:
+            program = self.compile(vertex_src, fragment_src, retrievable=self.binaries_supported())
+            self.compiles += 1
+            self.store(vertex_src, fragment_src, program)
+
+        return program
+
+    def lookup(self, vertex_src: str, fragment_src: str) -> int | None:
+        """ Find an already linked program in memory or on disk, None when it must be compiled. """
+
+        source_key = self.source_key(vertex_src, fragment_src)
+        program = self.programs.get(source_key)
+        if program is not None and glIsProgram(program):
+            self.hits += 1
+            return program
+
+        formats = self._binary_formats()
+        if not formats:
+            return None
+
+        program = self._load_binary(self._binary_path(source_key, formats), formats)
+        if program is not None:
+            self.disk_hits += 1
+            #block bindings are not part of the binary, they reset like after a fresh link
+            bind_uniform_blocks(program)
+            self.programs[source_key] = program
+
+        return program
+
+    def store(self, vertex_src: str, fragment_src: str, program: int) -> None:
+        """ Remember a linked program, and write its binary when the driver can give one back. """
+
+        source_key = self.source_key(vertex_src, fragment_src)
+        bind_uniform_blocks(program)
+        self.programs[source_key] = program
+
+        formats = self._binary_formats()
+        if formats:
+            self._store_binary(self._binary_path(source_key, formats), program)
+
+    def binaries_supported(self) -> bool:
+
+        return bool(self._binary_formats())
+
+    def compile(self, vertex_src: str, fragment_src: str, retrievable: bool = False) -> int:
+        """ Compile and link without touching the cache. """
+
+        vertex_shader = compileShader(vertex_src, GL_VERTEX_SHADER)
+        fragment_shader = compileShader(fragment_src, GL_FRAGMENT_SHADER)
+
+        program = glCreateProgram()
+        glAttachShader(program, vertex_shader)
+        glAttachShader(program, fragment_shader)
+        if retrievable:
+            glProgramParameteri(program, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
+        glLinkProgram(program)
+
+        glDetachShader(program, vertex_shader)
+        glDetachShader(program, fragment_shader)
+        glDeleteShader(vertex_shader)
+        glDeleteShader(fragment_shader)
+
+        if glGetProgramiv(program, GL_LINK_STATUS) != GL_TRUE:
+            log = glGetProgramInfoLog(program)
+            glDeleteProgram(program)
+            raise ShaderLinkError(log)
+
+        return program
+
+    def delete_program(self, program: int) -> None:
+        """ Delete a program and forget it, so later loads do not return a dead handle. """
+
+        for key, cached in list(self.programs.items()):
+            if cached == program:
+                del self.programs[key]
+        glDeleteProgram(program)
+
+    def clear_memory(self) -> None:
+        """ Forget in-memory handles, e.g. after the context that owned them was destroyed. """
+
+        self.programs.clear()
+
+    @staticmethod
+    def source_key(vertex_src: str, fragment_src: str) -> str:
+        """ The hash a program is cached under, of both sources. """
+
+        digest = hashlib.sha256()
+        digest.update(vertex_src.encode())
+        digest.update(b"\0")
+        digest.update(fragment_src.encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _binary_formats() -> tuple[int, ...]:
+        count = int(glGetIntegerv(GL_NUM_PROGRAM_BINARY_FORMATS))
+        if count == 0:
+            return ()
+        return tuple(int(f) for f in np.atleast_1d(glGetIntegerv(GL_PROGRAM_BINARY_FORMATS)))
+
+    def _binary_path(self, source_key: str, formats: tuple[int, ...]) -> str:
+        return os.path.join(self.directory, self._binary_key(source_key, formats) + ".bin")
+
+    @staticmethod
+    def _binary_key(source_key: str, formats: tuple[int, ...]) -> str:
+        digest = hashlib.sha256(source_key.encode())
+        for name in (GL_VENDOR, GL_RENDERER, GL_VERSION):
+            digest.update(glGetString(name) or b"")
+            digest.update(b"\0")
+        digest.update(repr(formats).encode())
+        return digest.hexdigest()
+
+    def _load_binary(self, path: str, formats: tuple[int, ...]) -> int | None:
+        try:
+            with open(path, 'rb') as f:
+                data = np.frombuffer(f.read(), dtype=np.uint8)
+        except FileNotFoundError:
+            return None
+
+        #first 4 bytes are the binary format, the rest is the program binary
+        if len(data) <= 4:
+            return None
+        binary_format = int(data[:4].view(np.uint32)[0])
+        if binary_format not in formats:
+            return None
+
+        program = glCreateProgram()
+        glProgramBinary(program, binary_format, data[4:], len(data) - 4)
+        if glGetProgramiv(program, GL_LINK_STATUS) != GL_TRUE:
+            #driver update or corrupt file, drop it and recompile
+            glDeleteProgram(program)
+            os.remove(path)
+            return None
+
+        return program
+
+    def _store_binary(self, path: str, program: int) -> None:
+        length = int(glGetProgramiv(program, GL_PROGRAM_BINARY_LENGTH))
+        if length == 0:
+            return
+
+        written = np.zeros(1, dtype=np.int32)
+        binary_format = np.zeros(1, dtype=np.uint32)
+        binary = np.empty(length, dtype=np.uint8)
+        glGetProgramBinary(program, length, written, binary_format, binary)
+
+        os.makedirs(self.directory, exist_ok=True)
+        #write then rename, so a crash never leaves half a binary behind
+        temporary = path + ".tmp"
+        with open(temporary, 'wb') as f:
+            f.write(binary_format.tobytes())
+            f.write(binary[:int(written[0])].tobytes())
+        os.replace(temporary, path)
+
+shader_cache = ShaderCache()
@@ -0,0 +1,198 @@
+from OpenGL.GL import *
+from OpenGL.GL.KHR.parallel_shader_compile import GL_COMPLETION_STATUS_KHR, glMaxShaderCompilerThreadsKHR
+from OpenGL.GL.shaders import ShaderCompilationError, ShaderLinkError
+import numpy as np
+
+from gl_context import OffscreenTarget, has_extension
+from shader_cache import ShaderCache, shader_cache
+
+#let the driver use as many compiler threads as it likes
+ALL_THREADS = 0xFFFFFFFF
+
+class PendingProgram:
+    """ A shader program that may still be compiling, resolved by ShaderScheduler.poll(). """
+
+    def __init__(self, vertex_src: str, fragment_src: str):
+
+        self.vertex_src = vertex_src
+        self.fragment_src = fragment_src
+        self.handle = 0
+        self.shaders: tuple[int, ...] = ()
+        self.ready = False
+        self.error: Exception | None = None
+
+        #fallback path: number of polls left before the status is queried
+        self.polls_left = 1
+
+    @property
+    def program(self) -> int:
+        """ The linked program handle, only once ready. """
+
+        if self.error is not None:
+            raise self.error
+        if not self.ready:
+            raise RuntimeError("shader program is still compiling")
+        return self.handle
+
+class ShaderScheduler:
+    """
+        Starts every shader compile and link at once and resolves them later.
+
+        With GL_KHR_parallel_shader_compile the driver compiles on its own
+        threads and GL_COMPLETION_STATUS_KHR says when a program is done,
+        without blocking. Otherwise status queries, the calls that force the
+        driver to finish, are deferred to a later poll() so a threaded driver
+        can overlap the work with rendering.
+    """
+
+    def __init__(self, cache: ShaderCache = shader_cache):
+
+        self.cache = cache
+        #keyed by ShaderCache.source_key, a source submitted again while compiling shares the entry
+        self.pending: dict[str, PendingProgram] = {}
+
+        #PyOpenGL does not know the result size of GL_COMPLETION_STATUS_KHR, so pass the output array
+        self._status = np.zeros(1, dtype=np.int32)
+
+        self.parallel = has_extension("GL_KHR_parallel_shader_compile")
+        if self.parallel:
+            glMaxShaderCompilerThreadsKHR(ALL_THREADS)
+
+    def submit(self, vertexFilepath: str, fragmentFilepath: str) -> PendingProgram:
+        """ Queue a program, issuing its compile and link right away. """
+
+        with open(vertexFilepath,'r') as f:
+            vertex_src = f.read()
+
+        with open(fragmentFilepath,'r') as f:
+            fragment_src = f.read()
+
+        return self.submit_source(vertex_src, fragment_src)
+
+    def submit_source(self, vertex_src: str, fragment_src: str) -> PendingProgram:
+        """
+            Queue a program from sources already in memory, e.g. read on a loader thread.
+
+            Sources that are still compiling return their existing PendingProgram.
+        """
+
+        source_key = self.cache.source_key(vertex_src, fragment_src)
+        pending = self.pending.get(source_key)
+        if pending is not None:
+            return pending
+
+        pending = PendingProgram(vertex_src, fragment_src)
+
+        cached = self.cache.lookup(vertex_src, fragment_src)
+        if cached is not None:
+            pending.handle = cached
+            pending.ready = True
+            return pending
+
+        shaders = []
+        for shader_type, source in ((GL_VERTEX_SHADER, vertex_src), (GL_FRAGMENT_SHADER, fragment_src)):
+            shader = glCreateShader(shader_type)
+            glShaderSource(shader, source)
+            glCompileShader(shader)
+            shaders.append(shader)
+
+        program = glCreateProgram()
+        for shader in shaders:
+            glAttachShader(program, shader)
+        if self.cache.binaries_supported():
+            glProgramParameteri(program, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
+        #no status queries here, any of them would wait for the compile to finish
+        glLinkProgram(program)
+
+        pending.handle = program
+        pending.shaders = tuple(shaders)
+        self.pending[source_key] = pending
+        return pending
+
+    def poll(self) -> bool:
+        """
+            Resolve the programs that have finished, never waiting on the rest.
+
+            Returns:
+
+                True once nothing is left compiling
+        """
+
+        still_pending = {}
+        for source_key, pending in self.pending.items():
+            if self._is_complete(pending):
+                self._finish(pending)
+            else:
+                still_pending[source_key] = pending
+        self.pending = still_pending
+
+        return not self.pending
+
+    def wait_all(self) -> None:
+        """ Resolve everything, blocking on whatever is still compiling. """
+
+        for pending in self.pending.values():
+            self._finish(pending)
+        self.pending = {}
+
+    def _is_complete(self, pending: PendingProgram) -> bool:
+        if self.parallel:
+            glGetProgramiv(pending.handle, GL_COMPLETION_STATUS_KHR, self._status)
+            return self._status[0] == GL_TRUE
+
+        pending.polls_left -= 1
+        return pending.polls_left < 0
+
+    def _finish(self, pending: PendingProgram) -> None:
+        program = pending.handle
+
+        if glGetProgramiv(program, GL_LINK_STATUS) != GL_TRUE:
+            for shader, shader_type in zip(pending.shaders, (GL_VERTEX_SHADER, GL_FRAGMENT_SHADER)):
+                if glGetShaderiv(shader, GL_COMPILE_STATUS) != GL_TRUE:
+                    pending.error = ShaderCompilationError(glGetShaderInfoLog(shader), shader_type)
+                    break
+            else:
+                pending.error = ShaderLinkError(glGetProgramInfoLog(program))
+            glDeleteProgram(program)
+            pending.handle = 0
+        else:
+            self.cache.store(pending.vertex_src, pending.fragment_src, program)
+
+        for shader in pending.shaders:
+            if pending.handle:
+                glDetachShader(program, shader)
+            glDeleteShader(shader)
+        pending.shaders = ()
+        pending.ready = True
+
+    def warm_up(self, programs: list[int]) -> None:
+        """
+            Draw once with each program into a small offscreen target.
+
+            Drivers finish some of the work, like state-dependent variants,
+            on the first draw, so doing it here keeps it out of the first
+            real frame. Framebuffer, viewport and program bindings are restored.
+        """
+
+        previous_draw_framebuffer = glGetIntegerv(GL_DRAW_FRAMEBUFFER_BINDING)
+        previous_read_framebuffer = glGetIntegerv(GL_READ_FRAMEBUFFER_BINDING)
+        previous_viewport = glGetIntegerv(GL_VIEWPORT)
+        previous_program = glGetIntegerv(GL_CURRENT_PROGRAM)
+        previous_vao = glGetIntegerv(GL_VERTEX_ARRAY_BINDING)
+
+        target = OffscreenTarget(4, 4)
+        vao = glGenVertexArrays(1)
+        glBindVertexArray(vao)
+        for program in programs:
+            glUseProgram(program)
+            glDrawArrays(GL_TRIANGLES, 0, 3)
+        glFlush()
+
+        glDeleteVertexArrays(1, (vao,))
+        target.destroy()
+
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, int(previous_draw_framebuffer))
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, int(previous_read_framebuffer))
+        glViewport(*[int(v) for v in previous_viewport])
+        glUseProgram(int(previous_program))
+        glBindVertexArray(int(previous_vao))
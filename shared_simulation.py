@@ -0,0 +1,273 @@
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from entity_array import EntityArray
+
+#state slots: the one being written, the latest finished step and the one before it
+SLOTS = 3
+#control words at the start of the shared block
+DT, LATEST, STOP = range(3)
+CONTROL_WORDS = 4
+
+#seconds the render thread waits on the workers before it reports them stuck
+WAIT_TIMEOUT = 10.0
+#how often a waiting render thread checks that every worker is still alive
+POLL_INTERVAL = 0.05
+
+#drift_and_spin's defaults, the triangle in main.py turns 0.25 degrees per 1/144 s step
+SPIN = 0.25 * 144
+BOUNDS = 100.0
+
+def drift_and_spin(positions: np.ndarray, eulers: np.ndarray, out_positions: np.ndarray,
+                   out_eulers: np.ndarray, velocities: np.ndarray, dt: float) -> None:
+    """
+        Default simulation kernel: move by velocity, bounce off a box, spin about z.
+
+        Kernels read one state slot and write the next one for a slice of the
+        entities, and may update their slice of velocities in place.
+    """
+
+    np.multiply(velocities, np.float32(dt), out=out_positions)
+    out_positions += positions
+    outside = np.abs(out_positions) > BOUNDS
+    np.negative(velocities, out=velocities, where=outside)
+    np.clip(out_positions, -BOUNDS, BOUNDS, out=out_positions)
+
+    np.copyto(out_eulers, eulers)
+    out_eulers[:, 2] += np.float32(SPIN * dt)
+    np.mod(out_eulers[:, 2], 360.0, out=out_eulers[:, 2])
+
+class SharedEntityState:
+    """
+        Entity positions, eulers and velocities in one multiprocessing.shared_memory block.
+
+        Positions and eulers have SLOTS copies so workers can write a new step
+        while the renderer reads the last two finished ones.
+    """
+
+    def __init__(self, count: int, name: str | None = None):
+        """
+            Parameters:
+
+                count: number of entities
+
+                name: attach to an existing block instead of creating one
+        """
+
+        self.count = count
+        vectors = count * 3 * 4
+        nbytes = CONTROL_WORDS * 8 + 2 * SLOTS * vectors + vectors
+
+        self.owner = name is None
+        self.memory = shared_memory.SharedMemory(name=name, create=self.owner, size=nbytes if self.owner else 0)
+        buffer = self.memory.buf
+
+        self.control = np.ndarray(CONTROL_WORDS, dtype=np.float64, buffer=buffer)
+        offset = CONTROL_WORDS * 8
+        self.positions = np.ndarray((SLOTS, count, 3), dtype=np.float32, buffer=buffer, offset=offset)
+        offset += SLOTS * vectors
+        self.eulers = np.ndarray((SLOTS, count, 3), dtype=np.float32, buffer=buffer, offset=offset)
+        offset += SLOTS * vectors
+        self.velocities = np.ndarray((count, 3), dtype=np.float32, buffer=buffer, offset=offset)
+
+    @property
+    def name(self) -> str:
+
+        return self.memory.name
+
+    def close(self) -> None:
+        """ Drop this process's mapping, the creator also frees the block. """
+
+        #the views keep the buffer exported, release them first
+        self.control = self.positions = self.eulers = self.velocities = None
+        try:
+            self.memory.close()
+        except BufferError:
+            #views handed out, e.g. to attached entities, still use it, it is unmapped once they are gone
+            pass
+        if self.owner:
+            self.memory.unlink()
+
+def _worker(name: str, count: int, start: int, stop: int, go, done, kernel) -> None:
+    state = SharedEntityState(count, name)
+    try:
+        while True:
+            go.acquire()
+            if state.control[STOP]:
+                break
+            source = int(state.control[LATEST])
+            target = (source + 1) % SLOTS
+            kernel(state.positions[source, start:stop], state.eulers[source, start:stop],
+                   state.positions[target, start:stop], state.eulers[target, start:stop],
+                   state.velocities[start:stop], float(state.control[DT]))
+            done.release()
+    finally:
+        #a worker that raises just exits, the render thread sees it is no longer alive
+        state.close()
+
+class SimulationPool:
+    """
+        Steps the entities on a pool of processes, each owning a disjoint slice.
+
+        State lives in a SharedEntityState. A step reads the latest slot and
+        writes the next one, so between begin_step() and end_step() the
+        renderer keeps reading the latest and previous slots, without copies,
+        while the workers run on other cores.
+
+        Each worker has its own start semaphore and all of them release one
+        shared done semaphore. A barrier is not used: a process killed while
+        the barrier drains, or while it holds the barrier's lock, blocks the
+        others with no timeout. Waits on the done semaphore are sliced to
+        check the workers are alive, so a worker that dies, even by SIGKILL,
+        or hangs past the timeout raises RuntimeError instead of blocking
+        the render thread forever.
+    """
+
+    def __init__(self, entities: EntityArray, workers: int | None = None, kernel=drift_and_spin,
+                 velocities: np.ndarray | None = None, timeout: float = WAIT_TIMEOUT):
+        """
+            Parameters:
+
+                entities: initial positions and eulers, entities.count entities are simulated
+
+                workers: processes, one per core by default
+
+                kernel: top-level function stepping a slice, see drift_and_spin
+
+                velocities: (count,3) initial velocities, zero by default
+
+                timeout: seconds end_step() waits for live workers before giving up
+        """
+
+        self.count = entities.count
+        self.workers = workers or multiprocessing.cpu_count()
+        self.timeout = timeout
+        self.state = SharedEntityState(self.count)
+        self.state.control[:] = 0.0
+
+        self.state.positions[:] = entities.positions[:self.count]
+        self.state.eulers[:] = entities.eulers[:self.count]
+        self.state.velocities[:] = 0.0 if velocities is None else velocities
+
+        #spawn, not fork: the parent may hold a GL context and loader threads
+        context = multiprocessing.get_context("spawn")
+        self._go = [context.Semaphore(0) for _ in range(self.workers)]
+        self._done = context.Semaphore(0)
+        bounds = np.linspace(0, self.count, self.workers + 1).astype(int).tolist()
+        self._processes = [
+            context.Process(target=_worker, name=f"simulation-{i}", daemon=True,
+                            args=(self.state.name, self.count, start, stop, self._go[i], self._done, kernel))
+            for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:]))
+        ]
+        for process in self._processes:
+            process.start()
+        self._running = False
+        #set once a step fails, the semaphores may hold a partial step's releases after that
+        self._failure: str | None = None
+
+    @property
+    def latest(self) -> int:
+
+        return int(self.state.control[LATEST])
+
+    @property
+    def positions(self) -> np.ndarray:
+        """ Positions after the latest finished step, a view of shared memory. """
+
+        return self.state.positions[self.latest]
+
+    @property
+    def eulers(self) -> np.ndarray:
+
+        return self.state.eulers[self.latest]
+
+    @property
+    def previous_positions(self) -> np.ndarray:
+        """ Positions one step earlier, for render interpolation. """
+
+        return self.state.positions[(self.latest - 1) % SLOTS]
+
+    @property
+    def previous_eulers(self) -> np.ndarray:
+
+        return self.state.eulers[(self.latest - 1) % SLOTS]
+
+    def begin_step(self, dt: float) -> None:
+        """ Start a step on every worker and return right away. """
+
+        if self._running:
+            raise RuntimeError("end_step() the running step first")
+        if self._failure is not None:
+            raise RuntimeError(self._failure)
+        self.state.control[DT] = dt
+        for go in self._go:
+            go.release()
+        self._running = True
+
+    def end_step(self) -> None:
+        """ Wait for the workers and make their step the latest. """
+
+        if not self._running:
+            return
+        self._running = False
+        self._wait()
+        self.state.control[LATEST] = (self.latest + 1) % SLOTS
+
+    def step(self, dt: float) -> None:
+
+        self.begin_step(dt)
+        self.end_step()
+
+    def _wait(self) -> None:
+        deadline = time.monotonic() + self.timeout
+        for _ in range(self.workers):
+            while not self._done.acquire(timeout=POLL_INTERVAL):
+                dead = [process for process in self._processes if not process.is_alive()]
+                if dead:
+                    failures = ", ".join(f"{process.name} (exit code {process.exitcode})" for process in dead)
+                    self._failure = f"simulation worker died: {failures}"
+                elif time.monotonic() > deadline:
+                    self._failure = f"simulation workers did not finish a step within {self.timeout} s"
+                else:
+                    continue
+                raise RuntimeError(self._failure)
+
+    def attach(self, entities: EntityArray) -> None:
+        """
+            Point the entity arrays at the latest and previous slots, call after every end_step().
+
+            The arrays become views of shared memory, so make_model_transforms_*
+            reads the workers' output directly. Do not call store_previous() on
+            attached entities, the previous slot already is the previous state.
+        """
+
+        entities.positions = self.positions
+        entities.eulers = self.eulers
+        entities.previous_positions = self.previous_positions
+        entities.previous_eulers = self.previous_eulers
+
+    def close(self) -> None:
+        """
+            Stop the workers and free the shared memory.
+
+            A failure of the running step is still raised, after the cleanup.
+            Workers that do not stop within the timeout are terminated.
+        """
+
+        try:
+            self.end_step()
+        finally:
+            self.state.control[STOP] = 1.0
+            for go in self._go:
+                go.release()
+            #live workers see STOP and leave their loop, hung ones are terminated below
+            deadline = time.monotonic() + self.timeout
+            for process in self._processes:
+                process.join(max(deadline - time.monotonic(), 0.0))
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+            self.state.close()
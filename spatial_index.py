@@ -0,0 +1,166 @@
+import numpy as np
+
+#spheres tested per batch, keeps the temporaries of the precise test in cache
+CULL_BATCH = 65536
+
+OUTSIDE = 0
+INTERSECTING = 1
+INSIDE = 2
+
+def spheres_in_frustum(centers: np.ndarray, radii: np.ndarray, planes: np.ndarray) -> np.ndarray:
+    """ Boolean mask of the bounding spheres touching the frustum, tested in batches. """
+
+    visible = np.empty(len(centers), dtype=bool)
+    normals = planes[:, 0:3].T
+    offsets = planes[:, 3]
+    for start in range(0, len(centers), CULL_BATCH):
+        stop = start + CULL_BATCH
+        distances = centers[start:stop] @ normals
+        distances += offsets
+        distances += radii[start:stop, None]
+        visible[start:stop] = (distances >= 0).all(axis=1)
+    return visible
+
+class UniformGrid:
+    """
+        Uniform grid over entity bounding spheres, for frustum culling.
+
+        Every entity is filed under the cell holding its center, and cells are
+        padded by the largest radius so a sphere never pokes out of its cell's
+        bounds. Culling classifies all cells against the frustum first; entities
+        in cells fully inside are accepted without a test, those in cells fully
+        outside are skipped, and only the rest get the precise sphere test.
+        Entities outside the grid go to an overflow cell that is always tested.
+
+        Moving entities is incremental: update() only refiles the given ones.
+        Queries read each cell's entities from a compressed list, entities
+        sorted by cell with an offset per cell, so a query only touches the
+        entities of the cells it keeps. The list is rebuilt on the first
+        query after a move, in one counting pass over the cells.
+    """
+
+    def __init__(self, bounds_min: list[float], bounds_max: list[float], cell_size: float, capacity: int):
+        """
+            Parameters:
+
+                bounds_min, bounds_max: corners of the gridded region of the world
+
+                cell_size: edge length of a cell
+
+                capacity: maximum number of entities
+        """
+
+        self.bounds_min = np.array(bounds_min, dtype=np.float32)
+        self.cell_size = float(cell_size)
+        self.dims = np.maximum(np.ceil((np.array(bounds_max) - self.bounds_min) / cell_size), 1).astype(np.int64)
+        self.cell_count = int(np.prod(self.dims))
+        self.overflow = self.cell_count
+
+        self.capacity = capacity
+        self.count = 0
+        self.centers = np.zeros((capacity, 3), dtype=np.float32)
+        self.radii = np.zeros(capacity, dtype=np.float32)
+        self.cell_of = np.full(capacity, self.overflow, dtype=np.int64)
+        self.max_radius = 0.0
+
+        #entities sorted by cell, cell c owns cell_entities[cell_start[c]:cell_start[c + 1]]
+        self.cell_entities = np.zeros(0, dtype=np.int64)
+        self.cell_start = np.zeros(self.cell_count + 2, dtype=np.int64)
+        self._dirty = False
+
+        grid = np.indices(self.dims).reshape(3, -1).T
+        self._cell_centers = (self.bounds_min + (grid + 0.5) * self.cell_size).astype(np.float32)
+
+    def _cells_for(self, centers: np.ndarray) -> np.ndarray:
+        coords = np.floor((centers - self.bounds_min) / self.cell_size).astype(np.int64)
+        inside = ((coords >= 0) & (coords < self.dims)).all(axis=1)
+        cells = np.ravel_multi_index(np.clip(coords, 0, self.dims - 1).T, self.dims)
+        cells[~inside] = self.overflow
+        return cells
+
+    def add(self, center: list[float], radius: float) -> int:
+        """ File a new entity and return its index. """
+
+        if self.count == self.capacity:
+            raise IndexError(f"UniformGrid is full ({self.capacity} entities)")
+
+        index = self.count
+        self.count += 1
+        self.update(np.array([index]), np.array([center], dtype=np.float32), np.array([radius], dtype=np.float32))
+        return index
+
+    def add_many(self, centers: np.ndarray, radii: np.ndarray) -> np.ndarray:
+        """ File a batch of new entities and return their indices. """
+
+        if self.count + len(centers) > self.capacity:
+            raise IndexError(f"UniformGrid is full ({self.capacity} entities)")
+
+        indices = np.arange(self.count, self.count + len(centers))
+        self.count += len(centers)
+        self.update(indices, centers, radii)
+        return indices
+
+    def update(self, indices: np.ndarray, centers: np.ndarray, radii: np.ndarray | None = None) -> None:
+        """ Move entities, refiling only them. """
+
+        self.centers[indices] = centers
+        if radii is not None:
+            self.radii[indices] = radii
+            if len(indices):
+                #only grows, a shrinking radius leaves the cells a little looser than needed
+                self.max_radius = max(self.max_radius, float(np.max(radii)))
+        self.cell_of[indices] = self._cells_for(self.centers[indices])
+        self._dirty = True
+
+    def _rebuild_cells(self) -> None:
+        cells = self.cell_of[:self.count]
+        np.cumsum(np.bincount(cells, minlength=self.cell_count + 1), out=self.cell_start[1:])
+        if self.cell_count < 1 << 16:
+            #NumPy radix sorts 16-bit keys, several times faster than its stable sort of int64
+            cells = cells.astype(np.uint16)
+        self.cell_entities = np.argsort(cells, kind="stable")
+        self._dirty = False
+
+    def _entities_in(self, cells: np.ndarray) -> np.ndarray:
+        """ Entities of the given cells, concatenated cell by cell. """
+
+        starts = self.cell_start[cells]
+        counts = self.cell_start[cells + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            return np.zeros(0, dtype=np.int64)
+        #position in the output minus where its cell begins there, plus where the cell begins in cell_entities
+        ends = np.cumsum(counts)
+        positions = np.arange(total) + np.repeat(starts - (ends - counts), counts)
+        return self.cell_entities[positions]
+
+    def classify_cells(self, planes: np.ndarray) -> np.ndarray:
+        """ OUTSIDE/INTERSECTING/INSIDE for every cell, plus INTERSECTING for the overflow cell. """
+
+        half = self.cell_size / 2 + self.max_radius
+        normals = planes[:, 0:3]
+        #distance from each cell center to each plane, and how far the padded cell reaches along the normal
+        distances = self._cell_centers @ normals.T + planes[:, 3]
+        reach = half * np.abs(normals).sum(axis=1)
+
+        state = np.full(self.cell_count + 1, INTERSECTING, dtype=np.int8)
+        cells = state[:self.cell_count]
+        cells[(distances + reach >= 0).all(axis=1)] = INTERSECTING
+        cells[(distances - reach >= 0).all(axis=1)] = INSIDE
+        cells[(distances + reach < 0).any(axis=1)] = OUTSIDE
+        return state
+
+    def query_frustum(self, planes: np.ndarray) -> np.ndarray:
+        """ Sorted indices of the entities whose bounding sphere touches the frustum. """
+
+        if self._dirty:
+            self._rebuild_cells()
+        state = self.classify_cells(planes)
+
+        accepted = self._entities_in(np.flatnonzero(state == INSIDE))
+        candidates = self._entities_in(np.flatnonzero(state == INTERSECTING))
+        passed = candidates[spheres_in_frustum(self.centers[candidates], self.radii[candidates], planes)]
+
+        visible = np.concatenate([accepted, passed])
+        visible.sort()
+        return visible
@@ -0,0 +1,23 @@
+import os
+import sys
+
+#the modules live at the repository root, next to main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+#GL tests render offscreen, PyOpenGL picks its platform when it is first imported
+os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+
+import pytest
+
+@pytest.fixture(scope="session")
+def gl_context():
+    """ A current headless 3.3 core context drawing into a small offscreen target, skipped when there is none. """
+
+    from gl_context import OffscreenTarget, create_headless_context
+
+    try:
+        create_headless_context()
+    except Exception as error:
+        pytest.skip(f"no headless GL context: {error}")
+    target = OffscreenTarget(16, 16)
+    yield target
+    target.destroy()
@@ -0,0 +1,143 @@
+import numpy as np
+import pyrr
+import pytest
+
+from animation import (
+    AnimationClip, Animator, compose_transforms, quaternion_from_axis_angle, quaternion_multiply, slerp,
+)
+from entity_array import EntityArray
+
+def random_quaternions(rng, count: int) -> np.ndarray:
+    q = rng.normal(size=(count, 4))
+    return (q / np.linalg.norm(q, axis=1, keepdims=True)).astype(np.float32)
+
+def test_quaternion_multiply_matches_pyrr():
+    rng = np.random.default_rng(0)
+    a = random_quaternions(rng, 20)
+    b = random_quaternions(rng, 20)
+
+    expected = [pyrr.quaternion.cross(a[i], b[i]) for i in range(20)]
+
+    np.testing.assert_allclose(quaternion_multiply(a, b), expected, atol=1e-6)
+
+def test_axis_angle_matches_pyrr():
+    angles = np.array([0.0, 0.5, np.pi, 4.0])
+
+    q = quaternion_from_axis_angle([0, 2, 0], angles)
+
+    expected = [pyrr.quaternion.create_from_axis_rotation([0.0, 1.0, 0.0], angle) for angle in angles]
+    np.testing.assert_allclose(q, expected, atol=1e-6)
+
+def test_slerp_endpoints_midpoint_and_short_path():
+    a = quaternion_from_axis_angle([0, 0, 1], np.zeros(3))
+    b = quaternion_from_axis_angle([0, 0, 1], np.full(3, np.pi / 2))
+
+    result = slerp(a, b, np.array([0.0, 0.5, 1.0]))
+
+    np.testing.assert_allclose(result[0], a[0], atol=1e-6)
+    np.testing.assert_allclose(result[1], quaternion_from_axis_angle([0, 0, 1], np.pi / 4)[0], atol=1e-6)
+    np.testing.assert_allclose(result[2], b[0], atol=1e-6)
+    #-b is the same rotation, the result must not swing the long way round
+    np.testing.assert_allclose(np.abs(slerp(a, -b, np.full(3, 0.5))), np.abs(result[[1, 1, 1]]), atol=1e-6)
+
+def test_slerp_of_nearly_equal_quaternions_is_normalized():
+    a = quaternion_from_axis_angle([1, 0, 0], np.zeros(4))
+
+    result = slerp(a, a.copy(), np.linspace(0, 1, 4))
+
+    assert np.isfinite(result).all()
+    np.testing.assert_allclose(result, a, atol=1e-6)
+
+def test_compose_transforms_matches_pyrr():
+    rng = np.random.default_rng(1)
+    positions = rng.uniform(-5, 5, (10, 3)).astype(np.float32)
+    rotations = random_quaternions(rng, 10)
+    scales = rng.uniform(0.5, 2, (10, 3)).astype(np.float32)
+
+    models = compose_transforms(positions, rotations, scales)
+
+    for i in range(10):
+        expected = (pyrr.matrix44.create_from_scale(scales[i])
+                    @ pyrr.matrix44.create_from_quaternion(rotations[i])
+                    @ pyrr.matrix44.create_from_translation(positions[i]))
+        np.testing.assert_allclose(models[i], expected, atol=1e-5)
+
+def make_clips() -> list[AnimationClip]:
+    walk = AnimationClip(
+        positions=([0.0, 1.0, 2.0], [[0, 0, 0], [1, 0, 0], [1, 2, 0]]),
+        rotations=([0.0, 2.0], quaternion_from_axis_angle([0, 1, 0], [0.0, np.pi / 2])),
+    )
+    wave = AnimationClip(scales=([0.0, 0.5], [[1, 1, 1], [2, 2, 2]]), duration=1.0)
+    return [walk, wave]
+
+def brute_force_position(clip: AnimationClip, time: float) -> np.ndarray:
+    times, values = clip.tracks["position"]
+    return np.array([np.interp(time, times, values[:, k]) for k in range(3)])
+
+def test_sampling_follows_the_keys_frame_after_frame():
+    clips = make_clips()
+    animator = Animator(clips, capacity=8)
+    starts = np.array([0.0, 0.3, 1.7, 2.5])
+    animator.play(np.arange(4), 0, starts, loops=np.array([True, True, False, True]))
+
+    for _ in range(40):
+        positions, _, _ = animator.sample()
+        for i in range(4):
+            time = animator.times_a[i]
+            local = time % 2.0 if animator.loops[i] else min(time, 2.0)
+            np.testing.assert_allclose(positions[i], brute_force_position(clips[0], local), atol=1e-5)
+        animator.advance(0.13)
+
+def test_clip_holds_its_last_pose_without_looping():
+    animator = Animator(make_clips(), capacity=1)
+    animator.play(0, 0, 10.0, loops=False)
+
+    positions, rotations, scales = animator.sample()
+
+    np.testing.assert_allclose(positions[0], [1, 2, 0])
+    np.testing.assert_allclose(rotations[0], quaternion_from_axis_angle([0, 1, 0], np.pi / 2)[0], atol=1e-6)
+    np.testing.assert_allclose(scales[0], [1, 1, 1])
+
+def test_blend_and_crossfade():
+    animator = Animator(make_clips(), capacity=2)
+    animator.play([0, 1], 0, 1.0)
+    animator.blend(0, 1, 0.5)
+    animator.crossfade(1, 1, duration=0.25)
+
+    _, _, scales = animator.sample()
+    #clip 1 at t=1.0 (looped to 0) has scale 1, the fade has not started
+    np.testing.assert_allclose(scales, [[1, 1, 1], [1, 1, 1]])
+
+    animator.advance(0.25)
+    _, _, scales = animator.sample()
+
+    #the crossfade finished and clip 1 replaced clip 0, its scale is half way to 2
+    assert animator.clips_a[1] == 1 and animator.clips_b[1] == -1
+    np.testing.assert_allclose(scales[1], [1.5, 1.5, 1.5])
+    #the fixed blend stays at half of clip 1's scale
+    assert animator.clips_b[0] == 1
+    np.testing.assert_allclose(scales[0], [1.25, 1.25, 1.25])
+
+def test_write_transforms():
+    entities = EntityArray(4)
+    for _ in range(4):
+        entities.add([0, 0, 0], [0, 0, 0])
+    entities.make_model_transforms_xy()
+    animator = Animator(make_clips(), capacity=2)
+    animator.play([1, 3], 0, [1.0, 2.0])
+
+    written = animator.write_transforms(entities)
+
+    assert written.tolist() == [1, 3]
+    np.testing.assert_allclose(entities.positions[[1, 3]], [[1, 0, 0], [0, 0, 0]])
+    np.testing.assert_allclose(entities.models[1, 3, 0:3], [1, 0, 0])
+    np.testing.assert_allclose(entities.models[0], np.identity(4), atol=1e-6)
+
+def test_bad_clips_and_full_animator():
+    with pytest.raises(ValueError):
+        AnimationClip(positions=([0.0, 0.0], [[0, 0, 0], [1, 0, 0]]))
+
+    animator = Animator(make_clips(), capacity=1)
+    animator.play(0, 0)
+    with pytest.raises(IndexError):
+        animator.play(1, 0)
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+from OpenGL.GL import GL_COPY_READ_BUFFER, glBindBuffer, glGetBufferSubData
+
+from buffer_arena import FreeList, MeshArena
+from vertex_format import POSITION_COLOR_F32
+
+def test_free_list_first_fit_and_merging():
+    free_list = FreeList(100)
+    a = free_list.allocate(10)
+    b = free_list.allocate(20)
+    c = free_list.allocate(30)
+    assert (a, b, c) == (0, 10, 30)
+    assert free_list.allocate(50) is None
+
+    free_list.free(a, 10)
+    free_list.free(c, 30)
+    assert (free_list.offsets, free_list.sizes) == ([0, 30], [10, 70])
+    #first fit, the hole at the front is used before the tail
+    assert free_list.allocate(5) == 0
+
+    free_list.free(0, 5)
+    free_list.free(b, 20)
+    assert (free_list.offsets, free_list.sizes, free_list.used) == ([0], [100], 0)
+
+def test_free_list_grow_tail_and_reset():
+    free_list = FreeList(0)
+    assert free_list.largest == 0 and free_list.tail == 0
+
+    free_list.grow(8)
+    assert free_list.allocate(8) == 0
+    assert free_list.tail == 0
+    free_list.grow(16)
+    assert (free_list.tail, free_list.largest, free_list.used) == (8, 8, 8)
+
+    free_list.free(0, 4)
+    free_list.reset(4)
+    assert (free_list.offsets, free_list.sizes, free_list.used) == ([4], [12], 4)
+    free_list.reset(16)
+    assert free_list.offsets == [] and free_list.tail == 0
+
+def random_free_list_ops(seed: int):
+    #allocations and frees against a boolean occupancy array
+    rng = np.random.default_rng(seed)
+    free_list = FreeList(256)
+    occupied = np.zeros(256, dtype=bool)
+    live = []
+    for _ in range(500):
+        if live and rng.random() < 0.45:
+            offset, size = live.pop(int(rng.integers(len(live))))
+            free_list.free(offset, size)
+            occupied[offset:offset + size] = False
+        else:
+            size = int(rng.integers(1, 20))
+            offset = free_list.allocate(size)
+            if offset is None:
+                continue
+            assert not occupied[offset:offset + size].any()
+            occupied[offset:offset + size] = True
+            live.append((offset, size))
+    return free_list, occupied
+
+@pytest.mark.parametrize("seed", range(3))
+def test_free_list_matches_occupancy(seed):
+    free_list, occupied = random_free_list_ops(seed)
+
+    free = np.zeros(256, dtype=bool)
+    for offset, size in zip(free_list.offsets, free_list.sizes):
+        free[offset:offset + size] = True
+    np.testing.assert_array_equal(free, ~occupied)
+    assert free_list.used == occupied.sum()
+    #merged, no two free blocks touch
+    ends = np.add(free_list.offsets, free_list.sizes)
+    assert (ends[:-1] < np.array(free_list.offsets[1:])).all()
+
+def read_buffer(buffer: int, dtype, offset: int, count: int) -> np.ndarray:
+    itemsize = np.dtype(dtype).itemsize
+    glBindBuffer(GL_COPY_READ_BUFFER, buffer)
+    data = glGetBufferSubData(GL_COPY_READ_BUFFER, offset * itemsize, count * itemsize)
+    return np.frombuffer(bytes(data), dtype=dtype)
+
+def random_mesh(rng, vertex_count: int) -> tuple[np.ndarray, np.ndarray]:
+    vertices = rng.random((vertex_count, 6)).astype(np.float32)
+    indices = rng.integers(0, vertex_count, vertex_count * 3).astype(np.uint32)
+    return vertices, indices
+
+def test_arena_grows_frees_and_defragments(gl_context):
+    rng = np.random.default_rng(0)
+    arena = MeshArena(POSITION_COLOR_F32, vertex_capacity=16, index_capacity=16)
+    meshes = {}
+    for size in (5, 40, 12, 70, 3):
+        vertices, indices = random_mesh(rng, size)
+        meshes[arena.allocate(vertices, indices)] = (vertices, indices)
+    assert arena.vertices.capacity >= 130
+
+    for mesh in [m for m in meshes if m.vertex_count in (40, 3)]:
+        mesh.destroy()
+        del meshes[mesh]
+    assert arena.stats()["vertex_free_blocks"] == 2
+
+    arena.defragment()
+
+    stats = arena.stats()
+    assert stats["meshes"] == 3
+    assert stats["vertex_used"] == 87 and stats["vertex_free_blocks"] == 1 and stats["vertex_fragmentation"] == 0.0
+    for mesh, (vertices, indices) in meshes.items():
+        stored = read_buffer(arena.vbo, np.float32, mesh.vertex_offset * 6, mesh.vertex_count * 6)
+        np.testing.assert_array_equal(stored.reshape(-1, 6), vertices)
+        np.testing.assert_array_equal(read_buffer(arena.ebo, np.uint32, mesh.index_offset, mesh.index_count), indices)
+    arena.destroy()
+
+def test_arena_rejects_bad_meshes(gl_context):
+    arena = MeshArena(POSITION_COLOR_F32, vertex_capacity=8, index_capacity=8)
+    vertices = np.zeros((3, 6), dtype=np.float32)
+
+    with pytest.raises(ValueError):
+        arena.allocate(vertices, np.array([0, 1, 3]))
+    assert arena.stats()["meshes"] == 0
+    arena.destroy()
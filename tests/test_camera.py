@@ -0,0 +1,39 @@
+import numpy as np
+
+from camera import Camera
+
+def test_frustum_planes_agree_with_clip_space():
+    camera = Camera(position=[3, 2, -6], target=[0, 0, 0], fovy=70, aspect=16/9, near=0.5, far=30.0)
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-40, 40, (20000, 3)).astype(np.float32)
+
+    planes = camera.frustum_planes()
+    by_planes = (points @ planes[:, 0:3].T + planes[:, 3] >= 0).all(axis=1)
+
+    #row vectors, as the shaders get them: clip = p * view * projection
+    clip = np.hstack([points, np.ones((len(points), 1), dtype=np.float32)]) @ camera.view() @ camera.projection()
+    w = clip[:, 3:4]
+    by_clip = (np.abs(clip[:, 0:3]) <= w).all(axis=1)
+
+    #points right on a plane may go either way in float32
+    distance = np.abs(points @ planes[:, 0:3].T + planes[:, 3]).min(axis=1)
+    clear = distance > 1e-3
+    assert by_planes.any() and not by_planes.all()
+    np.testing.assert_array_equal(by_planes[clear], by_clip[clear])
+
+def test_frustum_planes_are_normalized():
+    planes = Camera(position=[0, 0, 4], target=[0, 0, 0]).frustum_planes()
+
+    assert planes.shape == (6, 4)
+    np.testing.assert_allclose(np.linalg.norm(planes[:, 0:3], axis=1), 1.0, rtol=1e-5)
+
+def test_target_inside_and_behind_outside():
+    camera = Camera(position=[0, 0, 4], target=[0, 0, 0], near=0.1, far=10.0)
+    planes = camera.frustum_planes()
+
+    def inside(point):
+        return bool((planes[:, 0:3] @ np.asarray(point, dtype=np.float32) + planes[:, 3] >= 0).all())
+
+    assert inside([0, 0, 0])
+    assert not inside([0, 0, 5])
+    assert not inside([0, 0, -7])
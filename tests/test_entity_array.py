@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from entity_array import EntityArray, model_transforms
+from main import Entity
+
+def random_entities(count: int, seed: int = 0) -> EntityArray:
+    rng = np.random.default_rng(seed)
+    entities = EntityArray(count)
+    for _ in range(count):
+        entities.add(rng.uniform(-5, 5, 3).tolist(), rng.uniform(0, 360, 3).tolist())
+    return entities
+
+@pytest.mark.parametrize("order", ["x", "y", "xy"])
+def test_model_transforms_match_entity(order):
+    entities = random_entities(50)
+
+    models = getattr(entities, f"make_model_transforms_{order}")()
+
+    for i in range(entities.count):
+        entity = Entity(entities.positions[i], entities.eulers[i])
+        expected = getattr(entity, f"make_model_transform_{order}")()
+        np.testing.assert_allclose(models[i], expected, atol=1e-5)
+
+def test_model_transforms_of_a_subset():
+    entities = random_entities(20)
+    subset = np.array([3, 7, 11])
+
+    models = model_transforms(entities.positions[subset], entities.eulers[subset], "xy")
+
+    np.testing.assert_allclose(models, entities.make_model_transforms_xy()[subset], atol=1e-6)
+
+def test_alpha_blends_between_steps():
+    entities = EntityArray(1)
+    entities.add([0.0, 0.0, 0.0], [0.0, 0.0, 350.0])
+    entities.store_previous()
+    entities.positions[0] = [2.0, 4.0, 0.0]
+    entities.eulers[0, 2] = 10.0
+
+    start = entities.make_model_transforms_xy(alpha=0.0).copy()
+    middle = entities.make_model_transforms_xy(alpha=0.5).copy()
+    end = entities.make_model_transforms_xy(alpha=1.0).copy()
+
+    np.testing.assert_allclose(start[0, 3, 0:3], [0.0, 0.0, 0.0])
+    np.testing.assert_allclose(middle[0, 3, 0:3], [1.0, 2.0, 0.0])
+    np.testing.assert_allclose(end, entities.make_model_transforms_xy(), atol=1e-6)
+    #350 -> 10 goes forward through 0, not back through 180
+    np.testing.assert_allclose(middle[0, 0:3, 0:3], np.identity(3), atol=1e-6)
+
+def test_add_past_capacity_raises():
+    entities = EntityArray(1)
+    entities.add([0, 0, 0], [0, 0, 0])
+
+    with pytest.raises(IndexError):
+        entities.add([0, 0, 0], [0, 0, 0])
@@ -0,0 +1,45 @@
+import pytest
+from OpenGL.GL import GL_NO_ERROR, glGetError
+from OpenGL.error import GLError
+
+import gl_dispatch
+from gl_dispatch import GLDispatch
+
+def test_debug_requested(monkeypatch):
+    monkeypatch.setattr("sys.argv", ["main.py"])
+    monkeypatch.delenv("GL_DEBUG", raising=False)
+    assert not gl_dispatch.debug_requested()
+
+    monkeypatch.setenv("GL_DEBUG", "1")
+    assert gl_dispatch.debug_requested()
+
+    monkeypatch.setenv("GL_DEBUG", "0")
+    monkeypatch.setattr("sys.argv", ["main.py", "--gl-debug"])
+    assert gl_dispatch.debug_requested()
+
+def test_mode_cannot_change_after_opengl_is_imported(monkeypatch):
+    monkeypatch.setattr(gl_dispatch, "DEBUG", True)
+
+    #the test modules already imported OpenGL.GL with checking on
+    with pytest.raises(RuntimeError):
+        gl_dispatch.configure(debug=False)
+    gl_dispatch.configure(debug=True)
+    assert gl_dispatch.DEBUG
+
+def test_dispatch_follows_the_configured_mode(monkeypatch):
+    monkeypatch.setattr(gl_dispatch, "DEBUG", False)
+    assert not GLDispatch().debug
+    assert GLDispatch(debug=True).debug
+
+    monkeypatch.setattr(gl_dispatch, "DEBUG", True)
+    assert GLDispatch().debug
+    with pytest.raises(AttributeError):
+        GLDispatch().glClear
+
+def test_checked_calls_raise_and_raw_calls_do_not(gl_context):
+    with pytest.raises(GLError):
+        GLDispatch(debug=True).glBindVertexArray(0xFFFFFF)
+
+    GLDispatch(debug=False).glBindVertexArray(0xFFFFFF)
+    assert glGetError() != GL_NO_ERROR
+    assert glGetError() == GL_NO_ERROR
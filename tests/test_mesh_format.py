@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+from OpenGL.GL import GL_ELEMENT_ARRAY_BUFFER, GL_UNSIGNED_SHORT, glBindBuffer, glBindVertexArray, glGetBufferSubData
+
+from mesh_format import POSITION_COLOR, IndexedMesh, MeshFile, convert, import_obj, import_ply, write_mesh
+
+def triangles(vertices: np.ndarray, indices: np.ndarray) -> list:
+    """ Triangles as vertex tuples, rotated to start at their smallest vertex, so index order does not matter. """
+
+    corners = [tuple(map(tuple, vertices[indices[i:i + 3]].tolist())) for i in range(0, len(indices), 3)]
+    return sorted(min(t[k:] + t[:k] for k in range(3)) for t in corners)
+
+def grid_mesh(n: int) -> tuple[np.ndarray, np.ndarray]:
+    #(n+1)^2 vertices, 2n^2 triangles
+    x, y = np.meshgrid(np.arange(n + 1), np.arange(n + 1))
+    vertices = np.zeros(((n + 1) ** 2, 6), dtype=np.float32)
+    vertices[:, 0] = x.reshape(-1)
+    vertices[:, 1] = y.reshape(-1)
+    vertices[:, 3:6] = 1.0
+    corner = (np.arange(n)[:, None] * (n + 1) + np.arange(n)[None, :]).reshape(-1)
+    quads = np.stack([corner, corner + 1, corner + n + 2, corner, corner + n + 2, corner + n + 1], axis=1)
+    return vertices, quads.reshape(-1).astype(np.uint32)
+
+@pytest.mark.parametrize("index_dtype", [np.uint16, np.uint32])
+def test_write_and_map_round_trip(tmp_path, index_dtype):
+    vertices, indices = grid_mesh(4)
+    path = str(tmp_path / "grid.mesh")
+
+    write_mesh(path, vertices, indices.astype(index_dtype), POSITION_COLOR)
+    mesh = MeshFile(path)
+
+    assert (mesh.vertex_count, mesh.index_count, mesh.stride) == (len(vertices), len(indices), 24)
+    assert mesh.indices.dtype == index_dtype
+    np.testing.assert_array_equal(mesh.indices, indices)
+    np.testing.assert_array_equal(mesh.vertices.view(np.float32).reshape(-1, 6), vertices)
+    records = mesh.vertex_array()
+    np.testing.assert_array_equal(records["a0"], vertices[:, 0:3])
+    np.testing.assert_array_equal(records["a1"], vertices[:, 3:6])
+    assert not (tmp_path / "grid.mesh.tmp").exists()
+
+def test_bad_files_are_rejected(tmp_path):
+    vertices, indices = grid_mesh(1)
+
+    with pytest.raises(ValueError):
+        write_mesh(str(tmp_path / "a.mesh"), vertices, indices.astype(np.int32), POSITION_COLOR)
+
+    path = tmp_path / "b.mesh"
+    path.write_bytes(b"NOPE" + bytes(1024))
+    with pytest.raises(ValueError):
+        MeshFile(str(path))
+
+def test_import_obj_triangulates_polygons(tmp_path):
+    path = tmp_path / "quad.obj"
+    path.write_text(
+        "# a quad and a triangle using every face syntax\n"
+        "v 0 0 0 1 0 0\nv 1 0 0 0 1 0\nv 1 1 0 0 0 1\nv 0 1 0 1 1 1\n"
+        "vt 0 0\nvn 0 0 1\n"
+        "f 1/1/1 2/1/1 3/1/1 4/1/1\n"
+        "f -4//1 -2//1 -1//1\n"
+    )
+
+    vertices, indices = import_obj(str(path))
+
+    assert vertices.shape == (4, 6) and indices.dtype == np.uint32
+    np.testing.assert_array_equal(vertices[3], [0, 1, 0, 1, 1, 1])
+    assert indices.tolist() == [0, 1, 2, 0, 2, 3, 0, 2, 3]
+
+def test_import_obj_plain_triangles_without_colors(tmp_path):
+    path = tmp_path / "tri.obj"
+    path.write_text("v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n")
+
+    vertices, indices = import_obj(str(path))
+
+    np.testing.assert_array_equal(vertices[:, 3:6], 1.0)
+    assert indices.tolist() == [0, 1, 2]
+
+def test_import_obj_rejects_out_of_range_faces(tmp_path):
+    path = tmp_path / "bad.obj"
+    path.write_text("v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 4\n")
+
+    with pytest.raises(ValueError):
+        import_obj(str(path))
+
+def ply_header(encoding: str, vertex_count: int, face_count: int) -> bytes:
+    return (
+        f"ply\nformat {encoding} 1.0\ncomment made by a test\n"
+        f"element vertex {vertex_count}\nproperty float x\nproperty float y\nproperty float z\n"
+        "property uchar red\nproperty uchar green\nproperty uchar blue\n"
+        f"element face {face_count}\nproperty list uchar int vertex_indices\nend_header\n"
+    ).encode()
+
+def test_import_ply_ascii_and_binary_agree(tmp_path):
+    positions = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]], dtype=np.float32)
+    colors = np.array([[255, 0, 0], [0, 255, 0], [0, 0, 255], [255, 255, 255]], dtype=np.uint8)
+    faces = [[0, 1, 2, 3], [0, 2, 3]]
+
+    text = ply_header("ascii", 4, 2) + "".join(
+        f"{p[0]} {p[1]} {p[2]} {c[0]} {c[1]} {c[2]}\n" for p, c in zip(positions.tolist(), colors.tolist())
+    ).encode() + "".join(f"{len(f)} " + " ".join(map(str, f)) + "\n" for f in faces).encode()
+    (tmp_path / "ascii.ply").write_bytes(text)
+
+    records = np.zeros(4, dtype=[("p", "<f4", 3), ("c", "u1", 3)])
+    records["p"] = positions
+    records["c"] = colors
+    body = records.tobytes() + b"".join(
+        np.uint8(len(f)).tobytes() + np.array(f, dtype="<i4").tobytes() for f in faces
+    )
+    (tmp_path / "binary.ply").write_bytes(ply_header("binary_little_endian", 4, 2) + body)
+
+    for name in ("ascii.ply", "binary.ply"):
+        vertices, indices = import_ply(str(tmp_path / name))
+        np.testing.assert_allclose(vertices[:, 0:3], positions)
+        np.testing.assert_allclose(vertices[:, 3:6], colors / 255.0)
+        assert indices.tolist() == [0, 1, 2, 0, 2, 3, 0, 2, 3]
+
+def test_import_ply_needs_faces(tmp_path):
+    path = tmp_path / "points.ply"
+    path.write_bytes(b"ply\nformat ascii 1.0\nelement vertex 1\nproperty float x\nproperty float y\n"
+                     b"property float z\nend_header\n0 0 0\n")
+
+    with pytest.raises(ValueError):
+        import_ply(str(path))
+
+@pytest.mark.parametrize("optimize", [True, False])
+def test_convert_keeps_every_triangle(tmp_path, optimize):
+    vertices, indices = grid_mesh(6)
+    source = tmp_path / "grid.obj"
+    lines = [f"v {x} {y} {z}" for x, y, z in vertices[:, 0:3].tolist()]
+    lines += [f"f {a + 1} {b + 1} {c + 1}" for a, b, c in indices.reshape(-1, 3).tolist()]
+    source.write_text("\n".join(lines) + "\n")
+    destination = str(tmp_path / "grid.mesh")
+
+    convert(str(source), destination, optimize=optimize)
+    mesh = MeshFile(destination)
+
+    assert mesh.indices.dtype == np.uint16
+    converted = np.asarray(mesh.vertices).view(np.float32).reshape(-1, 6)
+    assert triangles(converted, np.asarray(mesh.indices)) == triangles(vertices, indices)
+
+@pytest.mark.parametrize("index_dtype", [np.uint8, np.int64, np.uint32])
+def test_indexed_mesh_uploads_what_its_index_type_says(gl_context, index_dtype):
+    vertices, indices = grid_mesh(3)
+
+    mesh = IndexedMesh(vertices, indices.astype(index_dtype), 24, POSITION_COLOR)
+
+    assert mesh.index_type == GL_UNSIGNED_SHORT and mesh.index_count == len(indices)
+    glBindVertexArray(mesh.vao)
+    glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, mesh.ebo)
+    stored = np.frombuffer(bytes(glGetBufferSubData(GL_ELEMENT_ARRAY_BUFFER, 0, 2 * len(indices))), dtype=np.uint16)
+    glBindVertexArray(0)
+    np.testing.assert_array_equal(stored, indices)
+    mesh.destroy()
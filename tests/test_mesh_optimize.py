@@ -0,0 +1,55 @@
+import numpy as np
+
+from mesh_optimize import acmr, narrow_indices, optimize_mesh, tipsify, weld_vertices
+from test_mesh_format import grid_mesh, triangles
+
+def test_weld_merges_identical_vertices_in_first_use_order():
+    soup = np.array([
+        [0, 0, 0], [1, 0, 0], [0, 1, 0],
+        [1, 0, 0], [-0.0, 1, 0], [1, 1, 0],
+    ], dtype=np.float32)
+
+    welded, indices = weld_vertices(soup)
+
+    np.testing.assert_array_equal(welded, [[0, 0, 0], [1, 0, 0], [0, 1, 0], [1, 1, 0]])
+    assert indices.tolist() == [0, 1, 2, 1, 2, 3]
+
+def test_weld_with_decimals_merges_near_duplicates():
+    vertices = np.array([[0.0, 0.0], [1e-7, 0.0], [1.0, 0.0]])
+
+    welded, indices = weld_vertices(vertices, np.array([0, 1, 2]), decimals=4)
+
+    assert len(welded) == 2
+    assert indices.tolist() == [0, 0, 1]
+
+def test_tipsify_keeps_triangles_and_improves_acmr():
+    vertices, indices = grid_mesh(30)
+    rng = np.random.default_rng(0)
+    shuffled = indices.reshape(-1, 3)[rng.permutation(len(indices) // 3)].reshape(-1)
+
+    reordered = tipsify(shuffled, len(vertices))
+
+    assert triangles(vertices, reordered) == triangles(vertices, shuffled)
+    assert acmr(reordered) < acmr(shuffled)
+    assert acmr(reordered) < 1.0
+
+def test_optimize_mesh_keeps_triangles_and_drops_unused_vertices():
+    vertices, indices = grid_mesh(10)
+    #an unused vertex and a soup of duplicated corners
+    vertices = np.vstack([vertices, np.full((1, 6), 9.0, dtype=np.float32)])
+    soup = vertices[indices]
+
+    optimized, optimized_indices = optimize_mesh(soup)
+
+    assert len(optimized) == len(vertices) - 1
+    assert optimized_indices.dtype == np.uint16
+    #vertices come in the order the indices first use them
+    _, first = np.unique(optimized_indices, return_index=True)
+    assert optimized_indices[np.sort(first)].tolist() == list(range(len(optimized)))
+    assert triangles(optimized, optimized_indices) == triangles(vertices, indices)
+
+def test_narrow_indices():
+    indices = np.array([0, 1, 2], dtype=np.int64)
+
+    assert narrow_indices(indices, 1 << 16).dtype == np.uint16
+    assert narrow_indices(indices, (1 << 16) + 1).dtype == np.uint32
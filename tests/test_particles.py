@@ -0,0 +1,62 @@
+import numpy as np
+
+from particles import ParticleEmitter, ParticleSystem
+
+def test_semi_implicit_euler_step():
+    system = ParticleSystem(4, gravity=(0.0, -10.0, 0.0), seed=0)
+    emitter = ParticleEmitter([1, 2, 3], rate=0, velocity=(2.0, 0.0, 0.0), spread=0.0, lifetime=(5.0, 5.0))
+    system.spawn(emitter, 2)
+
+    system.update(0.5)
+
+    #the velocity is updated first and the position moves with the new velocity
+    np.testing.assert_allclose(system.velocities[:2], [[2, -5, 0]] * 2)
+    np.testing.assert_allclose(system.positions[:2], [[2, -0.5, 3]] * 2)
+    np.testing.assert_allclose(system.ages[:2], 0.5)
+
+def test_dead_particles_are_removed_and_survivors_kept():
+    system = ParticleSystem(100, seed=1)
+    emitter = ParticleEmitter([0, 0, 0], rate=0, lifetime=(0.1, 2.0))
+    system.spawn(emitter, 100)
+    #tag every particle through its color so survivors can be followed after the packing
+    system.colors[:100, 0] = np.arange(100)
+    lifetimes = system.lifetimes[:100].copy()
+
+    died = system.update(1.0)
+
+    expected = np.flatnonzero(lifetimes > 1.0)
+    assert died == 100 - len(expected)
+    assert system.count == len(expected)
+    survivors = system.colors[:system.count, 0].astype(np.int64)
+    assert sorted(survivors.tolist()) == expected.tolist()
+    np.testing.assert_array_equal(system.lifetimes[:system.count], lifetimes[survivors])
+    assert (system.ages[:system.count] < system.lifetimes[:system.count]).all()
+
+def test_spawns_beyond_capacity_are_dropped():
+    system = ParticleSystem(10, seed=2)
+    emitter = ParticleEmitter([0, 0, 0], rate=0)
+
+    assert system.spawn(emitter, 7) == 7
+    assert system.spawn(emitter, 7) == 3
+    assert system.spawn(emitter, 1) == 0
+    assert system.count == 10
+
+def test_lifetimes_and_colors_come_from_the_emitter():
+    system = ParticleSystem(1000, seed=3)
+    emitter = ParticleEmitter([0, 0, 0], rate=0, lifetime=(1.0, 1.5), color=(1, 2, 3, 4))
+
+    system.spawn(emitter, 1000)
+
+    assert (system.lifetimes >= 1.0).all() and (system.lifetimes <= 1.5).all()
+    assert (system.colors == [1, 2, 3, 4]).all()
+
+def test_emitter_carries_fractions_between_frames():
+    system = ParticleSystem(1000, seed=4)
+    emitter = ParticleEmitter([0, 0, 0], rate=30.0, lifetime=(100.0, 100.0))
+    system.emitters.append(emitter)
+
+    #half a particle per frame still emits one every other frame
+    for _ in range(60):
+        system.update(1 / 60)
+
+    assert system.count in (29, 30)
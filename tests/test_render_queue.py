@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from render_queue import RenderQueue, pack_sort_keys, radix_argsort
+
+def test_radix_argsort_matches_a_stable_sort():
+    rng = np.random.default_rng(0)
+    #few distinct values so there are many ties, full 64-bit range so every digit is used
+    keys = rng.choice(rng.integers(0, 2**63, 50, dtype=np.uint64), 10000) * np.uint64(2) + np.uint64(1)
+
+    np.testing.assert_array_equal(radix_argsort(keys), np.argsort(keys, kind="stable"))
+
+def test_radix_argsort_with_constant_digits():
+    rng = np.random.default_rng(1)
+    keys = (rng.integers(0, 1 << 16, 1000, dtype=np.uint64) << np.uint64(32)) | np.uint64(0xABCD)
+
+    np.testing.assert_array_equal(radix_argsort(keys), np.argsort(keys, kind="stable"))
+
+@pytest.mark.parametrize("count", [0, 1])
+def test_radix_argsort_short_inputs(count):
+
+    np.testing.assert_array_equal(radix_argsort(np.zeros(count, dtype=np.uint64)), np.arange(count))
+
+def test_keys_sort_by_program_vao_material_then_depth():
+    programs = np.array([2, 1, 1, 1, 1])
+    vaos = np.array([0, 5, 3, 3, 3])
+    materials = np.array([0, 0, 1, 0, 0])
+    depths = np.array([0.0, 0.0, 0.0, 0.9, 0.1])
+
+    order = radix_argsort(pack_sort_keys(programs, vaos, materials, depths))
+
+    assert order.tolist() == [4, 3, 2, 1, 0]
+
+def test_ids_wider_than_16_bits_are_rejected():
+
+    with pytest.raises(ValueError):
+        pack_sort_keys(np.array([1 << 16]), np.array([0]), np.array([0]), np.array([0.0]))
+
+def test_queue_grows_and_sorts():
+    rng = np.random.default_rng(2)
+    queue = RenderQueue(capacity=4)
+    programs = rng.integers(1, 4, 100)
+    vaos = rng.integers(1, 10, 100)
+    depths = rng.random(100)
+
+    for i in range(100):
+        queue.submit(int(programs[i]), int(vaos[i]), first=i, count=3, depth=float(depths[i]))
+    order = queue.sort()
+
+    #depths are compared as the 16 bits the key keeps, ties stay in submission order
+    quantized = (depths.astype(np.float32) * 0xFFFF).astype(np.int64)
+    assert queue.count == 100 and queue.capacity >= 100
+    np.testing.assert_array_equal(queue.firsts[order], np.lexsort((quantized, vaos, programs)))
@@ -0,0 +1,64 @@
+import numpy as np
+
+from entity_array import model_transforms
+from scene_graph import SceneGraph
+
+def random_tree(count: int, seed: int = 0) -> SceneGraph:
+    rng = np.random.default_rng(seed)
+    graph = SceneGraph(count)
+    for i in range(count):
+        parent = int(rng.integers(-1, i)) if i else -1
+        graph.add(rng.uniform(-2, 2, 3).tolist(), rng.uniform(0, 360, 3).tolist(), parent)
+    return graph
+
+def brute_force_world(graph: SceneGraph) -> np.ndarray:
+    """ Every world matrix from scratch, walking each node up to its root. """
+
+    n = graph.count
+    local = model_transforms(graph.nodes.positions[:n], graph.nodes.eulers[:n], graph.order)
+    world = np.empty_like(local)
+    for i in range(n):
+        matrix = local[i]
+        parent = graph.parents[i]
+        while parent >= 0:
+            matrix = matrix @ local[parent]
+            parent = graph.parents[parent]
+        world[i] = matrix
+    return world
+
+def test_update_matches_brute_force():
+    graph = random_tree(200)
+
+    graph.update()
+
+    np.testing.assert_allclose(graph.world[:graph.count], brute_force_world(graph), atol=1e-4)
+
+def test_edits_recompute_only_the_changed_subtrees():
+    graph = SceneGraph(5)
+    root = graph.add([0, 0, 0], [0, 0, 0])
+    child = graph.add([1, 0, 0], [0, 0, 0], root)
+    grandchild = graph.add([0, 1, 0], [0, 0, 0], child)
+    other_root = graph.add([5, 0, 0], [0, 0, 0])
+    graph.update()
+
+    graph.set_position(child, [2, 0, 0])
+    changed = graph.update()
+
+    assert changed.tolist() == [child, grandchild]
+    np.testing.assert_allclose(graph.world[grandchild, 3, 0:3], [2, 1, 0])
+    np.testing.assert_allclose(graph.world[other_root, 3, 0:3], [5, 0, 0])
+    assert len(graph.update()) == 0
+
+def test_random_edits_stay_in_sync():
+    rng = np.random.default_rng(1)
+    graph = random_tree(300, seed=1)
+    graph.update()
+
+    for _ in range(5):
+        moved = rng.choice(graph.count, 20, replace=False)
+        graph.nodes.positions[moved] = rng.uniform(-2, 2, (20, 3))
+        graph.nodes.eulers[moved] = rng.uniform(0, 360, (20, 3))
+        graph.mark_dirty(moved)
+        graph.update()
+
+    np.testing.assert_allclose(graph.world[:graph.count], brute_force_world(graph), atol=1e-4)
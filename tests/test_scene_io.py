@@ -0,0 +1,107 @@
+import json
+
+import numpy as np
+import pytest
+
+from scene_io import (
+    SceneSaver, iter_entities, load_snapshot, read_metadata, read_scene, save_snapshot, write_scene,
+)
+from test_entity_array import random_entities
+
+def assert_same_entities(a, b):
+    assert a.count == b.count
+    np.testing.assert_array_equal(a.positions[:a.count], b.positions[:b.count])
+    np.testing.assert_array_equal(a.eulers[:a.count], b.eulers[:b.count])
+
+def test_json_round_trip_is_exact(tmp_path):
+    entities = random_entities(300)
+    path = str(tmp_path / "scene.json")
+
+    #a chunk that does not divide the count
+    write_scene(path, entities, chunk=64, name="test", seed=7)
+
+    assert_same_entities(read_scene(path), entities)
+    assert read_metadata(path) == {"version": 1, "count": 300, "name": "test", "seed": 7}
+    #still a plain JSON document
+    with open(path) as f:
+        assert len(json.load(f)["entities"]) == 300
+
+@pytest.mark.parametrize("chunk", [1, 7, 100])
+def test_streaming_with_small_chunks(tmp_path, chunk):
+    entities = random_entities(40)
+    path = str(tmp_path / "scene.json")
+    write_scene(path, entities)
+
+    streamed = list(iter_entities(path, chunk=chunk))
+
+    assert len(streamed) == 40
+    np.testing.assert_array_equal(np.array([e["position"] for e in streamed], dtype=np.float32),
+                                  entities.positions[:40])
+    assert read_metadata(path, chunk=chunk)["count"] == 40
+
+def test_documents_without_count(tmp_path):
+    path = tmp_path / "scene.json"
+    path.write_text('{"entities": [{"position": [1, 2, 3], "eulers": [0, 90, 0]}]}')
+
+    entities = read_scene(str(path))
+
+    assert entities.count == 1
+    np.testing.assert_array_equal(entities.eulers[0], [0, 90, 0])
+
+def test_empty_scene(tmp_path):
+    path = str(tmp_path / "scene.json")
+
+    write_scene(path, random_entities(0))
+
+    assert read_scene(path).count == 0
+
+def test_missing_entities_array(tmp_path):
+    path = tmp_path / "scene.json"
+    path.write_text('{"version": 1}')
+
+    with pytest.raises(ValueError):
+        list(iter_entities(str(path)))
+
+def test_snapshot_round_trip(tmp_path):
+    entities = random_entities(100)
+    path = str(tmp_path / "scene.npy")
+
+    save_snapshot(path, entities)
+    loaded = load_snapshot(path)
+
+    assert_same_entities(loaded, entities)
+    np.testing.assert_array_equal(loaded.previous_positions[:100], entities.positions[:100])
+
+def test_snapshot_with_the_wrong_dtype(tmp_path):
+    path = str(tmp_path / "other.npy")
+    np.save(path, np.zeros((4, 6), dtype=np.float32))
+
+    with pytest.raises(ValueError):
+        load_snapshot(path)
+
+def test_saver_writes_the_state_at_save_time(tmp_path):
+    entities = random_entities(50)
+    expected = random_entities(50)
+    saver = SceneSaver()
+
+    saver.save(str(tmp_path / "scene.npy"), entities)
+    saver.save(str(tmp_path / "scene.json"), entities, name="saved")
+    #changes after save() are not in the files
+    entities.positions[:50] += 1.0
+    saver.close()
+
+    assert saver.error is None
+    assert not saver.busy
+    assert_same_entities(read_scene(str(tmp_path / "scene.json")), expected)
+    assert read_metadata(str(tmp_path / "scene.json"))["name"] == "saved"
+
+def test_saver_reports_errors(tmp_path):
+    saver = SceneSaver()
+
+    saver.save(str(tmp_path / "missing" / "scene.npy"), random_entities(3))
+    saver.wait()
+    saver.save(str(tmp_path / "scene.npy"), random_entities(3))
+    saver.close()
+
+    assert isinstance(saver.error, OSError)
+    assert saver.saved == 1
@@ -0,0 +1,46 @@
+import pytest
+from OpenGL.GL.shaders import ShaderCompilationError
+
+from shader_cache import ShaderCache
+from shader_scheduler import ShaderScheduler
+
+VERTEX = "#version 330 core\nvoid main() { gl_Position = vec4(0.0, 0.0, 0.0, 1.0); }\n"
+FRAGMENT = "#version 330 core\nout vec4 color;\nvoid main() { color = vec4(1.0); }\n"
+
+@pytest.fixture
+def scheduler(gl_context, tmp_path):
+    return ShaderScheduler(ShaderCache(str(tmp_path)))
+
+def test_same_sources_share_one_compile(scheduler):
+    first = scheduler.submit_source(VERTEX, FRAGMENT)
+    second = scheduler.submit_source(VERTEX, FRAGMENT)
+    other = scheduler.submit_source(VERTEX, FRAGMENT.replace("vec4(1.0)", "vec4(0.5)"))
+
+    assert second is first
+    assert other is not first
+    assert len(scheduler.pending) == 2
+
+    scheduler.wait_all()
+
+    assert first.ready and first.program
+    assert other.program != first.program
+    assert not scheduler.pending
+
+def test_poll_resolves_everything_eventually(scheduler):
+    pending = scheduler.submit_source(VERTEX, FRAGMENT)
+
+    for _ in range(1000):
+        if scheduler.poll():
+            break
+
+    assert pending.ready and pending.error is None
+    #compiled again after the first finished, the cache answers
+    assert scheduler.submit_source(VERTEX, FRAGMENT).program == pending.program
+
+def test_compile_errors_surface_on_program(scheduler):
+    pending = scheduler.submit_source(VERTEX, FRAGMENT.replace("color =", "colour ="))
+
+    scheduler.wait_all()
+
+    with pytest.raises(ShaderCompilationError):
+        pending.program
@@ -0,0 +1,84 @@
+import os
+import signal
+import time
+
+import numpy as np
+import pytest
+
+from entity_array import EntityArray
+from shared_simulation import SimulationPool, drift_and_spin
+
+def random_entities(count: int, seed: int = 0) -> tuple[EntityArray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    entities = EntityArray(count)
+    for _ in range(count):
+        entities.add(rng.uniform(-90, 90, 3).tolist(), rng.uniform(0, 360, 3).tolist())
+    return entities, rng.uniform(-50, 50, (count, 3)).astype(np.float32)
+
+def hang(*args) -> None:
+    #a kernel stuck forever, e.g. a worker deadlocked in native code
+    time.sleep(3600)
+
+def fail(*args) -> None:
+    raise ValueError("kernel failed")
+
+def test_steps_match_a_single_process_run():
+    entities, velocities = random_entities(1000)
+    positions = entities.positions[:1000].copy()
+    eulers = entities.eulers[:1000].copy()
+    expected_velocities = velocities.copy()
+    pool = SimulationPool(entities, workers=3, velocities=velocities)
+
+    try:
+        for _ in range(5):
+            pool.step(1 / 60)
+            previous = pool.positions.copy()
+            #the kernel reads one slot and writes another, never in place
+            out_positions = np.empty_like(positions)
+            out_eulers = np.empty_like(eulers)
+            drift_and_spin(positions, eulers, out_positions, out_eulers, expected_velocities, 1 / 60)
+            positions, eulers = out_positions, out_eulers
+            np.testing.assert_allclose(pool.positions, positions, atol=1e-4)
+            np.testing.assert_allclose(pool.eulers, eulers, atol=1e-3)
+        np.testing.assert_array_equal(pool.previous_positions, pool.state.positions[(pool.latest - 1) % 3])
+        assert not np.array_equal(previous, pool.previous_positions)
+    finally:
+        pool.close()
+
+def test_a_killed_worker_raises_instead_of_hanging():
+    entities, velocities = random_entities(100)
+    pool = SimulationPool(entities, workers=2, velocities=velocities, timeout=5.0)
+    pool.step(1 / 60)
+
+    victim = pool._processes[0]
+    os.kill(victim.pid, signal.SIGKILL)
+    victim.join()
+
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="simulation-0"):
+        pool.step(1 / 60)
+    #the pool stays failed rather than mixing up a partial step with the next one
+    with pytest.raises(RuntimeError, match="simulation-0"):
+        pool.step(1 / 60)
+    pool.close()
+    assert time.monotonic() - start < 12.0
+    assert not any(process.is_alive() for process in pool._processes)
+
+def test_a_hung_worker_times_out_and_is_terminated():
+    entities, _ = random_entities(10)
+    pool = SimulationPool(entities, workers=2, kernel=hang, timeout=1.0)
+
+    pool.begin_step(1 / 60)
+    with pytest.raises(RuntimeError, match="within"):
+        pool.end_step()
+    pool.close()
+
+    assert not any(process.is_alive() for process in pool._processes)
+
+def test_a_raising_kernel_is_reported():
+    entities, _ = random_entities(10)
+    pool = SimulationPool(entities, workers=2, kernel=fail)
+
+    with pytest.raises(RuntimeError, match="exit code 1"):
+        pool.step(1 / 60)
+    pool.close()
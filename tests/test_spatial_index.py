@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from camera import Camera
+from spatial_index import INSIDE, OUTSIDE, UniformGrid, spheres_in_frustum
+
+CAMERAS = [
+    Camera(position=[0, 0, -30], target=[0, 0, 0], fovy=60, aspect=16/9, near=0.1, far=15.0),
+    Camera(position=[0, 0, -30], target=[0, 0, 0], fovy=60, aspect=16/9, near=0.1, far=80.0),
+    Camera(position=[5, 8, 3], target=[-4, 0, 2], fovy=90, aspect=1.0, near=0.5, far=20.0),
+]
+
+def random_grid(count: int, seed: int = 0) -> UniformGrid:
+    rng = np.random.default_rng(seed)
+    grid = UniformGrid([-20] * 3, [20] * 3, cell_size=4.0, capacity=count)
+    #some centers fall outside the grid and land in the overflow cell
+    grid.add_many(rng.uniform(-25, 25, (count, 3)).astype(np.float32), rng.uniform(0.1, 2.0, count).astype(np.float32))
+    return grid
+
+def brute_force(grid: UniformGrid, planes: np.ndarray) -> np.ndarray:
+    n = grid.count
+    return np.flatnonzero(spheres_in_frustum(grid.centers[:n], grid.radii[:n], planes))
+
+@pytest.mark.parametrize("camera", CAMERAS)
+def test_query_matches_brute_force(camera):
+    grid = random_grid(5000)
+    planes = camera.frustum_planes()
+
+    np.testing.assert_array_equal(grid.query_frustum(planes), brute_force(grid, planes))
+
+def test_query_after_moves_matches_brute_force():
+    rng = np.random.default_rng(2)
+    grid = random_grid(5000, seed=2)
+    planes = CAMERAS[1].frustum_planes()
+    grid.query_frustum(planes)
+
+    for _ in range(3):
+        moved = rng.choice(grid.count, 500, replace=False)
+        grid.update(moved, rng.uniform(-25, 25, (500, 3)).astype(np.float32), rng.uniform(0.1, 3.0, 500))
+        np.testing.assert_array_equal(grid.query_frustum(planes), brute_force(grid, planes))
+
+def test_add_one_at_a_time():
+    grid = UniformGrid([-10] * 3, [10] * 3, cell_size=2.0, capacity=3)
+    planes = CAMERAS[2].frustum_planes()
+    assert len(grid.query_frustum(planes)) == 0
+
+    for center in ([-4, 0, 2], [100, 100, 100], [-4, 1, 2]):
+        grid.add(center, 0.5)
+
+    np.testing.assert_array_equal(grid.query_frustum(planes), [0, 2])
+    with pytest.raises(IndexError):
+        grid.add([0, 0, 0], 1.0)
+
+def test_cell_states_are_conservative():
+    grid = random_grid(5000, seed=3)
+    planes = CAMERAS[1].frustum_planes()
+    n = grid.count
+
+    state = grid.classify_cells(planes)[grid.cell_of[:n]]
+    visible = spheres_in_frustum(grid.centers[:n], grid.radii[:n], planes)
+
+    assert visible[state == INSIDE].all()
+    assert not visible[state == OUTSIDE].any()
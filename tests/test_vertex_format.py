@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from OpenGL.GL import (
+    GL_FLOAT, GL_HALF_FLOAT, GL_INT_2_10_10_10_REV, GL_SHORT, GL_UNSIGNED_BYTE, GL_UNSIGNED_INT_2_10_10_10_REV,
+)
+
+from vertex_format import (
+    POSITION_COLOR_F32, POSITION_COLOR_PACKED, POSITION_NORMAL_UV_COLOR_F32, POSITION_NORMAL_UV_COLOR_PACKED,
+    VertexFormat, pack_snorm_2_10_10_10_rev, unpack_snorm_2_10_10_10_rev, unpack_unorm_2_10_10_10_rev,
+)
+
+def test_layouts_are_4_byte_aligned():
+    format = VertexFormat([
+        ("position", 0, 3, GL_HALF_FLOAT, False),
+        ("color", 1, 3, GL_UNSIGNED_BYTE, True),
+        ("uv", 2, 2, GL_FLOAT, False),
+    ])
+
+    assert [offset for *_, offset in format.attributes] == [0, 8, 12]
+    assert format.stride == 20
+    assert POSITION_COLOR_F32.stride == 24
+    assert POSITION_COLOR_PACKED.stride == 12
+    assert POSITION_NORMAL_UV_COLOR_F32.stride == 44
+    assert POSITION_NORMAL_UV_COLOR_PACKED.stride == 20
+
+def test_pack_round_trips_within_precision():
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(-10, 10, (100, 3)).astype(np.float32)
+    colors = rng.random((100, 3)).astype(np.float32)
+    normals = rng.normal(size=(100, 3))
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    uvs = rng.random((100, 2)).astype(np.float32)
+
+    vertices = POSITION_NORMAL_UV_COLOR_PACKED.pack(position=positions, color=colors, normal=normals, uv=uvs)
+
+    np.testing.assert_allclose(vertices["position"][:, 0:3], positions, rtol=1e-3)
+    #missing components are zero, w is one
+    np.testing.assert_array_equal(vertices["position"][:, 3], 1.0)
+    np.testing.assert_allclose(vertices["color"][:, 0:3] / 255.0, colors, atol=0.5 / 255.0 + 1e-6)
+    np.testing.assert_array_equal(vertices["color"][:, 3], 255)
+    np.testing.assert_allclose(unpack_snorm_2_10_10_10_rev(vertices["normal"]), normals, atol=1.0 / 511.0)
+    np.testing.assert_allclose(vertices["uv"], uvs, atol=1e-3)
+
+def test_pack_matches_the_float_layout_bytes():
+    positions = np.array([[1.0, 2.0, 3.0], [-1.0, 0.5, 0.0]], dtype=np.float32)
+    colors = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32)
+
+    vertices = POSITION_COLOR_F32.pack(position=positions, color=colors)
+
+    np.testing.assert_array_equal(vertices.view(np.float32).reshape(2, 6), np.hstack([positions, colors]))
+
+def test_snorm_2_10_10_10_rev_extremes():
+    vectors = np.array([[1.0, -1.0, 0.0], [0.5, -0.5, 2.0]])
+
+    packed = pack_snorm_2_10_10_10_rev(vectors)
+
+    assert packed.dtype == np.uint32
+    np.testing.assert_allclose(unpack_snorm_2_10_10_10_rev(packed), [[1.0, -1.0, 0.0], [0.5, -0.5, 1.0]],
+                               atol=1.0 / 511.0)
+    #-1 takes the bit pattern of -511, x sits in the lowest 10 bits
+    assert int(packed[0]) & 0x3FF == 511
+    assert (int(packed[0]) >> 10) & 0x3FF == 1024 - 511
+
+def test_unsigned_2_10_10_10_rev_and_integer_bytes():
+    format = VertexFormat([
+        ("color", 0, 4, GL_UNSIGNED_INT_2_10_10_10_REV, True),
+        ("bones", 1, 4, GL_UNSIGNED_BYTE, False),
+    ])
+    colors = np.array([[0.0, 0.5, 1.0, 1.0], [0.25, 2.0, -1.0, 0.0]], dtype=np.float32)
+
+    vertices = format.pack(color=colors, bones=[[0, 1, 2, 300], [7, 8, 9, 10]])
+
+    np.testing.assert_allclose(unpack_unorm_2_10_10_10_rev(vertices["color"]), [[0, 0.5, 1], [0.25, 1, 0]],
+                               atol=0.5 / 1023.0)
+    assert (vertices["color"] >> 30).tolist() == [3, 0]
+    #not normalized, the values are stored as integers
+    assert vertices["bones"].tolist() == [[0, 1, 2, 255], [7, 8, 9, 10]]
+
+@pytest.mark.parametrize("gl_type, normalized", [
+    (GL_INT_2_10_10_10_REV, False),
+    (GL_UNSIGNED_INT_2_10_10_10_REV, False),
+    (GL_SHORT, True),
+])
+def test_formats_without_a_packer_are_rejected(gl_type, normalized):
+
+    with pytest.raises(ValueError):
+        VertexFormat([("value", 0, 4, gl_type, normalized)])
@@ -1,20 +1,39 @@
-import pygame as pg
-from OpenGL.GL import *
-from OpenGL.GL.shaders import compileProgram, compileShader
+import ctypes
+import sys
+import time
+
+#startup is timed from here, so the imports below count towards it
+STARTED = time.perf_counter_ns()
+
+#run as the app it opts into release mode (--gl-debug or GL_DEBUG=1 keep checking) before
+#anything is imported from OpenGL. Imported as a module, the importer picks, e.g. frame_bench.py
+if __name__ == "__main__":
+    import gl_dispatch
+    gl_dispatch.configure(debug=gl_dispatch.debug_requested())
+from OpenGL.GL import (
+    GL_ARRAY_BUFFER, GL_BUFFER_SIZE, GL_COLOR_BUFFER_BIT, GL_FALSE, GL_FLOAT, GL_TRIANGLES,
+    glBindVertexArray, glClear, glClearColor, glDeleteVertexArrays, glDrawArrays,
+    glEnableVertexArrayAttrib, glGenVertexArrays, glGetBufferParameteriv, glUseProgram, glVertexAttribPointer,
+)
 import numpy as np
-import pyrr
+from pyrr import matrix44, vector3, vector4
 
-def createShader(vertexFilepath, fragmentFilepath):
-    
-    with open(vertexFilepath,'r') as f:
-        vertex_src = f.readlines()
+from cpu_transform import CpuVertexTransform
+from dynamic_buffer import DynamicBuffer
+from gl_context import OffscreenTarget, create_headless_context
+from profiler import NullProfiler, Profiler, StartupTimeline
+from shader_cache import shader_cache
 
-    with open(fragmentFilepath,'r') as f:
-        fragment_src = f.readlines()
+IMPORTED = time.perf_counter_ns()
 
-    shader = compileProgram(compileShader(vertex_src, GL_VERTEX_SHADER), compileShader(fragment_src, GL_FRAGMENT_SHADER))
+#(matrix, row, column) of the cos, sin and -sin entries in the stacked z, y and x rotations, as pyrr lays them out
+ROTATION_COS = ([0, 0, 1, 1, 2, 2], [0, 1, 0, 2, 1, 2], [0, 1, 0, 2, 1, 2])
+ROTATION_SIN = ([0, 1, 2], [1, 0, 2], [0, 2, 1])
+ROTATION_NEG_SIN = ([0, 1, 2], [0, 2, 1], [1, 0, 2])
 
-    return shader
+def createShader(vertexFilepath, fragmentFilepath):
+
+    return shader_cache.load(vertexFilepath, fragmentFilepath)
 
 class Entity:
 
@@ -25,110 +44,162 @@ class Entity:
 
 class App:
 
-    def __init__(self):        
-        pg.init()
-        pg.display.gl_set_attribute(pg.GL_CONTEXT_MAJOR_VERSION, 3)
-        pg.display.gl_set_attribute(pg.GL_CONTEXT_MINOR_VERSION, 3)
-        pg.display.gl_set_attribute(pg.GL_CONTEXT_PROFILE_MASK, pg.GL_CONTEXT_PROFILE_CORE)
-
-        pg.display.set_mode((1920, 1080), pg.OPENGL|pg.DOUBLEBUF)
-        self.clock = pg.time.Clock()
+    def __init__(self, headless: bool = False, profile: bool = False):
+        #headless: render offscreen through EGL/OSMesa, the caller drives update() and render()
+        self.headless = headless
+        self.profiler = Profiler() if profile else NullProfiler()
+        self.startup = StartupTimeline(STARTED)
+        self.startup.mark("import", IMPORTED)
+        self.started = False
+
+        if headless:
+            create_headless_context()
+            self.offscreen = OffscreenTarget(1920, 1080)
+        else:
+            #pygame is imported for the window only, headless runs never load it
+            import pygame as pg
+
+            pg.init()
+            pg.display.gl_set_attribute(pg.GL_CONTEXT_MAJOR_VERSION, 3)
+            pg.display.gl_set_attribute(pg.GL_CONTEXT_MINOR_VERSION, 3)
+            pg.display.gl_set_attribute(pg.GL_CONTEXT_PROFILE_MASK, pg.GL_CONTEXT_PROFILE_CORE)
+
+            pg.display.set_mode((1920, 1080), pg.OPENGL|pg.DOUBLEBUF)
+            self.clock = pg.time.Clock()
         glClearColor(0.00, 0.33, 0.50, 1)
+        self.startup.mark("context")
 
         self.triangle_mesh = TriangleMesh()
+        self.startup.mark("mesh")
         self.shader = createShader("triangle_shaders/vertex.txt", "triangle_shaders/fragment.txt")
         glUseProgram(self.shader)
+        self.startup.mark("shader")
 
         self.triangle = Entity(position= [0.5, 0, 0], eulers=[0,0,0])
 
-        self.mainLoop()
+        #rotation factors and the model matrix, rewritten in place every frame
+        self.rotations = np.tile(np.identity(4, dtype=np.float32), (3, 1, 1))
+        self._rotation_zy = np.empty((4, 4), dtype=np.float32)
+        self.model_transform = np.empty((4, 4), dtype=np.float32)
+
+        if not headless:
+            self.mainLoop()
+
+    def finish_startup(self) -> None:
+        #after the first frame is presented, by mainLoop or a headless driver
+        self.startup.mark("first frame")
+        self.started = True
 
     def mainLoop(self) -> None:
         #run the app
+        import pygame as pg
+
         running = True
         while (running):
+            self.profiler.begin_frame()
+
             #check for events
             for event in pg.event.get():
                 if (event.type == pg.QUIT):
                     running = False
 
-            #update triangle
-            self.triangle.eulers[2] += 0.25
-            if self.triangle.eulers[2] > 360:
-                self.triangle.eulers[2] -= 360
-
-            #refresh screen
-            glClear(GL_COLOR_BUFFER_BIT)
-            glUseProgram(self.shader)
+            with self.profiler.scope("update"):
+                self.update()
 
-            model_transform = pyrr.matrix44.create_identity(dtype=np.float32)
+            self.render()
 
-            
-            model_transform = pyrr.matrix44.multiply(
-            m1 = model_transform,
-            m2 = pyrr.matrix44.create_from_z_rotation(theta = np.radians(self.triangle.eulers[2]), dtype=np.float32)
-            )
-
-            model_transform = pyrr.matrix44.multiply(
-                m1 = model_transform,
-                m2 = pyrr.matrix44.create_from_y_rotation(theta = np.radians(self.triangle.eulers[2]), dtype=np.float32)
-            )
+            with self.profiler.scope("flip"):
+                pg.display.flip()
+            if not self.started:
+                self.finish_startup()
+            #timing
+            self.clock.tick(144)
 
-            model_transform = pyrr.matrix44.multiply(
-                m1 = model_transform,
-                m2 = pyrr.matrix44.create_from_x_rotation(theta = np.radians(self.triangle.eulers[2]), dtype=np.float32)
-            )
+            self.profiler.end_frame()
 
-            model_transform = pyrr.matrix44.multiply(
-                m1 = model_transform,
-                m2 = pyrr.matrix44.create_from_translation(vec = np.array([0.0, 0.0, 0.0]), dtype=np.float32)
-            )
+        if self.profiler.enabled:
+            self.profiler.export_chrome_trace("profile_trace.json")
 
-            self.triangle_mesh.build_vertices(model_transform)
-            glBindVertexArray(self.triangle_mesh.vao)
-            glDrawArrays(GL_TRIANGLES, 0, self.triangle_mesh.vertex_count)
+        self.quit()
 
+    def update(self) -> None:
+        #update triangle
+        self.triangle.eulers[2] += 0.25
+        if self.triangle.eulers[2] > 360:
+            self.triangle.eulers[2] -= 360
+
+    def make_model_transform(self) -> np.ndarray:
+        """
+            Rotation about z, then y, then x by the triangle's z euler, written
+            into preallocated matrices instead of a new pyrr chain every frame.
+        """
+
+        #float32 scalars as pyrr computes them, so the frames stay bit for bit the same
+        theta = np.radians(self.triangle.eulers[2])
+        c = np.cos(theta)
+        s = np.sin(theta)
+
+        self.rotations[ROTATION_COS] = c
+        self.rotations[ROTATION_SIN] = s
+        self.rotations[ROTATION_NEG_SIN] = -s
+
+        #row vectors, like matrix44.multiply; the translation the chain ended with was zero
+        z, y, x = self.rotations
+        np.matmul(z, y, out=self._rotation_zy)
+        np.matmul(self._rotation_zy, x, out=self.model_transform)
+        return self.model_transform
+
+    def render(self) -> None:
+        #refresh screen
+        glClear(GL_COLOR_BUFFER_BIT)
+        glUseProgram(self.shader)
 
+        model_transform = self.make_model_transform()
 
-            pg.display.flip()
-            #timing
-            self.clock.tick(144)
+        with self.profiler.scope("build_vertices"):
+            self.triangle_mesh.build_vertices(model_transform)
 
-        self.quit()
+        with self.profiler.scope("draw", gpu=True):
+            glBindVertexArray(self.triangle_mesh.vao)
+            glDrawArrays(GL_TRIANGLES, self.triangle_mesh.vertex_buffer.first_vertex, self.triangle_mesh.vertex_count)
+        self.triangle_mesh.vertex_buffer.fence()
 
     def quit(self) -> None:
         self.triangle_mesh.destroy()
-        glDeleteProgram(self.shader)
-        pg.quit()
+        shader_cache.delete_program(self.shader)
+        if self.headless:
+            self.offscreen.destroy()
+        else:
+            import pygame as pg
+
+            pg.quit()
         
 class TriangleMesh:
 
     def __init__(self):
         
-        self.originalPositions = (
-            pyrr.vector4.create(-0.25, 0.5, 0.0, 1.0, dtype=np.float32),
-            pyrr.vector4.create( 0.5,  0.0, 0.0, 1.0, dtype=np.float32),
-            pyrr.vector4.create(-0.25,-0.5, 0.0, 1.0, dtype=np.float32)
-        )
-
-        self.originalColors = (
-            pyrr.vector3.create( 1.0, 0.0, 0.0, dtype=np.float32),
-            pyrr.vector3.create( 0.0, 1.0, 0.0, dtype=np.float32),
-            pyrr.vector3.create( 0.0, 0.0, 1.0, dtype=np.float32)
-        )
-
-        self.vertex_count = 3
+        self.originalPositions = np.array((
+            vector4.create(-0.25, 0.5, 0.0, 1.0, dtype=np.float32),
+            vector4.create( 0.5,  0.0, 0.0, 1.0, dtype=np.float32),
+            vector4.create(-0.25,-0.5, 0.0, 1.0, dtype=np.float32)
+        ), dtype=np.float32)
+
+        self.originalColors = np.array((
+            vector3.create( 1.0, 0.0, 0.0, dtype=np.float32),
+            vector3.create( 0.0, 1.0, 0.0, dtype=np.float32),
+            vector3.create( 0.0, 0.0, 1.0, dtype=np.float32)
+        ), dtype=np.float32)
+
+        self.cpu_transform = CpuVertexTransform(self.originalPositions, self.originalColors)
+        self.vertex_count = self.cpu_transform.vertex_count
+        self.vertices = self.cpu_transform.vertices
 
         self.vao = glGenVertexArrays(1) #vao = vortex array object
-        self.vbo = glGenBuffers(1) #vbo = vertex buffer object
-
-        self.build_vertices(pyrr.matrix44.create_identity(dtype=np.float32))
+        glBindVertexArray(self.vao)
+        self.vertex_buffer = DynamicBuffer(self.vertices.nbytes, stride=24) #vbo = vertex buffer object, en anillo para escribir un frame mientras la gpu lee otro
+        self.vbo = self.vertex_buffer.buffer
 
-        
-        print(f"Vertex Array Handle {self.vao}") #identificadores como indeces de los objetos
-        print(f"Buffer Handle {self.vbo}") # vvvvv
-        buffer_size = glGetBufferParameteriv(GL_ARRAY_BUFFER, GL_BUFFER_SIZE)
-        print(f"Our buffer is taking up {buffer_size} bytes in memory") #memoria del buffer, 9 puntos tipo float, de 4 bytes c/u = 36 bytes en buffer
+        self.build_vertices(matrix44.create_identity(dtype=np.float32))
 
         glEnableVertexArrayAttrib(self.vao, 0) #tambien funciona glEnableVertexAttribArray que solo funciona con un parametro y es mas nuevo (o eso creo | video 1:04:30)
         glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(0))
@@ -138,29 +209,17 @@ class TriangleMesh:
 
     def build_vertices(self, transform: np.ndarray) -> None:
 
-        self.vertices = np.array([], dtype=np.float32)
-
-        for i in range(self.vertex_count):
-            
-            transform_position = pyrr.matrix44.multiply(
-                m1 = self.originalPositions[i],
-                m2 = transform
-            )
-
-            self.vertices = np.append(self.vertices, transform_position[0:3])
-            self.vertices = np.append(self.vertices, self.originalColors[i])
-
-
-
-        glBindVertexArray(self.vao)
-        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
-        glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_STATIC_DRAW)  #subiendo a el buffer de la memoria los datos, el vbo
+        mapped = self.vertex_buffer.map(self.vertices.shape)
+        self.cpu_transform.apply(transform, out=mapped)  #escribe directo en la memoria del buffer, sin copias
+        self.vertex_buffer.unmap()
 
     def destroy(self):
 
         glDeleteVertexArrays(1, (self.vao,))
-        glDeleteBuffers(1, (self.vbo,))
+        self.vertex_buffer.destroy()
 
 
 if __name__ == "__main__":
-    myApp = App()
\ No newline at end of file
+    myApp = App()
+    if "--startup" in sys.argv:
+        print(myApp.startup.report())
\ No newline at end of file
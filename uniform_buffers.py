@@ -0,0 +1,125 @@
+from OpenGL.GL import *
+import numpy as np
+
+from gl_dispatch import gl
+
+#binding points shared by every program, see bind_uniform_blocks
+FRAME_BINDING = 0
+DRAW_BINDING = 1
+
+#std140: mat4 is four vec4 columns with 16 byte alignment, a float packs after them,
+#and the block size rounds up to a multiple of 16
+FRAME_DATA = np.dtype({
+    "names": ["view", "projection", "time"],
+    "formats": [(np.float32, (4, 4)), (np.float32, (4, 4)), np.float32],
+    "offsets": [0, 64, 128],
+    "itemsize": 144,
+})
+
+DRAW_DATA = np.dtype({
+    "names": ["model"],
+    "formats": [(np.float32, (4, 4))],
+    "offsets": [0],
+    "itemsize": 64,
+})
+
+#uniform block name in the shaders -> binding point
+BLOCK_BINDINGS = {
+    "FrameData": FRAME_BINDING,
+    "DrawData": DRAW_BINDING,
+}
+
+def bind_uniform_blocks(program: int) -> None:
+    """ Point every known uniform block the program declares at its shared binding point. """
+
+    for name, binding in BLOCK_BINDINGS.items():
+        index = glGetUniformBlockIndex(program, name)
+        if index != GL_INVALID_INDEX:
+            glUniformBlockBinding(program, index, binding)
+
+class FrameUniforms:
+    """ The per-frame block: view, projection and time, uploaded once per frame for every program. """
+
+    def __init__(self):
+
+        #data is a record view of a persistent array, uploaded from its address without a copy
+        self._block = np.zeros(1, dtype=FRAME_DATA)
+        self.data = self._block[0]
+        self.buffer = glGenBuffers(1)
+        glBindBuffer(GL_UNIFORM_BUFFER, self.buffer)
+        glBufferData(GL_UNIFORM_BUFFER, FRAME_DATA.itemsize, None, GL_DYNAMIC_DRAW)
+        glBindBufferBase(GL_UNIFORM_BUFFER, FRAME_BINDING, self.buffer)
+
+    def upload(self) -> None:
+
+        gl.glBindBuffer(GL_UNIFORM_BUFFER, self.buffer)
+        gl.glBufferSubData(GL_UNIFORM_BUFFER, 0, FRAME_DATA.itemsize, self._block.ctypes.data)
+
+    def destroy(self) -> None:
+
+        glDeleteBuffers(1, (self.buffer,))
+
+class UniformArena:
+    """
+        Per-draw uniform blocks suballocated from one large buffer.
+
+        Records are laid out at GL_UNIFORM_BUFFER_OFFSET_ALIGNMENT strides in a
+        NumPy structured array, uploaded together with one glBufferSubData, and
+        each draw selects its record with glBindBufferRange.
+    """
+
+    def __init__(self, dtype: np.dtype, binding: int, capacity: int):
+        """
+            Parameters:
+
+                dtype: std140 layout of one block, e.g. DRAW_DATA
+
+                binding: binding point the block is read from
+
+                capacity: number of records, grows on demand
+        """
+
+        self.block_size = dtype.itemsize
+        alignment = int(glGetIntegerv(GL_UNIFORM_BUFFER_OFFSET_ALIGNMENT))
+        self.stride = -(-self.block_size // alignment) * alignment
+        #same fields, padded to the stride so records line up with their buffer offsets
+        self.dtype = np.dtype({
+            "names": dtype.names,
+            "formats": [dtype.fields[name][0] for name in dtype.names],
+            "offsets": [dtype.fields[name][1] for name in dtype.names],
+            "itemsize": self.stride,
+        })
+        self.binding = binding
+        self.count = 0
+
+        self.buffer = glGenBuffers(1)
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.records = np.zeros(capacity, dtype=self.dtype)
+        self._address = self.records.ctypes.data
+        glBindBuffer(GL_UNIFORM_BUFFER, self.buffer)
+        glBufferData(GL_UNIFORM_BUFFER, capacity * self.stride, None, GL_DYNAMIC_DRAW)
+
+    def reserve(self, count: int) -> np.ndarray:
+        """ Start a new frame with count records and return them to be filled. """
+
+        if count > self.capacity:
+            self._allocate(max(count, 2 * self.capacity))
+        self.count = count
+        return self.records[:count]
+
+    def upload(self) -> None:
+
+        if self.count:
+            gl.glBindBuffer(GL_UNIFORM_BUFFER, self.buffer)
+            gl.glBufferSubData(GL_UNIFORM_BUFFER, 0, self.count * self.stride, self._address)
+
+    def bind(self, record: int) -> None:
+
+        gl.glBindBufferRange(GL_UNIFORM_BUFFER, self.binding, self.buffer, record * self.stride, self.block_size)
+
+    def destroy(self) -> None:
+
+        glDeleteBuffers(1, (self.buffer,))
@@ -0,0 +1,207 @@
+from OpenGL.GL import *
+import numpy as np
+
+#GL component type -> NumPy dtype of one component
+GL_TYPES = {
+    int(GL_FLOAT): np.dtype("<f4"),
+    int(GL_HALF_FLOAT): np.dtype("<f2"),
+    int(GL_UNSIGNED_BYTE): np.dtype("u1"),
+    int(GL_BYTE): np.dtype("i1"),
+    int(GL_UNSIGNED_SHORT): np.dtype("<u2"),
+    int(GL_SHORT): np.dtype("<i2"),
+    int(GL_UNSIGNED_INT): np.dtype("<u4"),
+    int(GL_INT): np.dtype("<i4"),
+}
+
+#types holding all four components in one 32-bit word
+PACKED_TYPES = {
+    int(GL_INT_2_10_10_10_REV): np.dtype("<u4"),
+    int(GL_UNSIGNED_INT_2_10_10_10_REV): np.dtype("<u4"),
+}
+
+def attribute_dtype(components: int, gl_type: int) -> tuple:
+    """ NumPy format of one attribute, for a structured vertex dtype. """
+
+    gl_type = int(gl_type)
+    if gl_type in PACKED_TYPES:
+        return PACKED_TYPES[gl_type]
+    return (GL_TYPES[gl_type], (int(components),))
+
+def pack_unorm8(values: np.ndarray) -> np.ndarray:
+    """ [0, 1] floats to normalized unsigned bytes. """
+
+    return np.rint(np.clip(values, 0.0, 1.0) * 255.0).astype(np.uint8)
+
+def pack_uint8(values: np.ndarray) -> np.ndarray:
+    """ Floats to unsigned byte integers, e.g. bone indices, rounded and clamped to [0, 255]. """
+
+    return np.rint(np.clip(values, 0.0, 255.0)).astype(np.uint8)
+
+def pack_half(values: np.ndarray) -> np.ndarray:
+
+    return np.asarray(values, dtype=np.float16)
+
+def pack_snorm_2_10_10_10_rev(vectors: np.ndarray, w: np.ndarray | float = 0.0) -> np.ndarray:
+    """
+        (N,3) [-1, 1] vectors, e.g. unit normals, to GL_INT_2_10_10_10_REV words.
+
+        x, y and z take 10 signed bits each from the lowest bits up, w the top 2.
+    """
+
+    vectors = np.clip(np.asarray(vectors, dtype=np.float32), -1.0, 1.0)
+    xyz = np.rint(vectors * 511.0).astype(np.int32) & 0x3FF
+    w = np.rint(np.clip(np.broadcast_to(w, len(vectors)), -1.0, 1.0)).astype(np.int32) & 0x3
+    packed = xyz[:, 0] | (xyz[:, 1] << 10) | (xyz[:, 2] << 20) | (w << 30)
+    return packed.astype(np.uint32)
+
+def unpack_snorm_2_10_10_10_rev(packed: np.ndarray) -> np.ndarray:
+    """ Inverse of pack_snorm_2_10_10_10_rev for x, y, z, as the GL 4.2+ conversion does it. """
+
+    packed = np.asarray(packed, dtype=np.uint32).astype(np.int64)
+    xyz = np.stack([(packed >> shift) & 0x3FF for shift in (0, 10, 20)], axis=1)
+    xyz = np.where(xyz >= 512, xyz - 1024, xyz)
+    return np.maximum(xyz / 511.0, -1.0).astype(np.float32)
+
+def pack_unorm_2_10_10_10_rev(vectors: np.ndarray, w: np.ndarray | float = 0.0) -> np.ndarray:
+    """
+        (N,3) [0, 1] vectors, e.g. colors, to GL_UNSIGNED_INT_2_10_10_10_REV words.
+
+        x, y and z take 10 unsigned bits each from the lowest bits up, w the top 2.
+    """
+
+    vectors = np.clip(np.asarray(vectors, dtype=np.float32), 0.0, 1.0)
+    xyz = np.rint(vectors * 1023.0).astype(np.uint32)
+    w = np.rint(np.clip(np.broadcast_to(w, len(vectors)), 0.0, 1.0) * 3.0).astype(np.uint32)
+    return xyz[:, 0] | (xyz[:, 1] << 10) | (xyz[:, 2] << 20) | (w << 30)
+
+def unpack_unorm_2_10_10_10_rev(packed: np.ndarray) -> np.ndarray:
+    """ Inverse of pack_unorm_2_10_10_10_rev for x, y, z. """
+
+    packed = np.asarray(packed, dtype=np.uint32)
+    xyz = np.stack([(packed >> shift) & 0x3FF for shift in (0, 10, 20)], axis=1)
+    return (xyz / 1023.0).astype(np.float32)
+
+def _pack_float(values: np.ndarray) -> np.ndarray:
+    return np.asarray(values, dtype=np.float32)
+
+#(GL type, normalized) -> conversion of float source values, GL ignores normalized for float types
+PACKERS = {
+    (int(GL_FLOAT), False): _pack_float,
+    (int(GL_FLOAT), True): _pack_float,
+    (int(GL_HALF_FLOAT), False): pack_half,
+    (int(GL_HALF_FLOAT), True): pack_half,
+    (int(GL_UNSIGNED_BYTE), True): pack_unorm8,
+    (int(GL_UNSIGNED_BYTE), False): pack_uint8,
+    (int(GL_INT_2_10_10_10_REV), True): pack_snorm_2_10_10_10_rev,
+    (int(GL_UNSIGNED_INT_2_10_10_10_REV), True): pack_unorm_2_10_10_10_rev,
+}
+
+class VertexFormat:
+    """
+        Describes an interleaved vertex layout and packs float arrays into it.
+
+        Each attribute is (name, location, components, gl type, normalized).
+        Offsets are laid out in order on 4-byte boundaries, and the same
+        description sets up the glVertexAttribPointer calls. Only (type,
+        normalized) pairs in PACKERS are accepted, so pack() handles every
+        format that can be built.
+    """
+
+    def __init__(self, attributes: list[tuple]):
+        """
+            Parameters:
+
+                attributes: (name, location, components, gl type, normalized) in memory order
+        """
+
+        self.names = []
+        self.layout = []
+        formats = []
+        offsets = []
+        offset = 0
+        for name, location, components, gl_type, normalized in attributes:
+            if (int(gl_type), bool(normalized)) not in PACKERS:
+                kind = "normalized" if normalized else "unnormalized"
+                raise ValueError(f"{name}: no packer for {kind} GL type {int(gl_type):#x}")
+            format = attribute_dtype(components, gl_type)
+            self.names.append(name)
+            self.layout.append((location, components, int(gl_type), int(bool(normalized)), offset))
+            formats.append(format)
+            offsets.append(offset)
+            offset += -(-np.dtype(format).itemsize // 4) * 4
+
+        self.stride = offset
+        self.dtype = np.dtype({"names": self.names, "formats": formats, "offsets": offsets, "itemsize": self.stride})
+
+    @property
+    def attributes(self) -> list[tuple]:
+        """ (location, components, gl type, normalized, offset) per attribute, as mesh_format stores them. """
+
+        return list(self.layout)
+
+    def pack(self, count: int | None = None, **sources: np.ndarray) -> np.ndarray:
+        """
+            Convert float arrays into one interleaved vertex array.
+
+            Sources are matched to attributes by name and may have fewer
+            components than the attribute, e.g. xyz into a 4 component half
+            position, the rest is filled with 0 and w with 1. Attributes
+            without a source are zero.
+        """
+
+        if count is None:
+            count = len(next(iter(sources.values())))
+        vertices = np.zeros(count, dtype=self.dtype)
+
+        for name, (location, components, gl_type, normalized, offset) in zip(self.names, self.layout):
+            if name not in sources:
+                continue
+            values = np.asarray(sources[name], dtype=np.float32).reshape(count, -1)
+            packer = PACKERS[gl_type, bool(normalized)]
+            if gl_type in PACKED_TYPES:
+                vertices[name] = packer(values[:, 0:3], values[:, 3] if values.shape[1] > 3 else 0.0)
+                continue
+            if values.shape[1] < components:
+                padded = np.zeros((count, components), dtype=np.float32)
+                if components == 4:
+                    padded[:, 3] = 1.0
+                padded[:, :values.shape[1]] = values
+                values = padded
+            vertices[name] = packer(values)
+
+        return vertices
+
+    def set_up_attributes(self) -> None:
+        """ Enable and point every attribute at the currently bound GL_ARRAY_BUFFER. """
+
+        for location, components, gl_type, normalized, offset in self.layout:
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, components, gl_type, GL_TRUE if normalized else GL_FALSE,
+                                  self.stride, ctypes.c_void_p(offset))
+
+#six float32s, the layout TriangleMesh used to have
+POSITION_COLOR_F32 = VertexFormat([
+    ("position", 0, 3, GL_FLOAT, False),
+    ("color", 1, 3, GL_FLOAT, False),
+])
+
+#half xyzw position and normalized byte rgba, 12 bytes
+POSITION_COLOR_PACKED = VertexFormat([
+    ("position", 0, 4, GL_HALF_FLOAT, False),
+    ("color", 1, 4, GL_UNSIGNED_BYTE, True),
+])
+
+POSITION_NORMAL_UV_COLOR_F32 = VertexFormat([
+    ("position", 0, 3, GL_FLOAT, False),
+    ("color", 1, 3, GL_FLOAT, False),
+    ("normal", 2, 3, GL_FLOAT, False),
+    ("uv", 3, 2, GL_FLOAT, False),
+])
+
+#20 bytes instead of 44
+POSITION_NORMAL_UV_COLOR_PACKED = VertexFormat([
+    ("position", 0, 4, GL_HALF_FLOAT, False),
+    ("color", 1, 4, GL_UNSIGNED_BYTE, True),
+    ("normal", 2, 4, GL_INT_2_10_10_10_REV, True),
+    ("uv", 3, 2, GL_HALF_FLOAT, False),
+])
@@ -1,9 +1,11 @@
-import json
+from entity_array import EntityArray
+from scene_io import write_scene
 
-file = open('dump.json', 'w+')
-data = { "tilin": "ete sech", "numero": 4444 }
+entities = EntityArray(capacity=2)
+entities.add(position=[0.0, 0, 0], eulers=[0, 0, 0])
+entities.add(position=[1.5, 0, -2], eulers=[0, 0, 90])
 
-json.dump(data, file)
-dump = json.dumps(data)
+#streams the entities out in chunks, extra keywords go in the header
+write_scene('dump.json', entities, tilin="ete sech", numero=4444)
 
-print(dump)
\ No newline at end of file
+print(open('dump.json').read())
\ No newline at end of file